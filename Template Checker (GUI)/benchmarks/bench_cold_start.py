@@ -0,0 +1,52 @@
+"""Measures the cold start of the headless CLI against a budget.
+
+Run from anywhere: python "benchmarks/bench_cold_start.py"
+Exits with 1 when the median start time is over budget or when importing the
+CLI pulls in a module that should only load in the state that needs it.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_FOLDER = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src")
+
+# Median wall time of `python cli.py --help`, interpreter start included
+COLD_START_BUDGET_MS = 300
+RUNS = 10
+# Only needed by the GUI (tkinter) or by PARSE_XML (lxml, fontTools)
+DEFERRED_MODULES = ["tkinter", "lxml", "fontTools"]
+
+
+def time_command(command):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=SRC_FOLDER, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def loaded_deferred_modules():
+    script = ("import sys, cli; print(','.join(m for m in %r if m in sys.modules))"
+              % DEFERRED_MODULES)
+    output = subprocess.run([sys.executable, "-c", script], cwd=SRC_FOLDER, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    return [module for module in output.split(",") if module]
+
+
+if __name__ == "__main__":
+    # First run writes the bytecode caches, it is not a cold start we care about
+    time_command([sys.executable, "cli.py", "--help"])
+    interpreter_ms = statistics.median(
+        time_command([sys.executable, "-c", "pass"]) for _ in range(RUNS))
+    cli_ms = statistics.median(
+        time_command([sys.executable, "cli.py", "--help"]) for _ in range(RUNS))
+    deferred = loaded_deferred_modules()
+
+    print(f"interpreter: {interpreter_ms:.1f} ms")
+    print(f"cli --help:  {cli_ms:.1f} ms (budget {COLD_START_BUDGET_MS} ms)")
+    print(f"deferred modules loaded at import: {', '.join(deferred) or 'none'}")
+
+    if cli_ms > COLD_START_BUDGET_MS or deferred:
+        sys.exit(1)
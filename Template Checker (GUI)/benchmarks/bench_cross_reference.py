@@ -0,0 +1,69 @@
+"""Times story/page/frame cross-referencing as the story count grows.
+
+Run from anywhere: python "benchmarks/bench_cross_reference.py"
+The time per story should stay flat when the story count doubles.
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src"))
+
+from main import FontsParser, SpreadsParser, StoriesParser, StylesParser  # noqa: E402
+from package_source import ZipSource  # noqa: E402
+
+STORY_COUNTS = [250, 500, 1000, 2000, 4000]
+STORIES_PER_SPREAD = 10
+
+FONTS_XML = """<?xml version="1.0"?><Fonts>
+<FontFamily Self="di1" Name="Arial"><Font Name="Arial Regular" FontType="TrueType"/></FontFamily>
+</Fonts>"""
+
+STYLES_XML = """<?xml version="1.0"?><Styles><RootParagraphStyleGroup>
+<ParagraphStyle Self="ParagraphStyle/Body" Name="Body"><Properties><AppliedFont type="string">Arial</AppliedFont></Properties></ParagraphStyle>
+</RootParagraphStyleGroup></Styles>"""
+
+
+def build_idml(story_count):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as idml:
+        idml.writestr("Resources/Fonts.xml", FONTS_XML)
+        idml.writestr("Resources/Styles.xml", STYLES_XML)
+        for story in range(story_count):
+            idml.writestr(f"Stories/Story_u{story}.xml",
+                          f'<Root><Story Self="u{story}"><ParagraphStyleRange AppliedParagraphStyle="ParagraphStyle/Body">'
+                          f'<CharacterStyleRange><Content>Story {story}</Content></CharacterStyleRange>'
+                          f'</ParagraphStyleRange></Story></Root>')
+        for spread in range(0, story_count, STORIES_PER_SPREAD):
+            frames = "".join(f'<TextFrame Self="tf{story}" ParentStory="u{story}"/>'
+                             for story in range(spread, min(spread + STORIES_PER_SPREAD, story_count)))
+            idml.writestr(f"Spreads/Spread_s{spread}.xml",
+                          f'<Root><Spread Self="s{spread}"><Page Name="{spread}"/>{frames}</Spread></Root>')
+    buffer.seek(0)
+    return ZipSource(zipfile.ZipFile(buffer, "r"))
+
+
+def time_cross_reference(story_count):
+    source = build_idml(story_count)
+    spreads_parser = SpreadsParser("Spreads", source)
+    fonts_parser = FontsParser("Resources/Fonts.xml", source)
+    styles_parser = StylesParser("Resources/Styles.xml", source)
+
+    start = time.perf_counter()
+    stories_parser = StoriesParser(
+        "Stories", styles_parser, fonts_parser, spreads_parser, source)
+    stories_parser.map_text_frames(spreads_parser.get_text_frames())
+    for story_id in stories_parser.stories_by_id:
+        stories_parser.get_story_by_id(story_id)
+        spreads_parser.get_page_by_story_id(story_id)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'stories':>8} {'total ms':>10} {'us/story':>10}")
+    for story_count in STORY_COUNTS:
+        elapsed = time_cross_reference(story_count)
+        print(f"{story_count:>8} {elapsed * 1000:>10.1f} {elapsed / story_count * 1e6:>10.1f}")
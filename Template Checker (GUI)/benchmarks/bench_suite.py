@@ -0,0 +1,238 @@
+"""Times every state and parser on synthetic packages against JSON baselines.
+
+Run from anywhere: python "benchmarks/bench_suite.py" [--scenario large] [--runs 5]
+Packages come from idml_generator.py, one per scenario. For each scenario the
+median time of every States step of a full FrontifyChecker run is recorded,
+and the median time of every parser class constructed on its own.
+
+The results are compared with benchmarks/baselines/bench_suite.json, exits
+with 1 when a timing is more than --tolerance slower than its baseline.
+--update writes the results as the new baseline. Baselines are only
+comparable on the machine they were recorded on, record them again with
+--update after changing machines.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_FOLDER, "..", "src"))
+
+from idml_generator import build_package  # noqa: E402
+from main import (FontsParser, FrontifyChecker, ParallelLoader, SourceFoldersParser,  # noqa: E402
+                  SpreadsParser, StoriesParser, StylesParser)
+from package_source import ZipSource  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCHMARKS_FOLDER, "baselines", "bench_suite.json")
+PACKAGE_NAME = "Benchmark"
+# Parameters of idml_generator.build_package per scenario
+SCENARIOS = {
+    "small": {"pages": 10, "stories": 40, "ranges_per_story": 4, "style_depth": 3,
+              "links": 10, "embedded_images": 1, "fonts": 2},
+    "medium": {"pages": 60, "stories": 500, "ranges_per_story": 8, "style_depth": 5,
+               "links": 60, "embedded_images": 2, "fonts": 4},
+    "large": {"pages": 300, "stories": 3000, "ranges_per_story": 12, "style_depth": 8,
+              "links": 200, "embedded_images": 5, "fonts": 10},
+}
+# Timings below this many milliseconds are too noisy to flag as regressions
+MIN_REGRESSION_MS = 5.0
+
+
+# ---------------------------------------------------
+# Function: time_states
+# Description: Runs the state machine once the way cli.py does, with no
+# caches so every run parses and checks the whole package. PAR_CHECK holds
+# the single traversal of all document checks, see CheckEngine.
+# Returns: milliseconds per state name and for the whole run.
+# ---------------------------------------------------
+def time_states(package_path, workers):
+    timings = {}
+    current = [None, 0.0]
+
+    def on_state(state):
+        now = time.perf_counter()
+        if current[0] is not None:
+            timings[current[0]] = (now - current[1]) * 1000
+        current[0], current[1] = state.name, now
+
+    checker = FrontifyChecker(workers=workers, on_state=on_state)
+    checker.source_file_path = package_path
+    start = time.perf_counter()
+    with open(os.devnull, "w") as debug_output, contextlib.redirect_stdout(debug_output):
+        checker.run_state_machine()
+    end = time.perf_counter()
+    timings[current[0]] = (end - current[1]) * 1000
+    return timings, (end - start) * 1000
+
+
+# ---------------------------------------------------
+# Function: time_parsers
+# Description: Constructs every parser class on its own from the package
+# ZIP, in the order parse_xml does, each timed separately.
+# Returns: milliseconds per parser class name.
+# ---------------------------------------------------
+def time_parsers(package_path, workers):
+    loader = ParallelLoader(workers)
+    timings = {}
+
+    def timed(parser_class, *args):
+        start = time.perf_counter()
+        parser = parser_class(*args)
+        timings[parser_class.__name__] = (time.perf_counter() - start) * 1000
+        return parser
+
+    package_source = ZipSource.from_path(package_path)
+    idml_source = ZipSource.from_member(
+        package_source, f"{PACKAGE_NAME}/{PACKAGE_NAME}.idml")
+    try:
+        timed(SourceFoldersParser, package_source.join(PACKAGE_NAME, "Links"),
+              package_source.join(PACKAGE_NAME, "Document Fonts"), package_source, None, loader)
+        spreads_parser = timed(SpreadsParser, "Spreads", idml_source, loader)
+        fonts_parser = timed(FontsParser, "Resources/Fonts.xml", idml_source)
+        styles_parser = timed(StylesParser, "Resources/Styles.xml", idml_source)
+        timed(StoriesParser, "Stories", styles_parser, fonts_parser,
+              spreads_parser, idml_source, False, loader)
+    finally:
+        idml_source.close()
+        package_source.close()
+    return timings
+
+
+def median_timings(samples):
+    return {name: round(statistics.median(sample[name] for sample in samples), 3)
+            for name in samples[0]}
+
+
+def run_scenario(name, parameters, runs, workers, scratch_dir):
+    package_path = os.path.join(scratch_dir, f"{name}.zip")
+    parameters = build_package(package_path, PACKAGE_NAME, **parameters)
+    # One warm-up run, so imports and the page cache are not part of the first sample
+    time_states(package_path, workers)
+    state_samples, totals, parser_samples = [], [], []
+    for _ in range(runs):
+        states, total = time_states(package_path, workers)
+        state_samples.append(states)
+        totals.append(total)
+        parser_samples.append(time_parsers(package_path, workers))
+    return {
+        "parameters": parameters,
+        "package_bytes": os.path.getsize(package_path),
+        "total_ms": round(statistics.median(totals), 3),
+        "states": median_timings(state_samples),
+        "parsers": median_timings(parser_samples),
+    }
+
+
+# ---------------------------------------------------
+# Function: find_regressions
+# Description: Compares every timing of the results with the same timing of
+# the baseline. Timings missing from the baseline are not compared.
+# Returns: (scenario, timing, baseline ms, current ms) per regression.
+# ---------------------------------------------------
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        baseline_scenario = baseline.get("scenarios", {}).get(name)
+        if baseline_scenario is None or baseline_scenario["parameters"] != scenario["parameters"]:
+            continue
+        timings = {"total": scenario["total_ms"]}
+        baseline_timings = {"total": baseline_scenario["total_ms"]}
+        for group in ("states", "parsers"):
+            timings.update((f"{group}.{key}", value) for key, value in scenario[group].items())
+            baseline_timings.update((f"{group}.{key}", value)
+                                    for key, value in baseline_scenario[group].items())
+        for timing, current_ms in timings.items():
+            baseline_ms = baseline_timings.get(timing)
+            if baseline_ms is None:
+                continue
+            if current_ms > baseline_ms * (1 + tolerance) and current_ms - baseline_ms > MIN_REGRESSION_MS:
+                regressions.append((name, timing, baseline_ms, current_ms))
+    return regressions
+
+
+def print_scenario(name, scenario, baseline_scenario):
+    print(f"\n{name}: {scenario['parameters']}")
+    print(f"{'timing':<40} {'ms':>10} {'baseline':>10}")
+    rows = [("total", scenario["total_ms"], (baseline_scenario or {}).get("total_ms"))]
+    for group in ("states", "parsers"):
+        baseline_group = (baseline_scenario or {}).get(group, {})
+        rows.extend((f"{group}.{key}", value, baseline_group.get(key))
+                    for key, value in scenario[group].items())
+    for timing, value, baseline_value in rows:
+        baseline_text = "-" if baseline_value is None else f"{baseline_value:.1f}"
+        print(f"{timing:<40} {value:>10.1f} {baseline_text:>10}")
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the checker states and parsers on synthetic packages.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run, can be repeated (default: all)")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="Timed runs per scenario, the median is reported (default: 5)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads used to parse IDML parts (default: CPU count)")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Baseline JSON file (default: benchmarks/baselines/bench_suite.json)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, 0.25 is 25%% (default: 0.25)")
+    parser.add_argument("--update", action="store_true",
+                        help="Write the results as the new baseline instead of comparing")
+    parser.add_argument("--output", default=None,
+                        help="Also write the results to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": args.workers,
+        },
+        "runs": args.runs,
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="template-checker-bench-") as scratch_dir:
+        for name in args.scenario or SCENARIOS:
+            scenario = run_scenario(
+                name, SCENARIOS[name], args.runs, args.workers, scratch_dir)
+            results["scenarios"][name] = scenario
+            print_scenario(name, scenario, baseline.get("scenarios", {}).get(name))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+            output_file.write("\n")
+    if args.update:
+        if args.scenario and baseline:
+            # Keep the baselines of the scenarios that were not run
+            results["scenarios"] = {**baseline.get("scenarios", {}), **results["scenarios"]}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+            baseline_file.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for name, timing, baseline_ms, current_ms in regressions:
+        print(f"REGRESSION {name} {timing}: {baseline_ms:.1f} ms -> {current_ms:.1f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Deterministic generator of synthetic template packages for benchmarks.
+
+    python "benchmarks/idml_generator.py" out.zip [--pages 50] [--stories 200] ...
+
+The same parameters and seed always give a byte identical package ZIP laid
+out like a real hand-off: <name>/<name>.idml next to <name>/Links and
+<name>/Document Fonts. Most checks have something to find, so their report
+paths are part of what is measured.
+"""
+import argparse
+import io
+import random
+import sys
+import zipfile
+
+# Fixed member timestamp, zipfile stamps the current time otherwise
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+PACKAGING_NS = "http://ns.adobe.com/AdobeInDesign/idml/1.0/packaging"
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+NO_CHARACTER_STYLE = "CharacterStyle/$ID/[No character style]"
+# Range attributes that are reported as overrides of the paragraph style
+OVERRIDE_ATTRIBUTES = ['PointSize="12"', 'Tracking="20"', 'FillColor="Color/Red"']
+WORDS = ["template", "brand", "layout", "spread", "story", "frame", "image", "font",
+         "style", "page", "colour", "grid", "column", "margin", "bleed", "proof"]
+
+DEFAULT_PARAMETERS = {
+    "pages": 10,
+    # Pages of a spread share its frames and links, as facing pages do
+    "pages_per_spread": 1,
+    "stories": 40,
+    "ranges_per_story": 4,
+    "style_depth": 3,
+    "links": 10,
+    "embedded_images": 1,
+    "fonts": 2,
+    "seed": 0,
+}
+
+
+def write_member(zip_file, name, data, compress_type=zipfile.ZIP_DEFLATED):
+    member = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    member.compress_type = compress_type
+    member.external_attr = 0o644 << 16
+    zip_file.writestr(member, data)
+
+
+def font_family_name(index):
+    return f"Bench Sans {index}"
+
+
+# ---------------------------------------------------
+# Function: build_font
+# Description: Builds a minimal TrueType font of the given family, enough
+# for the document font checks to read its name and format.
+# Returns: the font file as bytes.
+# ---------------------------------------------------
+def build_font(family):
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder([".notdef"])
+    builder.setupCharacterMap({})
+    builder.setupGlyf({".notdef": TTGlyphPen(None).glyph()})
+    builder.setupHorizontalMetrics({".notdef": (500, 0)})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": family, "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    # head stores the creation time, keep it fixed so the bytes are too
+    builder.font["head"].created = builder.font["head"].modified = 0
+    builder.font.recalcTimestamp = False
+    font_file = io.BytesIO()
+    builder.save(font_file)
+    return font_file.getvalue()
+
+
+def build_fonts_xml(fonts):
+    families = []
+    for index in range(fonts):
+        family = font_family_name(index)
+        families.append(
+            f'<FontFamily Self="di{index}" Name="{family}">'
+            f'<Font Self="di{index}Font" FontFamily="{family}" Name="{family} Regular" '
+            f'PostScriptName="BenchSans{index}-Regular" FontStyleName="Regular" FontType="TrueType"/>'
+            f'</FontFamily>')
+    # One family the package does not ship, so the font checks report it
+    families.append(
+        '<FontFamily Self="diMissing" Name="Missing Serif">'
+        '<Font Self="diMissingFont" FontFamily="Missing Serif" Name="Missing Serif Bold" '
+        'PostScriptName="MissingSerif-Bold" FontStyleName="Bold" FontType="Type 1"/>'
+        '</FontFamily>')
+    return f'{XML_HEADER}<idPkg:Fonts xmlns:idPkg="{PACKAGING_NS}">{"".join(families)}</idPkg:Fonts>'
+
+
+def paragraph_style_id(level):
+    return f"ParagraphStyle/Level {level}"
+
+
+def character_style_id(level):
+    return f"CharacterStyle/Level {level}"
+
+
+# ---------------------------------------------------
+# Function: build_styles_xml
+# Description: Paragraph and character styles that each inherit from the
+# level above, style_depth levels deep. Only the root styles set a font,
+# every other level has to be resolved over its BasedOn chain.
+# ---------------------------------------------------
+def build_styles_xml(style_depth, fonts):
+    paragraph_styles = [
+        '<ParagraphStyle Self="ParagraphStyle/$ID/[No paragraph style]" Name="$ID/[No paragraph style]" Hyphenation="true">'
+        f'<Properties><AppliedFont type="string">{font_family_name(0)}</AppliedFont></Properties></ParagraphStyle>',
+        '<ParagraphStyle Self="ParagraphStyle/$ID/NormalParagraphStyle" Name="$ID/NormalParagraphStyle" Hyphenation="false">'
+        '<Properties><BasedOn type="string">$ID/[No paragraph style]</BasedOn></Properties></ParagraphStyle>',
+    ]
+    character_styles = [
+        f'<CharacterStyle Self="{NO_CHARACTER_STYLE}" Name="$ID/[No character style]"/>']
+    for level in range(style_depth):
+        based_on = "ParagraphStyle/$ID/NormalParagraphStyle" if level == 0 else paragraph_style_id(level - 1)
+        font = f'<AppliedFont type="string">{font_family_name(level % fonts)}</AppliedFont>' if level == 0 and fonts else ""
+        # The deepest style enables hyphenation, the hyphenation check reports it
+        hyphenation = "true" if level == style_depth - 1 else "false"
+        paragraph_styles.append(
+            f'<ParagraphStyle Self="{paragraph_style_id(level)}" Name="Level {level}" Hyphenation="{hyphenation}">'
+            f'<Properties><BasedOn type="object">{based_on}</BasedOn>{font}</Properties></ParagraphStyle>')
+        based_on = NO_CHARACTER_STYLE if level == 0 else character_style_id(level - 1)
+        character_styles.append(
+            f'<CharacterStyle Self="{character_style_id(level)}" Name="Level {level}">'
+            f'<Properties><BasedOn type="object">{based_on}</BasedOn></Properties></CharacterStyle>')
+    return (f'{XML_HEADER}<idPkg:Styles xmlns:idPkg="{PACKAGING_NS}">'
+            f'<RootCharacterStyleGroup>{"".join(character_styles)}</RootCharacterStyleGroup>'
+            f'<RootParagraphStyleGroup>{"".join(paragraph_styles)}</RootParagraphStyleGroup>'
+            f'</idPkg:Styles>')
+
+
+# ---------------------------------------------------
+# Function: build_story_xml
+# Description: One story of ranges_per_story character style ranges, four
+# per paragraph. A few ranges override the paragraph font or attributes and
+# the second story holds a table, as the checks look for both.
+# ---------------------------------------------------
+def build_story_xml(rng, story_index, ranges_per_story, style_depth, fonts):
+    paragraphs = []
+    ranges = []
+    for range_index in range(ranges_per_story):
+        character_style = character_style_id(rng.randrange(style_depth)) if style_depth and rng.random() < 0.5 \
+            else NO_CHARACTER_STYLE
+        attributes = f' {rng.choice(OVERRIDE_ATTRIBUTES)}' if rng.random() < 0.1 else ""
+        font = ""
+        if story_index == 0 and range_index == 0:
+            # The family Fonts.xml lists without a font file in Document Fonts
+            font = '<Properties><AppliedFont type="string">Missing Serif</AppliedFont></Properties>'
+        elif fonts and rng.random() < 0.1:
+            font = f'<Properties><AppliedFont type="string">{font_family_name(rng.randrange(fonts))}</AppliedFont></Properties>'
+        content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        table = ""
+        if story_index == 1 and range_index == 0:
+            table = ('<Table Self="table1"><Cell Self="table1i0"><ParagraphStyleRange AppliedParagraphStyle="ParagraphStyle/$ID/NormalParagraphStyle">'
+                     f'<CharacterStyleRange AppliedCharacterStyle="{NO_CHARACTER_STYLE}"><Content>cell</Content></CharacterStyleRange>'
+                     '</ParagraphStyleRange></Cell></Table>')
+        ranges.append(f'<CharacterStyleRange AppliedCharacterStyle="{character_style}"{attributes}>'
+                      f'{font}<Content>{content}</Content>{table}</CharacterStyleRange>')
+        if len(ranges) == 4 or range_index == ranges_per_story - 1:
+            # Every seventh paragraph has no style, the paragraph style check reports it
+            if style_depth and rng.random() > 1 / 7:
+                paragraph_style = paragraph_style_id(rng.randrange(style_depth))
+            else:
+                paragraph_style = "ParagraphStyle/$ID/NormalParagraphStyle"
+            paragraphs.append(
+                f'<ParagraphStyleRange AppliedParagraphStyle="{paragraph_style}">{"".join(ranges)}<Br/></ParagraphStyleRange>')
+            ranges = []
+    return (f'{XML_HEADER}<idPkg:Story xmlns:idPkg="{PACKAGING_NS}">'
+            f'<Story Self="u{story_index}">{"".join(paragraphs)}</Story></idPkg:Story>')
+
+
+def link_name(index):
+    return f"image_{index}.png"
+
+
+def build_spread_xml(spread_index, stories, links, embedded_images, pages, pages_per_spread):
+    spreads = spread_count(pages, pages_per_spread)
+    frames = []
+    for story_index in range(spread_index, stories, spreads):
+        # Every fifth frame auto sizes from its center, the default without a reference point
+        reference_point = "" if story_index % 5 == 0 else ' AutoSizingReferencePoint="TopLeftPoint"'
+        frames.append(f'<TextFrame Self="tf{story_index}" ParentStory="u{story_index}" ItemTransform="1 0 0 1 0 0">'
+                      f'<TextFramePreference AutoSizingType="HeightOnly"{reference_point}/>'
+                      '</TextFrame>')
+    rectangles = []
+    for link_index in range(spread_index, links, spreads):
+        stored_state = "Embedded" if link_index < embedded_images else "Normal"
+        # Every fifth image is rotated inside its frame
+        image_transform = "-1 0 0 -1 0 0" if link_index % 5 == 2 else "1 0 0 1 0 0"
+        rectangles.append(f'<Rectangle Self="r{link_index}" ItemTransform="1 0 0 1 0 0">'
+                          f'<Image Self="i{link_index}" ItemTransform="{image_transform}">'
+                          f'<Link Self="l{link_index}" LinkResourceURI="file:/Links/{link_name(link_index)}" '
+                          f'StoredState="{stored_state}"/></Image></Rectangle>')
+    first_page = spread_index * pages_per_spread
+    page_elements = "".join(f'<Page Self="p{page_index}" Name="{page_index + 1}"/>'
+                            for page_index in range(first_page, min(pages, first_page + pages_per_spread)))
+    return (f'{XML_HEADER}<idPkg:Spread xmlns:idPkg="{PACKAGING_NS}">'
+            f'<Spread Self="s{spread_index}">{page_elements}'
+            f'{"".join(frames)}{"".join(rectangles)}</Spread></idPkg:Spread>')
+
+
+def spread_count(pages, pages_per_spread):
+    return -(-pages // pages_per_spread)
+
+
+def build_designmap_xml(spreads):
+    spreads = "".join(f'<idPkg:Spread src="Spreads/Spread_s{spread_index}.xml"/>'
+                      for spread_index in range(spreads))
+    return (f'{XML_HEADER}<Document xmlns:idPkg="{PACKAGING_NS}">'
+            f'<idPkg:MasterSpread src="MasterSpreads/MasterSpread_m.xml"/>{spreads}</Document>')
+
+
+# ---------------------------------------------------
+# Function: build_idml
+# Description: Builds the .idml archive of a package.
+# Returns: the .idml file as bytes.
+# ---------------------------------------------------
+def build_idml(pages, pages_per_spread, stories, ranges_per_story, style_depth, links, embedded_images, fonts, seed):
+    rng = random.Random(seed)
+    spreads = spread_count(pages, pages_per_spread)
+    idml_file = io.BytesIO()
+    with zipfile.ZipFile(idml_file, "w") as idml:
+        # The mimetype member comes first and uncompressed, as InDesign writes it
+        write_member(idml, "mimetype",
+                     "application/vnd.adobe.indesign-idml-package", zipfile.ZIP_STORED)
+        write_member(idml, "designmap.xml", build_designmap_xml(spreads))
+        write_member(idml, "Resources/Fonts.xml", build_fonts_xml(fonts))
+        write_member(idml, "Resources/Styles.xml",
+                     build_styles_xml(style_depth, fonts))
+        write_member(idml, "MasterSpreads/MasterSpread_m.xml",
+                     f'{XML_HEADER}<idPkg:MasterSpread xmlns:idPkg="{PACKAGING_NS}"><MasterSpread Self="m">'
+                     '<Properties/><Page Self="mp" Name="A"/></MasterSpread></idPkg:MasterSpread>')
+        for spread_index in range(spreads):
+            write_member(idml, f"Spreads/Spread_s{spread_index}.xml",
+                         build_spread_xml(spread_index, stories, links, embedded_images, pages, pages_per_spread))
+        for story_index in range(stories):
+            write_member(idml, f"Stories/Story_u{story_index}.xml",
+                         build_story_xml(rng, story_index, ranges_per_story, style_depth, fonts))
+    return idml_file.getvalue()
+
+
+# ---------------------------------------------------
+# Function: build_package
+# Description: Writes a package ZIP for the given parameters, see
+# DEFAULT_PARAMETERS for their names. Missing parameters use the defaults.
+# Returns: the parameters the package was built with.
+# ---------------------------------------------------
+def build_package(package_path, name="Benchmark", **parameters):
+    unknown = set(parameters) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown package parameters: {', '.join(sorted(unknown))}")
+    parameters = {**DEFAULT_PARAMETERS, **parameters}
+    if parameters["pages"] < 1 or parameters["pages_per_spread"] < 1:
+        raise ValueError("A package needs at least one page and one page per spread")
+    rng = random.Random(parameters["seed"])
+    with zipfile.ZipFile(package_path, "w") as package:
+        write_member(package, f"{name}/{name}.idml", build_idml(**parameters))
+        for link_index in range(parameters["links"]):
+            # Incompressible image data of 4 KB to 256 KB
+            image_size = rng.randint(4, 256) * 1024
+            write_member(package, f"{name}/Links/{link_name(link_index)}",
+                         rng.randbytes(image_size), zipfile.ZIP_STORED)
+        # Present but never placed, the images check warns about it
+        write_member(package, f"{name}/Links/unused.png", rng.randbytes(1024), zipfile.ZIP_STORED)
+        for font_index in range(parameters["fonts"]):
+            family = font_family_name(font_index)
+            write_member(package, f"{name}/Document Fonts/{family}.ttf", build_font(family))
+        write_member(package, f"{name}/Document Fonts/AdobeFnt.lst", b"")
+    return parameters
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic Frontify template package for benchmarks.")
+    parser.add_argument("package", help="Path of the package ZIP to write")
+    parser.add_argument("--name", default="Benchmark",
+                        help="Package folder and .idml name (default: Benchmark)")
+    for parameter, default in DEFAULT_PARAMETERS.items():
+        parser.add_argument(f"--{parameter.replace('_', '-')}", type=int, default=default,
+                            help=f"(default: {default})")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_argument_parser().parse_args()
+    build_package(args.package, args.name,
+                  **{parameter: getattr(args, parameter) for parameter in DEFAULT_PARAMETERS})
+    sys.exit(0)
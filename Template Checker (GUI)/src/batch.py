@@ -0,0 +1,240 @@
+"""Batch validation of many template packages across a process pool.
+
+Each package runs through its own FrontifyChecker in a worker process with
+an isolated scratch folder, and all results are combined into one report:
+
+    python batch.py "packages/*.zip" other_folder --workers 8 --report report.json
+
+A worker process that dies (out of memory, native crash) only costs the
+package it was validating, it is reported as crashed and the others are
+validated on a new pool.
+
+Exit codes: 0 no errors in any package, 1 errors found or a package crashed,
+2 no packages found.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from cli import EXIT_FAILED, EXIT_PASSED, EXIT_USAGE, open_cache, run_checker
+from main import FontMetadataCache, ModelCache, ResultCache
+from metrics import CheckerMetrics
+
+STATUS_PASSED = "passed"
+STATUS_FAILED = "failed"
+STATUS_CRASHED = "crashed"
+
+# Set by init_worker in every worker process
+worker_font_cache = None
+worker_result_cache = None
+worker_model_cache = None
+
+
+# ---------------------------------------------------
+# Function: collect_packages
+# Description: Expands directories (every .zip directly inside) and glob
+# patterns into a sorted list of package paths without duplicates.
+# ---------------------------------------------------
+def collect_packages(inputs):
+    package_paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(glob.escape(pattern), "*.zip"))
+        else:
+            matches = glob.glob(pattern)
+        package_paths.update(os.path.abspath(path) for path in matches
+                             if path.endswith(".zip") and os.path.isfile(path))
+    return sorted(package_paths)
+
+
+def init_worker(use_font_cache, use_result_cache, use_model_cache):
+    global worker_font_cache, worker_result_cache, worker_model_cache
+    worker_font_cache = open_cache(FontMetadataCache) if use_font_cache else None
+    worker_result_cache = open_cache(
+        ResultCache) if use_result_cache else None
+    worker_model_cache = open_cache(ModelCache) if use_model_cache else None
+
+
+# ---------------------------------------------------
+# Function: validate_package
+# Description: Runs in a worker process. The scratch folder is private to
+# this package and removed afterwards, so extract mode never shares 'data'.
+# With collect_metrics the entry also holds a "metrics" snapshot of this
+# package, for the parent to merge into its MetricsRegistry.
+# Returns: a JSON serializable report entry for the package.
+# ---------------------------------------------------
+def validate_package(package_path, in_place, streaming, parse_workers, collect_metrics=False):
+    scratch_dir = tempfile.mkdtemp(prefix="template-checker-")
+    start = time.perf_counter()
+    metrics = CheckerMetrics() if collect_metrics else None
+    try:
+        checker = run_checker(package_path, in_place=in_place, streaming=streaming, workers=parse_workers,
+                              font_cache=worker_font_cache, scratch_dir=scratch_dir, result_cache=worker_result_cache,
+                              model_cache=worker_model_cache, metrics=metrics)
+        results = checker.results
+        entry = {
+            "package": package_path,
+            "status": STATUS_FAILED if results.has_errors() else STATUS_PASSED,
+            "seconds": round(time.perf_counter() - start, 3),
+            "cached": checker.results_from_cache,
+            "results": results.to_dict(),
+        }
+    except Exception as e:
+        entry = {
+            "package": package_path,
+            "status": STATUS_CRASHED,
+            "seconds": round(time.perf_counter() - start, 3),
+            "error": f"{type(e).__name__}: {e}",
+        }
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    if metrics is not None:
+        entry["metrics"] = metrics.registry.snapshot()
+    return entry
+
+
+# ---------------------------------------------------
+# Function: validate_on_pool
+# Description: Validates the packages on a new pool of worker processes and
+# passes every entry to on_entry as it arrives. A worker that dies (out of
+# memory, native crash) breaks the whole pool, every package not finished by
+# then is lost.
+# Returns: the lost package paths, in the order given.
+# ---------------------------------------------------
+def validate_on_pool(package_paths, workers, worker_options, package_options, on_entry):
+    lost = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=worker_options) as executor:
+        futures = {executor.submit(validate_package, package_path, *package_options): package_path
+                   for package_path in package_paths}
+        for future in as_completed(futures):
+            try:
+                entry = future.result()
+            except BrokenProcessPool:
+                lost.add(futures[future])
+                continue
+            on_entry(entry)
+    return [package_path for package_path in package_paths if package_path in lost]
+
+
+# ---------------------------------------------------
+# Function: run_batch
+# Description: Validates the packages on a pool of worker processes. The
+# metrics recorded by the workers are merged into metrics when it is given.
+# Packages lost to a dead worker go to a new pool once, a package lost a
+# second time runs on a pool of its own, so only the package that kills its
+# worker is reported as crashed.
+# Returns: the combined report, packages in the order given.
+# ---------------------------------------------------
+def run_batch(package_paths, workers=None, in_place=True, streaming=False, parse_workers=1, use_font_cache=True, use_result_cache=True, use_model_cache=True, progress=None, metrics=None):
+    start = time.perf_counter()
+    entries = {}
+    worker_options = (use_font_cache, use_result_cache, use_model_cache)
+    package_options = (in_place, streaming, parse_workers, metrics is not None)
+
+    def add_entry(entry):
+        if metrics is not None and "metrics" in entry:
+            metrics.registry.merge(entry.pop("metrics"))
+        entries[entry["package"]] = entry
+        if progress is not None:
+            progress(entry)
+
+    def validate_alone(package_path):
+        package_start = time.perf_counter()
+        if not validate_on_pool([package_path], 1, worker_options, package_options, add_entry):
+            return
+        if metrics is not None:
+            metrics.packages_validated.inc(status=STATUS_CRASHED)
+        add_entry({
+            "package": package_path,
+            "status": STATUS_CRASHED,
+            "seconds": round(time.perf_counter() - package_start, 3),
+            "error": "Worker process died",
+        })
+
+    pending = list(package_paths)
+    lost_once = set()
+    while pending:
+        lost = validate_on_pool(pending, workers, worker_options, package_options, add_entry)
+        for package_path in lost:
+            if package_path in lost_once:
+                validate_alone(package_path)
+        pending = [package_path for package_path in lost if package_path not in lost_once]
+        lost_once.update(pending)
+
+    packages = [entries[package_path] for package_path in package_paths]
+    summary = {status: sum(1 for entry in packages if entry["status"] == status)
+               for status in (STATUS_PASSED, STATUS_FAILED, STATUS_CRASHED)}
+    summary["packages"] = len(packages)
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return {"summary": summary, "packages": packages}
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Validate many Frontify template packages across a process pool.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Folders containing package ZIPs or glob patterns")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--parse-workers", type=int, default=1,
+                        help="Threads per package used to parse IDML parts (default: 1)")
+    parser.add_argument("--report", default=None,
+                        help="Write the combined JSON report to this file instead of stdout")
+    parser.add_argument("--extract", action="store_true",
+                        help="Extract packages to a scratch folder instead of reading them in place")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Read story files with iterparse to bound memory use")
+    parser.add_argument("--no-font-cache", action="store_true",
+                        help="Do not use the on-disk font metadata cache")
+    parser.add_argument("--no-result-cache", action="store_true",
+                        help="Always run the checks, even for packages validated before")
+    parser.add_argument("--no-model-cache", action="store_true",
+                        help="Parse every IDML member, even members unchanged since an earlier run")
+    parser.add_argument("--metrics-file", metavar="FILE", default=None,
+                        help="Write Prometheus text format metrics of the batch to FILE")
+    return parser
+
+
+def print_progress(entry):
+    print(f"[{entry['status'].upper()}] {entry['package']} ({entry['seconds']}s)",
+          file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    package_paths = collect_packages(args.inputs)
+    if not package_paths:
+        print("No packages found.", file=sys.stderr)
+        return EXIT_USAGE
+
+    metrics = CheckerMetrics() if args.metrics_file else None
+    report = run_batch(package_paths, workers=args.workers, in_place=not args.extract, streaming=args.streaming,
+                       parse_workers=args.parse_workers, use_font_cache=not args.no_font_cache,
+                       use_result_cache=not args.no_result_cache, use_model_cache=not args.no_model_cache,
+                       progress=print_progress, metrics=metrics)
+    if metrics is not None:
+        metrics.write_textfile(args.metrics_file)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+
+    summary = report["summary"]
+    print(f"{summary['packages']} packages: {summary[STATUS_PASSED]} passed, {summary[STATUS_FAILED]} failed, "
+          f"{summary[STATUS_CRASHED]} crashed in {summary['seconds']}s", file=sys.stderr)
+    return EXIT_PASSED if summary[STATUS_PASSED] == summary["packages"] else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
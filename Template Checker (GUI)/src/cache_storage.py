@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+CACHE_FOLDER_NAME = "Template Checker"
+
+
+# ---------------------------------------------------
+# Function: user_cache_dir
+# Description: Returns the per-user cache folder of the checker for the
+# current platform and creates it if needed.
+# ---------------------------------------------------
+def user_cache_dir():
+    if sys.platform == "darwin":
+        base_dir = os.path.expanduser("~/Library/Caches")
+    elif sys.platform == "win32":
+        base_dir = os.environ.get(
+            "LOCALAPPDATA", os.path.expanduser("~\\AppData\\Local"))
+    else:
+        base_dir = os.environ.get(
+            "XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    cache_dir = os.path.join(base_dir, CACHE_FOLDER_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+# **********************************************************
+# Class: SqliteLRUCache
+# Description: A key -> bytes store in a SQLite file. Entries that were not
+# used for the longest time are evicted once the stored values exceed
+# max_bytes bytes. Safe to share between threads.
+# put_many and touch_many write a whole batch in one transaction, for callers
+# that look up thousands of small entries per run.
+# **********************************************************
+class SqliteLRUCache:
+    def __init__(self, cache_path, max_bytes):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Lookups answered from / missing in the cache, for metrics
+        self.hits = 0
+        self.misses = 0
+        # timeout lets processes of a batch run wait for each other's writes
+        self.connection = sqlite3.connect(
+            cache_path, timeout=30, check_same_thread=False)
+        # A lost last_used update after a power cut only changes eviction order
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.connection.commit()
+
+    def get(self, key, touch=True):
+        """Returns the value or None. touch=False leaves last_used to touch_many."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if touch:
+                self.connection.execute(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.connection.commit()
+            return bytes(row[0])
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, sqlite3.Binary(value), len(value), now) for key, value in items])
+            self._evict()
+            self.connection.commit()
+
+    def touch_many(self, keys):
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in keys])
+            self.connection.commit()
+
+    def _evict(self):
+        total_bytes = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        evicted_keys = []
+        for key, size in self.connection.execute("SELECT key, size FROM entries ORDER BY last_used ASC").fetchall():
+            if total_bytes <= self.max_bytes:
+                break
+            evicted_keys.append((key,))
+            total_bytes -= size
+        self.connection.executemany(
+            "DELETE FROM entries WHERE key = ?", evicted_keys)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
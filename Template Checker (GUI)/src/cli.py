@@ -0,0 +1,159 @@
+"""Headless command line entry point of the Template Checker.
+
+Runs the FrontifyChecker state machine on a package ZIP without the GUI and
+exits with a status code, so packages can be checked in CI:
+
+    python cli.py path/to/package.zip [--json | --ndjson] [--extract] [--workers N]
+
+--ndjson streams one JSON record per line while the checks run: a "state"
+"started" and a "finished" record per state, the same around the single
+CHECK_ENGINE traversal that finds the story and spread findings, a "finding"
+record per occurrence and a final "summary".
+--profile FILE writes wall time, CPU time, tracemalloc peak and parser
+counters of every state as a JSON span tree. --metrics-file FILE writes the
+run's metrics in the Prometheus text format, e.g. for the node_exporter
+textfile collector.
+
+Exit codes: 0 no errors found, 1 errors found, 2 the package could not be
+checked: not a ZIP, a CODE ERROR error (e.g. the package or its IDML could
+not be read) or the checker failed on it.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+
+from error_handling import NdjsonSink
+from instrumentation import Profiler
+from metrics import CheckerMetrics
+from main import FontMetadataCache, FrontifyChecker, ModelCache, ResultCache
+
+EXIT_PASSED = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+# Type of the findings about a package the checker could not read
+CODE_ERROR = "CODE ERROR"
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Validate a Frontify template package (.zip) without the GUI.")
+    parser.add_argument("package", help="Path to the package ZIP")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true",
+                        help="Print the results as JSON instead of text")
+    output.add_argument("--ndjson", action="store_true",
+                        help="Stream states and findings as NDJSON records while the checks run")
+    parser.add_argument("--extract", action="store_true",
+                        help="Extract the package to the 'data' folder instead of reading it in place")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Read story files with iterparse to bound memory use")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads used to parse IDML parts (default: CPU count)")
+    parser.add_argument("--no-font-cache", action="store_true",
+                        help="Do not use the on-disk font metadata cache")
+    parser.add_argument("--no-result-cache", action="store_true",
+                        help="Always run the checks, even for a package validated before")
+    parser.add_argument("--no-model-cache", action="store_true",
+                        help="Parse every IDML member, even members unchanged since an earlier run")
+    parser.add_argument("--profile", metavar="FILE", default=None,
+                        help="Write per-state timings, memory peaks and parser counters to FILE as JSON")
+    parser.add_argument("--no-profile-memory", action="store_true",
+                        help="Leave tracemalloc off while profiling, it slows the run down")
+    parser.add_argument("--metrics-file", metavar="FILE", default=None,
+                        help="Write Prometheus text format metrics of the run to FILE")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Show the checker's debug output on stderr")
+    return parser
+
+
+# ---------------------------------------------------
+# Function: open_cache
+# Description: Opens a FontMetadataCache, ResultCache or ModelCache. Caches are an
+# optimization, a run without them is still valid.
+# ---------------------------------------------------
+def open_cache(cache_class):
+    try:
+        return cache_class()
+    except (OSError, sqlite3.Error) as e:
+        print(f"{cache_class.__name__} disabled: {e}", file=sys.stderr)
+        return None
+
+
+# ---------------------------------------------------
+# Function: run_checker
+# Description: Runs the state machine from UNZIP_PACKAGE on the given path,
+# the same way FrontifyGUI does after a file was selected.
+# Returns: the FrontifyChecker, its results hold the findings.
+# ---------------------------------------------------
+def run_checker(package_path, in_place=True, streaming=False, workers=None, font_cache=None, verbose=False, scratch_dir=None, result_cache=None, model_cache=None, finding_sink=None, profiler=None, metrics=None):
+    checker = FrontifyChecker(in_place=in_place, streaming=streaming, workers=workers, font_cache=font_cache,
+                              scratch_dir=scratch_dir, result_cache=result_cache, model_cache=model_cache,
+                              finding_sink=finding_sink, profiler=profiler, metrics=metrics)
+    checker.source_file_path = package_path
+    # The state machine prints debug output, keep stdout for the results
+    debug_output = sys.stderr if verbose else open(os.devnull, "w")
+    try:
+        with contextlib.redirect_stdout(debug_output):
+            checker.run_state_machine()
+    finally:
+        if debug_output is not sys.stderr:
+            debug_output.close()
+    return checker
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+
+    if not args.package.endswith(".zip") or not os.path.isfile(args.package):
+        print(f"Not a ZIP file: {args.package}", file=sys.stderr)
+        return EXIT_USAGE
+
+    font_cache = None if args.no_font_cache else open_cache(FontMetadataCache)
+    result_cache = None if args.no_result_cache else open_cache(ResultCache)
+    model_cache = None if args.no_model_cache else open_cache(ModelCache)
+    # Created before run_checker redirects stdout, so records still reach the real stdout
+    finding_sink = NdjsonSink(sys.stdout) if args.ndjson else None
+    profiler = Profiler(trace_memory=not args.no_profile_memory) if args.profile else None
+    metrics = CheckerMetrics() if args.metrics_file else None
+    try:
+        checker = run_checker(args.package, in_place=not args.extract, streaming=args.streaming, workers=args.workers,
+                              font_cache=font_cache, verbose=args.verbose, result_cache=result_cache, model_cache=model_cache,
+                              finding_sink=finding_sink, profiler=profiler, metrics=metrics)
+    except Exception as e:
+        # In CI a package the checker fails on must not read as "errors found"
+        print(f"Could not check {args.package}: {type(e).__name__}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    finally:
+        for cache in (font_cache, result_cache, model_cache):
+            if cache is not None:
+                cache.close()
+        # Also written when the checker crashed, the status says so
+        if metrics is not None:
+            metrics.write_textfile(args.metrics_file)
+
+    if profiler is not None:
+        with open(args.profile, "w", encoding="utf-8") as profile_file:
+            json.dump({"package": args.package, **profiler.to_dict()},
+                      profile_file, indent=2)
+            profile_file.write("\n")
+
+    if args.ndjson:
+        pass  # Already streamed, ending with the summary record
+    elif args.json:
+        json.dump(checker.results.to_dict(), sys.stdout,
+                  indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        checker.results.write_text_results(sys.stdout)
+
+    # CODE ERROR warnings (e.g. no MasterSpreads folder) do not stop the checks
+    if checker.results.query(severity="error", check=CODE_ERROR):
+        return EXIT_USAGE
+    return EXIT_FAILED if checker.results.has_errors() else EXIT_PASSED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,113 +1,469 @@
-import tkinter as tk
-from collections import defaultdict
+import json
+import re
+import threading
+import time
+
+# Same value as tkinter.END, tkinter itself is only needed by the GUI
+END = "end"
+
+SEVERITIES = ["success", "error", "warning"]
+# Display prefix and text color of each severity
+SEVERITY_STYLES = {
+    "success": ("✅ [SUCCESS] ", "green"),
+    "error": ("❌ ", "red"),
+    "warning": ("⚠️ ", "yellow"),
+}
+# Findings inserted into the Text widget per insert call
+RENDER_BATCH_ROWS = 1000
+# Page key of findings that are not about a single page
+GENERAL_PAGE = "general"
+# Locations kept per aggregated finding, the count covers all occurrences
+MAX_SAMPLE_LOCATIONS = 5
+
+
+# Every rendered finding carries one tag per filter, hiding a tag hides its rows
+def type_tag(finding_type):
+    return f"type:{finding_type}"
+
+
+def page_tag(pages):
+    # A finding on several pages gets one tag naming all of them, see FrontifyGUI.apply_filters
+    return "page:" + "|".join(pages or [GENERAL_PAGE])
+
+
+def natural_sort_key(page):
+    # "2" before "10", labels like "A-3" or "iv" compare without int() failing
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in re.split(r"(\d+)", page) if part]
+
+
+# **********************************************************
+# Class: Finding
+# Description: One result of a check. subject is the text shown to the user,
+# check the type shown in brackets before it. location says where a single
+# occurrence is, e.g. "on Page: 3", and message is the wording of a finding
+# that occurred once, when it differs from subject and location.
+# Findings with the same check and subject in the same group are aggregated
+# into one Finding that counts its occurrences and keeps a sample of their
+# locations. The group is the page unless the check passes one, e.g. the
+# link that every page of a spread shares. pages lists every page with an
+# occurrence, page is the first of them.
+# **********************************************************
+class Finding:
+    def __init__(self, check, severity, subject, page=None, location=None, message=None, group=None):
+        self.check = check
+        self.severity = severity
+        self.subject = subject
+        self.page = page if page else GENERAL_PAGE
+        self.pages = [self.page]
+        self.message = message
+        self.group = self.page if group is None else group
+        self.count = 1
+        self.locations = [location] if location else []
+        # Set when a distinct location did not fit into the sample
+        self.locations_truncated = False
+
+    def get_key(self):
+        return self.severity, self.check, self.subject, self.group
+
+    def add_occurrence(self, location=None, page=None):
+        """Counts one more occurrence. Returns True when it is on a page the finding was not on yet."""
+        self.count += 1
+        if location and location not in self.locations:
+            if len(self.locations) < MAX_SAMPLE_LOCATIONS:
+                self.locations.append(location)
+            else:
+                self.locations_truncated = True
+        page = page if page else GENERAL_PAGE
+        if page in self.pages:
+            return False
+        self.pages.append(page)
+        return True
+
+    def to_record(self):
+        return {
+            "check": self.check,
+            "severity": self.severity,
+            "subject": self.subject,
+            "pages": self.pages,
+            "message": self.message,
+            "count": self.count,
+            "locations": self.locations,
+            "locations_truncated": self.locations_truncated,
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuilds an aggregated Finding written by to_record."""
+        finding = cls(record["check"], record["severity"], record["subject"],
+                      record["pages"][0], message=record["message"])
+        finding.pages = list(record["pages"])
+        finding.count = record["count"]
+        finding.locations = list(record["locations"])
+        finding.locations_truncated = record["locations_truncated"]
+        return finding
+
+    def get_text(self):
+        if self.count == 1 and self.message:
+            return f"[{self.check}]: {self.message}"
+        text = f"[{self.check}]: {self.subject}"
+        if self.count == 1:
+            return f"{text} {self.locations[0]}" if self.locations else text
+        text = f"{text} ({self.count} occurrences)"
+        if not self.locations:
+            return text
+        sample = "; ".join(self.locations)
+        more = "; ..." if self.locations_truncated else ""
+        return f"{text}: {sample}{more}"
+
+    def __str__(self):
+        return self.get_text()
+
+
+# **********************************************************
+# Class: NdjsonSink
+# Description: Writes findings as newline delimited JSON the moment they are
+# found, one record per line and flushed right away, so a consumer can act
+# on the first finding while the checks still run. Every state gets a
+# "started" and, once it completed, a "finished" record. The CHECK_ENGINE
+# traversal is nested in the first check state. Records:
+#   {"record": "state", "state": ..., "event": "started" | "finished" | "cancelled", "elapsed": ...}
+#   {"record": "finding", "severity", "check", "subject", "page", "location",
+#    "pages", "count", "locations", "state", ...}
+#   {"record": "summary", "status": "passed" | "failed", "errors", "warnings", "successes", ...}
+# Every occurrence is written live with a count of 1, aggregation only
+# applies to the report. Findings replayed from the result cache are the
+# aggregated ones, with the same fields and "cached": true.
+# **********************************************************
+class NdjsonSink:
+    def __init__(self, stream):
+        self.stream = stream
+        # Started and not yet finished states, a nested step such as CHECK_ENGINE
+        # on top. Findings without an explicit state belong to the innermost one.
+        self.open_states = []
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def write_record(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def _elapsed(self):
+        return round(time.perf_counter() - self.started, 3)
+
+    def write_state(self, state_name, event="started"):
+        if event == "started":
+            self.open_states.append(state_name)
+        elif event == "finished" and state_name in self.open_states:
+            self.open_states.remove(state_name)
+        self.write_record({"record": "state", "state": state_name,
+                          "event": event, "elapsed": self._elapsed()})
+
+    def write_finding(self, finding, state_name=None, cached=False):
+        record = {
+            "record": "finding",
+            "severity": finding.severity,
+            "check": finding.check,
+            "subject": finding.subject,
+            "page": finding.page,
+            "location": finding.locations[0] if finding.locations else None,
+            "pages": finding.pages,
+            "count": finding.count,
+            "locations": finding.locations,
+            "state": state_name or (self.open_states[-1] if self.open_states else None),
+            "elapsed": self._elapsed(),
+        }
+        if cached:
+            record["cached"] = True
+        self.write_record(record)
+
+    def write_summary(self, results, cached=False):
+        self.write_record({
+            "record": "summary",
+            "status": "failed" if results.has_errors() else "passed",
+            "errors": len(results.query("error")),
+            "warnings": len(results.query("warning")),
+            "successes": len(results.query("success")),
+            "cached": cached,
+            "elapsed": self._elapsed(),
+        })
+
+
+def create_finding(check, severity, message, page=None, location=None, subject=None, group=None):
+    """Finding of add_error and add_warning, message is the subject when none is given."""
+    if subject is None:
+        return Finding(check, severity, message, page, location, group=group)
+    return Finding(check, severity, subject, page, location, message, group)
 
 
 class ValidationResult:
     def __init__(self):
-        self.successes = []
-        self.errors = defaultdict(list)
-        self.warnings = defaultdict(list)
-        self.par_styles = []
-        self.actual_par_styles_fonts = []
-        self.fonts = []
-        self.fonts_postscript = []
-        self.images = []
-        self.links_folder_images = []
+        # Optional NdjsonSink that sees every finding as it is added
+        self.sink = None
+        # Optional metrics.CheckerMetrics, counts every occurrence
+        self.metrics = None
+        # Every distinct finding in the order it was first added, plus indexes into it
+        self.findings = []
+        self.findings_by_key = {}
+        self.findings_by_page = {severity: {} for severity in SEVERITIES}
+        self.findings_by_check = {}
+        # Page names in document order, set by the checker once spreads are parsed
+        self.page_order = {}
+        self._sorted_page_keys = None
+        # Dicts keep the insertion order and dedupe in O(1)
+        self.par_styles = {}
+        self.actual_par_styles_fonts = {}
+        self.fonts = {}
+        self.fonts_postscript = {}
+        self.images = {}
+        self.links_folder_images = {}
+
+    # ---------------------------------------------------
+    # Function: add_finding
+    # Description: Aggregation stage of the results. A finding with the same
+    # severity, check, subject and group as an earlier one only adds an
+    # occurrence, so the report grows with the distinct problems, not their
+    # repetitions. An occurrence on another page also indexes the finding
+    # under that page. The occurrence is written to the sink first, unless
+    # stream is False because it was streamed when the check found it.
+    # Returns: the Finding that holds the occurrence.
+    # ---------------------------------------------------
+    def add_finding(self, finding, stream=True):
+        if stream and self.sink is not None:
+            self.sink.write_finding(finding)
+        if self.metrics is not None:
+            self.metrics.findings.inc(
+                check=finding.check, severity=finding.severity)
+        existing = self.findings_by_key.get(finding.get_key())
+        if existing is None:
+            self._insert(finding)
+            return finding
+        if existing.add_occurrence(finding.locations[0] if finding.locations else None, finding.page):
+            self._index_page(existing, finding.page)
+        return existing
+
+    def _insert(self, finding):
+        self.findings_by_key.setdefault(finding.get_key(), finding)
+        self.findings.append(finding)
+        for page in finding.pages:
+            self._index_page(finding, page)
+        self.findings_by_check.setdefault(finding.check, []).append(finding)
+
+    def _index_page(self, finding, page):
+        pages = self.findings_by_page[finding.severity]
+        if page not in pages:
+            pages[page] = []
+            self._sorted_page_keys = None
+        pages[page].append(finding)
 
     def add_success(self, message, success_type="SUCCESS"):
-        formatted_success = f"[{success_type}]: {message}"
-        self.successes.append(formatted_success)
+        return self.add_finding(Finding(success_type, "success", message))
+
+    # subject, location and group are described at Finding, message is the
+    # wording of a single occurrence and the subject when none is given
+    def add_error(self, message, error_type="ERROR", page=None, location=None, subject=None, group=None):
+        return self.add_finding(create_finding(error_type, "error", message, page, location, subject, group))
+
+    def add_warning(self, message, warning_type="WARNING", page=None, location=None, subject=None, group=None):
+        return self.add_finding(create_finding(warning_type, "warning", message, page, location, subject, group))
+
+    def set_page_order(self, page_names):
+        """Findings are listed in this page order, unknown pages follow naturally sorted."""
+        self.page_order = {}
+        for page_name in page_names:
+            self.page_order.setdefault(page_name, len(self.page_order))
+        self._sorted_page_keys = None
+
+    def _page_sort_key(self, page):
+        if page == GENERAL_PAGE:
+            return (0, 0, [])
+        if page in self.page_order:
+            return (1, self.page_order[page], [])
+        return (2, 0, natural_sort_key(page))
+
+    def get_sorted_pages(self):
+        """Returns every page key with findings, general first, then in document order."""
+        if self._sorted_page_keys is None:
+            page_keys = set()
+            for pages in self.findings_by_page.values():
+                page_keys.update(pages)
+            self._sorted_page_keys = sorted(
+                page_keys, key=self._page_sort_key)
+        return self._sorted_page_keys
+
+    def query(self, severity=None, check=None, page=None):
+        """Returns the findings matching every given filter, in display order.
+
+        A finding matches every page it occurred on. Without a page filter
+        it is listed once, under its first page.
+        """
+        if check is not None:
+            candidates = self.findings_by_check.get(check, [])
+            return [finding for finding in self._in_display_order(candidates, severity)
+                    if page is None or page in finding.pages]
+        severities = SEVERITIES if severity is None else [severity]
+        findings = []
+        for severity in severities:
+            findings_by_page = self.findings_by_page[severity]
+            if page is not None:
+                findings.extend(findings_by_page.get(page, ()))
+                continue
+            for page_key in self.get_sorted_pages():
+                findings.extend(finding for finding in findings_by_page.get(page_key, ())
+                                if finding.page == page_key)
+        return findings
+
+    def _in_display_order(self, findings, severity):
+        page_rank = {page: rank for rank,
+                     page in enumerate(self.get_sorted_pages())}
+        # sorted is stable, findings of one page keep the order they were added in
+        return sorted((finding for finding in findings if severity is None or finding.severity == severity),
+                      key=lambda finding: (SEVERITIES.index(finding.severity), page_rank[finding.page]))
 
-    def add_error(self, message, error_type="ERROR", page=None):
-        formatted_error = f"[{error_type}]: {message}"
-        key = page if page else "general"
-        self.errors[key].append(formatted_error)
+    @property
+    def successes(self):
+        return [finding.get_text() for finding in self.query("success")]
 
-    def add_warning(self, message, warning_type="WARNING", page=None):
-        formatted_warning = f"[{warning_type}]: {message}"
-        key = page if page else "general"
-        self.warnings[key].append(formatted_warning)
+    @property
+    def errors(self):
+        return self._texts_by_page("error")
+
+    @property
+    def warnings(self):
+        return self._texts_by_page("warning")
+
+    def _texts_by_page(self, severity):
+        texts_by_page = {}
+        for finding in self.query(severity):
+            texts_by_page.setdefault(finding.page, []).append(finding.get_text())
+        return texts_by_page
+
+    def iter_findings(self, severities=SEVERITIES):
+        """Yields (severity, pages, finding type, message) in display order."""
+        for severity in severities:
+            for finding in self.query(severity):
+                pages = None if severity == "success" else finding.pages
+                yield severity, pages, finding.check, finding.get_text()
+
+    def configure_tags(self, text_widget):
+        for severity, (prefix, color) in SEVERITY_STYLES.items():
+            text_widget.tag_configure(
+                severity, foreground=color, font=("Open Sans", 16))
+
+    # ---------------------------------------------------
+    # Function: display_results
+    # Description: Renders the findings with one insert call per
+    # RENDER_BATCH_ROWS rows instead of one per finding. Each row is tagged
+    # with its severity, type and page, so filters only reconfigure tags.
+    # ---------------------------------------------------
+    def display_results(self, text_widget, severities=SEVERITIES):
+        self.configure_tags(text_widget)
+        batch = []
+        for severity, pages, finding_type, message in self.iter_findings(severities):
+            batch.append(f"{SEVERITY_STYLES[severity][0]}{message}\n")
+            batch.append((severity, type_tag(finding_type), page_tag(pages)))
+            if len(batch) >= 2 * RENDER_BATCH_ROWS:
+                text_widget.insert(END, *batch)
+                batch = []
+        if batch:
+            text_widget.insert(END, *batch)
 
     def display_success_results(self, text_widget):
-        text_widget.tag_configure(
-            "success", foreground="green", font=("Open Sans", 16))
-        for success in self.successes:
-            text_widget.insert(tk.END, f"✅ [SUCCESS] {success}\n", "success")
+        self.display_results(text_widget, ["success"])
 
     def display_error_results(self, text_widget):
-        text_widget.tag_configure(
-            "error", foreground="red", font=("Open Sans", 16))
-
-        for key in sorted(self.errors.keys(), key=lambda x: (x != "general", int(x) if x != "general" else 0)):
-            for error in self.errors[key]:
-                text_widget.insert(tk.END, f"❌ {error}\n", "error")
+        self.display_results(text_widget, ["error"])
 
     def display_warning_results(self, text_widget):
-        text_widget.tag_configure(
-            "warning", foreground="yellow", font=("Open Sans", 16))
-
-        for key in sorted(self.warnings.keys(), key=lambda x: (x != "general", int(x) if x != "general" else 0)):
-            for warning in self.warnings[key]:
-                text_widget.insert(tk.END, f"⚠️ {warning}\n", "warning")
+        self.display_results(text_widget, ["warning"])
 
     def add_par_style(self, style):
-        if style not in self.par_styles:
-            self.par_styles.append(style)
+        self.par_styles.setdefault(style, None)
 
     def display_par_styles(self, text_widget):
-        text_widget.insert(tk.END, "\n--- Styles Used ---\n")
+        text_widget.insert(END, "\n--- Styles Used ---\n")
         for style in self.par_styles:
-            text_widget.insert(tk.END, f"{style}\n")
+            text_widget.insert(END, f"{style}\n")
 
     # If over ride, font from P Style may not actually be used
     def add_actual_par_style_fonts(self, par_style):
-        if not any(item for item in self.actual_par_styles_fonts if item['par_style'] == par_style):
-            self.actual_par_styles_fonts.append({
-                'par_style': par_style
-                # 'based_on' key is omitted until we know the relationship
-            })
+        self.actual_par_styles_fonts.setdefault(
+            par_style, {'par_style': par_style})
+        # 'based_on' key is omitted until we know the relationship
 
     def update_based_on(self, par_style, based_on_style):
-        # Find the paragraph style in the list and update its based-on style
-        for item in self.actual_par_styles_fonts:
-            if item['par_style'] == par_style:
-                item['based_on'] = based_on_style
-                break
+        # Find the paragraph style and update its based-on style
+        item = self.actual_par_styles_fonts.get(par_style)
+        if item is not None:
+            item['based_on'] = based_on_style
 
     def display_actual_par_styles_fonts(self, text_widget):
-        text_widget.insert(tk.END, "\n--- Styles where Font is Used ---\n")
-        for style_dict in self.actual_par_styles_fonts:
+        text_widget.insert(END, "\n--- Styles where Font is Used ---\n")
+        for style_dict in self.actual_par_styles_fonts.values():
             par_style = style_dict.get('par_style')
             based_on_style = style_dict.get('based_on')
 
             if based_on_style:
                 text_widget.insert(
-                    tk.END, f"{par_style} Font Based on {based_on_style}\n")
+                    END, f"{par_style} Font Based on {based_on_style}\n")
             else:
-                text_widget.insert(tk.END, f"{par_style}\n")
+                text_widget.insert(END, f"{par_style}\n")
 
     def add_font(self, font):
-        if font not in self.fonts:
-            self.fonts.append(font)
+        self.fonts.setdefault(font, None)
 
     def display_fonts(self, text_widget):
-        text_widget.insert(tk.END, "\n--- Fonts Used ---\n")
+        text_widget.insert(END, "\n--- Fonts Used ---\n")
         for font in self.fonts:
-            text_widget.insert(tk.END, f"{font}\n")
+            text_widget.insert(END, f"{font}\n")
 
     def add_fonts_postscript(self, font_postscript):
-        if font_postscript not in self.fonts_postscript:
-            self.fonts_postscript.append(font_postscript)
+        self.fonts_postscript.setdefault(font_postscript, None)
 
     def display_fonts_postscript(self, text_widget):
-        text_widget.insert(tk.END, "\n--- Fonts Postscript ---\n")
+        text_widget.insert(END, "\n--- Fonts Postscript ---\n")
         for font in self.fonts_postscript:
-            text_widget.insert(tk.END, f"{font}\n")
+            text_widget.insert(END, f"{font}\n")
 
     def add_image(self, image):
-        if image not in self.images:
-            self.images.append(image)
+        self.images.setdefault(image, None)
 
     def add_links_folder_image(self, image):
-        if image not in self.links_folder_images:
-            self.links_folder_images.append(image)
+        self.links_folder_images.setdefault(image, None)
+
+    def has_errors(self):
+        return bool(self.findings_by_page["error"])
+
+    # ---------------------------------------------------
+    # Function: to_records / from_records
+    # Description: The aggregated findings with their pages, counts and
+    # locations, e.g. for the result cache. to_dict is the report format.
+    # ---------------------------------------------------
+    def to_records(self):
+        return {"findings": [finding.to_record() for finding in self.findings],
+                "page_order": list(self.page_order)}
+
+    @classmethod
+    def from_records(cls, data):
+        results = cls()
+        for record in data["findings"]:
+            # Already aggregated, the findings are only indexed again
+            results._insert(Finding.from_record(record))
+        results.set_page_order(data["page_order"])
+        return results
+
+    def to_dict(self):
+        return {
+            "successes": self.successes,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            # Document page order, so consumers list the pages the same way as the report
+            "pages": [page for page in self.get_sorted_pages() if page != GENERAL_PAGE],
+        }
+
+    def write_text_results(self, stream):
+        """Writes the results as plain text, in the same order as the GUI."""
+        for severity, pages, finding_type, message in self.iter_findings():
+            stream.write(f"{SEVERITY_STYLES[severity][0]}{message}\n")
@@ -0,0 +1,129 @@
+import contextlib
+import contextvars
+import threading
+import time
+import tracemalloc
+
+# Profiler of the run in progress in this context, count() is a no-op without
+# one. Runs on other threads have their own, worker threads of a run get it by
+# running their tasks in a copy of the run's context, see ParallelLoader.
+_active = contextvars.ContextVar("instrumentation_active", default=None)
+
+
+def count(name, amount=1):
+    """Adds amount to a counter of the innermost open span of this context's profiler."""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def is_active():
+    """True while a span is open, callers skip work done only for counters."""
+    return _active.get() is not None
+
+
+# **********************************************************
+# Class: Span
+# Description: One timed section of a run. wall_ms and cpu_ms cover the
+# section including its children, cpu_ms counts every thread of the process
+# so it is above wall_ms when parsing runs in parallel. peak_memory_bytes is
+# the tracemalloc peak above the traced memory when the span started.
+# **********************************************************
+class Span:
+    def __init__(self, name):
+        self.name = name
+        self.wall_ms = None
+        self.cpu_ms = None
+        self.peak_memory_bytes = None
+        self.counters = {}
+        self.children = []
+
+    def total_counters(self):
+        totals = dict(self.counters)
+        for child in self.children:
+            for name, value in child.total_counters().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def to_dict(self):
+        span = {"name": self.name, "wall_ms": self.wall_ms, "cpu_ms": self.cpu_ms}
+        if self.peak_memory_bytes is not None:
+            span["peak_memory_bytes"] = self.peak_memory_bytes
+        # Counters include the work of the children
+        span["counters"] = dict(sorted(self.total_counters().items()))
+        span["children"] = [child.to_dict() for child in self.children]
+        return span
+
+
+# **********************************************************
+# Class: Profiler
+# Description: Records a tree of spans. Spans are opened and closed on the
+# thread running the state machine, counters may come from any thread that
+# runs in its context and go to the innermost span open at that time.
+# **********************************************************
+class Profiler:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.stack = []
+        # Peak traced memory per open span, see _record_peak
+        self.peaks = []
+        self.started_tracing = False
+        # Resets _active when the outermost span closes
+        self.active_token = None
+        self.lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self.lock:
+            if self.stack:
+                counters = self.stack[-1].counters
+                counters[name] = counters.get(name, 0) + amount
+
+    # ---------------------------------------------------
+    # Function: _record_peak
+    # Description: tracemalloc keeps a single peak. Before a span opens or
+    # closes the peak so far is credited to every open span, then reset so
+    # the next section is measured on its own.
+    # Returns: the traced memory right now.
+    # ---------------------------------------------------
+    def _record_peak(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peaks = [max(open_peak, peak) for open_peak in self.peaks]
+        tracemalloc.reset_peak()
+        return current
+
+    @contextlib.contextmanager
+    def span(self, name):
+        span = Span(name)
+        with self.lock:
+            (self.stack[-1].children if self.stack else self.spans).append(span)
+            self.stack.append(span)
+        if len(self.stack) == 1:
+            self.active_token = _active.set(self)
+            if self.trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+        memory_start = self._record_peak() if self.trace_memory else 0
+        self.peaks.append(memory_start)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield span
+        finally:
+            span.wall_ms = round((time.perf_counter() - wall_start) * 1000, 3)
+            span.cpu_ms = round((time.process_time() - cpu_start) * 1000, 3)
+            if self.trace_memory:
+                self._record_peak()
+                span.peak_memory_bytes = self.peaks[-1] - memory_start
+            self.peaks.pop()
+            with self.lock:
+                self.stack.pop()
+            if not self.stack:
+                _active.reset(self.active_token)
+                self.active_token = None
+                if self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+
+    def to_dict(self):
+        return {"trace_memory": self.trace_memory, "spans": [span.to_dict() for span in self.spans]}
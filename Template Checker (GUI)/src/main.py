@@ -1,14 +1,32 @@
-from error_handling import ValidationResult
-import tkinter as tk
-from tkinter import filedialog
-import tkinter.ttk as ttk
+from error_handling import SEVERITIES, Finding, ValidationResult, create_finding, page_tag, type_tag
+from package_source import FolderSource, ZipSource, central_directory_digest
+from cache_storage import SqliteLRUCache, user_cache_dir
+import instrumentation
+# tkinter, lxml and fontTools are imported where they are first needed so the
+# headless CLI (cli.py) starts fast and runs without a display
 from enum import Enum, auto
+import contextlib
+import contextvars
 import zipfile
+import io
+import hashlib
+import json
+import sqlite3
 import os
+import posixpath
 import shutil  # to delete the __MACOSX folder after unzipping
-from lxml import etree as ET
-from fontTools.ttLib import TTFont
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import math
+import time
+
+
+CHECKER_VERSION = "1.0.0"
+# Bump whenever a check changes what it reports, cached results are keyed by it
+RULES_VERSION = 3
+
+MEDIA_FOLDER = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "media")
 
 
 class States(Enum):
@@ -34,17 +52,58 @@ class States(Enum):
     EXIT = auto()
 
 
+# **********************************************************
+# Class: ParallelLoader
+# Description: Runs a per-file load function across a thread pool. lxml
+# releases the GIL while parsing, so independent IDML parts parse concurrently.
+# Results come back in the order of the given files.
+# **********************************************************
+class ParallelLoader:
+    def __init__(self, workers=None):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    def map(self, load_function, items):
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [load_function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            # Each task runs in a copy of the caller's context, so its parser
+            # counters go to the caller's profiler
+            futures = [executor.submit(contextvars.copy_context().run, load_function, item)
+                       for item in items]
+            return [future.result() for future in futures]
+
+
+# **********************************************************
+# Class: UsedFontRecorder
+# Description: Stands in for FontsParser while a story file is loaded on a
+# worker thread. The recorded families are replayed into the FontsParser in
+# file order so the used fonts do not depend on thread timing.
+# **********************************************************
+class UsedFontRecorder:
+    def __init__(self):
+        self.font_family_names = []
+
+    def add_used_font_family(self, font_family_name):
+        self.font_family_names.append(font_family_name)
+
+    def replay(self, fonts_parser):
+        for font_family_name in self.font_family_names:
+            fonts_parser.add_used_font_family(font_family_name)
+
+
 # **********************************************************
 # Class: Image
 # Description: A class to represent and manage image data.
 # **********************************************************
 
 class Image:
-    def __init__(self, image_path):
+    def __init__(self, image_path, image_size_bytes=None):
         self.image_path = image_path
         self.image_name = os.path.basename(image_path)
         self.image_extension = os.path.splitext(self.image_name)[1]
-        self.image_size_bytes = os.path.getsize(image_path)
+        self.image_size_bytes = image_size_bytes if image_size_bytes is not None else os.path.getsize(
+            image_path)
         self.image_size_MB = self.convert_bytes_to_MB(self.image_size_bytes)
 
     def get_image_name(self):
@@ -65,25 +124,278 @@ class Image:
                f"Image Size: {self.image_size_MB} MB"
 
 
+# **********************************************************
+# Class: ImageInventory
+# Description: Names and sizes of the images in the Links folder, keyed by
+# image name. Built from the ZIP central directory so no image is decompressed.
+# **********************************************************
+class ImageInventory:
+    def __init__(self):
+        self.images_by_name = {}
+
+    @classmethod
+    def from_source(cls, source, links_folder_path):
+        inventory = cls()
+        for filename in source.listdir(links_folder_path):
+            image_path = source.join(links_folder_path, filename)
+            if source.isfile(image_path):
+                inventory.add_image(
+                    Image(image_path, source.getsize(image_path)))
+        return inventory
+
+    @classmethod
+    def from_zip(cls, zip_path, links_folder_path):
+        # Only the central directory is read, member data is never touched
+        zip_source = ZipSource.from_path(zip_path)
+        try:
+            return cls.from_source(zip_source, links_folder_path)
+        finally:
+            zip_source.close()
+
+    def add_image(self, image):
+        self.images_by_name[image.get_image_name()] = image
+
+    def get_image(self, image_name):
+        return self.images_by_name.get(image_name)
+
+    def has_image(self, image_name):
+        return image_name in self.images_by_name
+
+    def get_image_names(self):
+        return set(self.images_by_name)
+
+    def get_images(self):
+        return list(self.images_by_name.values())
+
+    def get_large_images(self, limit_MB):
+        return [image for image in self.images_by_name.values() if image.get_image_size() > limit_MB]
+
+    def __len__(self):
+        return len(self.images_by_name)
+
+
+# **********************************************************
+# Class: FontInspector
+# Description: Reads only what the font checks need from a font file: the
+# name table, sfntVersion and whether an fvar table exists. Fonts are opened
+# lazily so no other table, glyph or outline is decoded. A TrueType
+# collection (.ttc) gives one Font per member font.
+# **********************************************************
+class FontInspector:
+    COLLECTION_TAG = b"ttcf"
+
+    def inspect(self, font_data):
+        from fontTools.ttLib import TTFont, TTCollection
+        font_file = io.BytesIO(font_data)
+        if font_data[:4] == self.COLLECTION_TAG:
+            collection = TTCollection(font_file, lazy=True)
+            return [self._inspect_font(font) for font in collection.fonts]
+        return [self._inspect_font(TTFont(font_file, lazy=True))]
+
+    def _inspect_font(self, font):
+        name_table = font["name"]
+        # Name ID 1 is the font family name, ID 2 the style and ID 6 the PostScript name
+        font_name = name_table.getDebugName(1)
+        font_type = "TrueType" if font.sfntVersion == "true" else "Other"
+        # Only the table directory is checked, fvar itself is never loaded
+        variable_font = "fvar" in font
+        return Font(font_name, font_name, name_table.getDebugName(6), name_table.getDebugName(2), font_type, variable_font)
+
+
+# **********************************************************
+# Class: FontMetadataCache
+# Description: On-disk cache of FontInspector results keyed by the SHA-256
+# of the font file, so fonts seen in earlier packages are not parsed again.
+# Stored in SQLite under the user cache folder, the least recently used
+# entries are evicted once the stored metadata exceeds max_bytes.
+# **********************************************************
+class FontMetadataCache:
+    # Bump when the stored Font fields change so old entries are ignored
+    FORMAT_VERSION = 1
+    DEFAULT_MAX_BYTES = 16 * 1024 ** 2
+
+    def __init__(self, cache_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if cache_path is None:
+            cache_path = os.path.join(user_cache_dir(), "font_metadata.sqlite3")
+        self.store = SqliteLRUCache(cache_path, max_bytes=max_bytes)
+
+    def _key(self, font_data):
+        return f"v{self.FORMAT_VERSION}:{hashlib.sha256(font_data).hexdigest()}"
+
+    def get(self, font_data):
+        """Returns the cached list of Font objects or None on a miss."""
+        try:
+            value = self.store.get(self._key(font_data))
+        except sqlite3.Error as e:
+            print(f"Error reading font cache: {e}")
+            return None
+        if value is None:
+            return None
+        return [Font(**font_record) for font_record in json.loads(value)]
+
+    def put(self, font_data, fonts):
+        value = json.dumps([vars(font) for font in fonts]).encode("utf-8")
+        try:
+            self.store.put(self._key(font_data), value)
+        except sqlite3.Error as e:
+            print(f"Error writing font cache: {e}")
+
+    def close(self):
+        self.store.close()
+
+
+# **********************************************************
+# Class: ResultCache
+# Description: On-disk cache of whole-run findings keyed by the package's
+# central directory digest plus the checker and rules version. A re-submitted,
+# byte-identical package is answered without running the checks.
+# **********************************************************
+class ResultCache:
+    DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+    def __init__(self, cache_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if cache_path is None:
+            cache_path = os.path.join(user_cache_dir(), "results.sqlite3")
+        self.store = SqliteLRUCache(cache_path, max_bytes=max_bytes)
+
+    def package_digest(self, package_path):
+        """Returns the cache key of the package or None if it is not a readable ZIP."""
+        try:
+            return central_directory_digest(package_path, f"{CHECKER_VERSION}:{RULES_VERSION}")
+        except (OSError, zipfile.BadZipFile):
+            return None
+
+    def get(self, package_digest):
+        """Returns the cached ValidationResult or None on a miss."""
+        try:
+            value = self.store.get(package_digest)
+        except sqlite3.Error as e:
+            print(f"Error reading result cache: {e}")
+            return None
+        if value is None:
+            return None
+        return ValidationResult.from_records(json.loads(value))
+
+    def put(self, package_digest, results):
+        value = json.dumps(results.to_records()).encode("utf-8")
+        try:
+            self.store.put(package_digest, value)
+        except sqlite3.Error as e:
+            print(f"Error writing result cache: {e}")
+
+    def close(self):
+        self.store.close()
+
+
+# **********************************************************
+# Class: ModelCache
+# Description: On-disk cache of the parsed model of single IDML members
+# (spread pages, story records, style tables, ...) keyed by the member's
+# CRC-32 and size from the ZIP central directory. When a package is
+# re-exported after a small edit only the changed members are parsed again.
+# Models are plain records stored as JSON, the cache file is shared between
+# processes and must never hold anything that runs code when it is loaded.
+# A package has thousands of members, so new entries and last_used updates
+# are kept in memory and written in one transaction by flush().
+# **********************************************************
+class ModelCache:
+    # Bump when the shape of a cached model changes so old entries are ignored
+    FORMAT_VERSION = 2
+    DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+    def __init__(self, cache_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if cache_path is None:
+            cache_path = os.path.join(user_cache_dir(), "parsed_models.sqlite3")
+        self.store = SqliteLRUCache(cache_path, max_bytes=max_bytes)
+        # Parsers call get and put from loader threads
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.used_keys = set()
+
+    def _key(self, kind, signature):
+        crc, size = signature
+        return f"v{self.FORMAT_VERSION}:{CHECKER_VERSION}:{kind}:{crc:08x}:{size}"
+
+    def get(self, kind, signature):
+        """Returns the cached model or None on a miss."""
+        key = self._key(kind, signature)
+        with self.lock:
+            value = self.pending.get(key)
+        if value is None:
+            try:
+                value = self.store.get(key, touch=False)
+            except sqlite3.Error as e:
+                print(f"Error reading model cache: {e}")
+                return None
+            if value is None:
+                return None
+            with self.lock:
+                self.used_keys.add(key)
+        return json.loads(value)
+
+    def put(self, kind, signature, model):
+        value = json.dumps(model, separators=(",", ":")).encode("utf-8")
+        with self.lock:
+            self.pending[self._key(kind, signature)] = value
+
+    def flush(self):
+        """Writes the new entries and last_used updates since the last flush."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            used_keys, self.used_keys = self.used_keys, set()
+        try:
+            if used_keys:
+                self.store.touch_many(used_keys)
+            if pending:
+                self.store.put_many(pending.items())
+        except sqlite3.Error as e:
+            print(f"Error writing model cache: {e}")
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+
+# ---------------------------------------------------
+# Function: load_part_model
+# Description: Returns build(path), taken from the model cache when the
+# member's signature was seen before. Members without a signature (extracted
+# packages) and runs without a cache are always built.
+# ---------------------------------------------------
+def load_part_model(model_cache, source, path, kind, build):
+    signature = source.member_signature(path) if model_cache is not None else None
+    if signature is None:
+        return build(path)
+    model = model_cache.get(kind, signature)
+    if model is None:
+        instrumentation.count("model_cache_misses")
+        model = build(path)
+        model_cache.put(kind, signature, model)
+    else:
+        instrumentation.count("model_cache_hits")
+    return model
+
+
 # **********************************************************
 # Class: SourceFoldersParser
 # Description: A class to parse and manage data from the source package.
 # **********************************************************
 class SourceFoldersParser:
-    def __init__(self, document_links_folder_path, document_fonts_folder_path):
+    def __init__(self, document_links_folder_path, document_fonts_folder_path, source=None, image_inventory=None, loader=None, font_cache=None):
+        self.source = source or FolderSource()
+        self.loader = loader or ParallelLoader()
+        self.font_inspector = FontInspector()
+        self.font_cache = font_cache
         self.document_links_folder_path = document_links_folder_path
-        self.images_obj_list = self._extract_images_data()
+        self.image_inventory = image_inventory or ImageInventory.from_source(
+            self.source, self.document_links_folder_path)
+        self.images_obj_list = self.image_inventory.get_images()
         self.document_fonts_folder_path = document_fonts_folder_path
+        self.document_font_catalog = FontCatalog()
         self.document_fonts = self._extract_document_fonts()
 
-    def _extract_images_data(self):
-        images_obj_list = []
-        for filename in os.listdir(self.document_links_folder_path):
-            image_path = os.path.join(
-                self.document_links_folder_path, filename)
-            image_data = Image(image_path)
-            images_obj_list.append(image_data)
-        return images_obj_list
+    def get_image_inventory(self):
+        return self.image_inventory
 
     def get_images_obj_list(self):
         return self.images_obj_list
@@ -95,27 +407,41 @@ class SourceFoldersParser:
     def _extract_document_fonts(self):
         document_fonts = []
 
-        for filename in os.listdir(self.document_fonts_folder_path):
-            if filename.endswith('.lst'):
-                continue
-
-            font_path = os.path.join(self.document_fonts_folder_path, filename)
-            try:
-                font = TTFont(font_path)
-                # Name ID 1 is the font family name
-                font_name = font["name"].getDebugName(1)
-                font_type = "TrueType" if font.sfntVersion == "true" else "Other"
-                variable_font = True if "fvar" in font else False
-                document_fonts.append(FontFamily(
-                    font_name, [font_name], variable_font, font_type))
-            except Exception as e:
-                print(f"Error processing font {filename}: {e}")
+        font_paths = [self.source.join(self.document_fonts_folder_path, filename)
+                      for filename in sorted(self.source.listdir(self.document_fonts_folder_path))
+                      if not filename.endswith('.lst')]
+        # Font files are inspected on the loader's worker threads
+        for fonts in self.loader.map(self._inspect_font_file, font_paths):
+            for font in fonts:
+                font_family = FontFamily(
+                    font.font_family, [font.font_family], font.variable_font, font.font_type)
+                document_fonts.append(font_family)
+                self.document_font_catalog.add_font_family(font_family)
+                self.document_font_catalog.add_font(font)
 
         return document_fonts
 
+    def _inspect_font_file(self, font_path):
+        try:
+            font_data = self.source.read(font_path)
+            if self.font_cache is None:
+                return self.font_inspector.inspect(font_data)
+            fonts = self.font_cache.get(font_data)
+            if fonts is None:
+                fonts = self.font_inspector.inspect(font_data)
+                self.font_cache.put(font_data, fonts)
+            return fonts
+        except Exception as e:
+            print(
+                f"Error processing font {os.path.basename(font_path)}: {e}")
+            return []
+
     def get_document_fonts(self):
         return self.document_fonts
 
+    def get_document_font_catalog(self):
+        return self.document_font_catalog
+
     def print_document_fonts(self):
         print("\n".join(font.fontFamily for font in self.document_fonts))
 
@@ -135,7 +461,8 @@ class TextFrame:
         self.use_no_line_breaks = use_no_line_breaks
         self.is_auto_size = True if auto_sizing_type else False
 
-    def from_xml_element(frame_element):
+    # Returns: the constructor arguments of the frame, as plain values
+    def read_xml_element(frame_element):
         id = frame_element.get("Self")
         parent_story_id = frame_element.get("ParentStory")
         applied_object_style = frame_element.get("AppliedObjectStyle")
@@ -148,7 +475,7 @@ class TextFrame:
         use_no_line_breaks = text_frame_pref.get(
             "UseNoLineBreaksForAutoSizing") if text_frame_pref is not None else None
 
-        return TextFrame(id, parent_story_id, applied_object_style, auto_sizing_type, auto_sizing_reference_point, use_no_line_breaks)
+        return id, parent_story_id, applied_object_style, auto_sizing_type, auto_sizing_reference_point, use_no_line_breaks
 
     def add_parent_story_obj(self, story):
         self.parent_story_obj = story
@@ -201,24 +528,21 @@ class Link:
 # Description:
 # **********************************************************
 class SpreadData:
-    def __init__(self, page_name, extracted_links, root):
+    def __init__(self, page_name, extracted_links, text_frames, story_ids=()):
         self.page_name = page_name
         self.stories = []
+        self.story_ids = set()
         self.links_obj_list = extracted_links
-        self.text_frame_obj_list = self._extract_text_frames(root)
-
-    def _extract_text_frames(self, root):
-        text_frames = []
-        for frame_element in root.findall(".//TextFrame"):
-            text_frame = TextFrame.from_xml_element(frame_element)
-            text_frames.append(text_frame)
-        return text_frames
+        self.text_frame_obj_list = text_frames
+        for story_id in story_ids:
+            self.add_story(story_id)
 
     def get_page_name(self):
         return self.page_name
 
     def add_story(self, story_id):
-        if story_id not in self.stories:
+        if story_id not in self.story_ids:
+            self.story_ids.add(story_id)
             self.stories.append(story_id)
 
     def get_links_obj_list(self):
@@ -233,69 +557,149 @@ class SpreadData:
         return f"Page Name: {self.page_name}, Stories: {', '.join(self.stories)}, Links: {', '.join(link_names)}"
 
 
+# ---------------------------------------------------
+# Function: read_spread_order
+# Description: designmap.xml lists the spreads in document order, spread file
+# names do not sort that way.
+# Returns: the spread file names in document order, empty without designmap.xml.
+# ---------------------------------------------------
+def read_spread_order(source, designmap_path):
+    from lxml import etree as ET
+    if not source.isfile(designmap_path):
+        return []
+    with source.open(designmap_path) as xml_file:
+        root = ET.parse(xml_file).getroot()
+    instrumentation.count("xml_files_parsed")
+    return [posixpath.basename(element.get("src")) for element in root.iter("{*}Spread")
+            if element.get("src")]
+
+
 # **********************************************************
 # Class: SpreadsParser
 # Description:
 # **********************************************************
 class SpreadsParser:
-    def __init__(self, spreads_xml_dir):
+    def __init__(self, spreads_xml_dir, source=None, loader=None, model_cache=None):
+        self.source = source or FolderSource()
+        self.loader = loader or ParallelLoader()
+        self.model_cache = model_cache
         self.spreads_xml_dir = spreads_xml_dir
+        # Spread file name -> SpreadData of its pages
+        self.spreads_by_file = {}
         self.spreads_obj_list = self._extract_spreads_data()
+        self.pages_by_story_id = self._index_pages_by_story_id()
 
     def _extract_spreads_data(self):
         spreads_obj_list = []
 
-        # Iterate over each file in the directory
-        for filename in os.listdir(self.spreads_xml_dir):
-            if filename.endswith('.xml'):
-                file_path = os.path.join(self.spreads_xml_dir, filename)
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                extracted_links = self._extract_links_data(root)
-                for spread in root.findall(".//Spread"):
-                    for page in spread.findall("Page"):
-                        page_name = page.get("Name")
-                        spread_data = SpreadData(
-                            page_name, extracted_links, root)
-
-                        # Extract all stories associated with this page
-                        for story_element in root.findall(f".//*[@ParentStory]"):
-                            story_id = story_element.get("ParentStory")
-                            if story_id:
-                                spread_data.add_story(story_id)
-
-                        spreads_obj_list.append(spread_data)
+        # Load every file in the directory, results come back in file name order
+        file_names = [filename for filename in sorted(
+            self.source.listdir(self.spreads_xml_dir)) if filename.endswith('.xml')]
+        file_paths = [self.source.join(self.spreads_xml_dir, filename)
+                      for filename in file_names]
+        for filename, spreads in zip(file_names, self.loader.map(self._load_spread_file, file_paths)):
+            self.spreads_by_file[filename] = spreads
+            spreads_obj_list.extend(spreads)
 
         return spreads_obj_list
 
-    def _extract_links_data(self, root):
-        links_obj_list = []
+    def _load_spread_file(self, file_path):
+        return self._build_spreads(load_part_model(
+            self.model_cache, self.source, file_path, "spread", self._parse_spread_file))
 
-        for link_element in root.findall(".//Link"):
-            resource_uri = link_element.get("LinkResourceURI")
-            stored_state = link_element.get("StoredState")
+    def _parse_spread_file(self, file_path):
+        from lxml import etree as ET
+        with self.source.open(file_path) as xml_file:
+            tree = ET.parse(xml_file)
+        instrumentation.count("xml_files_parsed")
+        return self._index_spread_file(tree.getroot())
 
-            parent_element = link_element.getparent()
-            item_transform = parent_element.get("ItemTransform")
+    # ---------------------------------------------------
+    # Function: _index_spread_file
+    # Description: Walks a spread XML once and collects its pages, text frames,
+    # links and referenced stories. Every page of the file shares the same
+    # frames, links and stories.
+    # Returns: the spread record, plain lists that _build_spreads turns into
+    # SpreadData. The model cache keeps the record.
+    # ---------------------------------------------------
+    def _index_spread_file(self, root):
+        from lxml import etree as ET
+        page_names = []
+        text_frames = []
+        links = []
+        story_ids = {}  # dict keeps document order while removing duplicates
+
+        visited = 0
+        for visited, element in enumerate(root.iter(ET.Element), 1):
+            tag = element.tag
+            if tag == "Page":
+                if element.getparent().tag == "Spread":
+                    page_names.append(element.get("Name"))
+            elif tag == "TextFrame":
+                text_frames.append(TextFrame.read_xml_element(element))
+            elif tag == "Link":
+                links.append(self._read_link(element))
+
+            story_id = element.get("ParentStory")
+            if story_id:
+                story_ids[story_id] = None
+        instrumentation.count("xml_elements_visited", visited)
+
+        return {"pages": page_names, "links": links, "text_frames": text_frames, "story_ids": list(story_ids)}
+
+    def _build_spreads(self, spread_record):
+        # One list of links and frames for the whole file, shared by its pages
+        links_obj_list = [Link(*link_record)
+                          for link_record in spread_record["links"]]
+        text_frames = [TextFrame(*text_frame_record)
+                       for text_frame_record in spread_record["text_frames"]]
+        return [SpreadData(page_name, links_obj_list, text_frames, spread_record["story_ids"])
+                for page_name in spread_record["pages"]]
 
-            grandparent_element = parent_element.getparent()
-            parent_item_transform = grandparent_element.get(
-                "ItemTransform") if grandparent_element is not None else None
+    # ---------------------------------------------------
+    # Function: _read_link
+    # Returns: (resource_uri, stored_state, item_transform, container_item_transform)
+    # ---------------------------------------------------
+    def _read_link(self, link_element):
+        resource_uri = link_element.get("LinkResourceURI")
+        stored_state = link_element.get("StoredState")
 
-            image_data = Link(resource_uri, stored_state,
-                              item_transform, parent_item_transform)
-            links_obj_list.append(image_data)
+        parent_element = link_element.getparent()
+        item_transform = parent_element.get("ItemTransform")
 
-        return links_obj_list
+        grandparent_element = parent_element.getparent()
+        parent_item_transform = grandparent_element.get(
+            "ItemTransform") if grandparent_element is not None else None
+
+        return resource_uri, stored_state, item_transform, parent_item_transform
+
+    def _index_pages_by_story_id(self):
+        pages_by_story_id = {}
+        for spread_data in self.spreads_obj_list:
+            for story_id in spread_data.stories:
+                pages_by_story_id.setdefault(
+                    story_id, []).append(spread_data.page_name)
+        return pages_by_story_id
 
     def get_spreads_obj_list(self):
         return self.spreads_obj_list
 
-    def get_page_by_story_id(self, story_id):
+    def get_text_frames(self):
         for spread_data in self.spreads_obj_list:
-            if story_id in spread_data.stories:
-                return spread_data.page_name
-        return None
+            yield from spread_data.text_frame_obj_list
+
+    def get_page_by_story_id(self, story_id):
+        # First page the story appears on
+        pages = self.pages_by_story_id.get(story_id)
+        return pages[0] if pages else None
+
+    def get_pages_by_story_id(self, story_id):
+        return self.pages_by_story_id.get(story_id, [])
+
+    def get_page_names(self, spread_file_order):
+        """Returns the page names of the spread files in the given order (see read_spread_order)."""
+        return [spread_data.page_name for filename in spread_file_order
+                for spread_data in self.spreads_by_file.get(filename, ())]
 
     def print_spreads_obj_list(self):
         for spread_data in self.spreads_obj_list:
@@ -326,42 +730,139 @@ class FontFamily:
         return f"Font Family: {self.fontFamily}, Font Type: {self.fontType}, Fonts: {', '.join(self.fonts)}, Variable Font: {self.variableFont}"
 
 
+# **********************************************************
+# Class: Font
+# Description: A single font of a family as listed in Fonts.xml or read
+# from a file in the Document Fonts folder.
+# **********************************************************
+class Font:
+    def __init__(self, name, font_family, postscript_name=None, style=None, font_type=None, variable_font=False):
+        self.name = name
+        self.font_family = font_family
+        self.postscript_name = postscript_name
+        self.style = style
+        self.font_type = font_type
+        self.variable_font = variable_font
+
+    def __str__(self):
+        return f"Font: {self.name}, Family: {self.font_family}, PostScript Name: {self.postscript_name}, Style: {self.style}, Type: {self.font_type}"
+
+
+# **********************************************************
+# Class: FontCatalog
+# Description: Fonts of a package keyed in hash maps. Families are keyed by
+# name, single fonts by PostScript name, and the style and type maps hold
+# lists of fonts.
+# **********************************************************
+class FontCatalog:
+    def __init__(self):
+        self.families_by_name = {}
+        self.fonts_by_postscript_name = {}
+        self.fonts_by_style = {}
+        self.fonts_by_type = {}
+
+    def add_font_family(self, font_family):
+        # Keep the first family if a name is listed twice
+        self.families_by_name.setdefault(
+            font_family.get_font_family(), font_family)
+
+    def add_font(self, font):
+        if font.postscript_name:
+            self.fonts_by_postscript_name.setdefault(
+                font.postscript_name, font)
+        self.fonts_by_style.setdefault(font.style, []).append(font)
+        self.fonts_by_type.setdefault(font.font_type, []).append(font)
+
+    def get_family(self, family_name):
+        return self.families_by_name.get(family_name)
+
+    def has_family(self, family_name):
+        return family_name in self.families_by_name
+
+    def get_font_by_postscript_name(self, postscript_name):
+        return self.fonts_by_postscript_name.get(postscript_name)
+
+    def get_fonts_by_style(self, style):
+        return self.fonts_by_style.get(style, [])
+
+    def get_fonts_by_type(self, font_type):
+        return self.fonts_by_type.get(font_type, [])
+
+    def get_family_names(self):
+        return list(self.families_by_name)
+
+
 # **********************************************************
 # Class: FontsParser
 # Description:
 # **********************************************************
 class FontsParser:
-    def __init__(self, fonts_xml_path):
+    def __init__(self, fonts_xml_path, source=None, model_cache=None):
+        self.source = source or FolderSource()
+        self.model_cache = model_cache
         self.fonts_xml_path = fonts_xml_path
+        self.font_catalog = FontCatalog()
         self.font_families_from_xml = self._extract_fonts()
-        self.used_font_families = []
+        # Used families keyed by name, dict keeps the order they were first used
+        self.used_font_families = {}
 
     def _extract_fonts(self):
-        if not os.path.exists(self.fonts_xml_path):
+        if not self.source.exists(self.fonts_xml_path):
             raise FileNotFoundError(f"{self.fonts_xml_path} does not exist")
 
-        tree = ET.parse(self.fonts_xml_path)
+        fonts_Families_list = []
+        for family_record, font_records in load_part_model(
+                self.model_cache, self.source, self.fonts_xml_path, "fonts", self._parse_fonts_file):
+            fontFamilyObj = FontFamily(*family_record)
+            for font_record in font_records:
+                self.font_catalog.add_font(Font(*font_record))
+            fonts_Families_list.append(fontFamilyObj)
+            self.font_catalog.add_font_family(fontFamilyObj)
+        return fonts_Families_list
+
+    # ---------------------------------------------------
+    # Function: _parse_fonts_file
+    # Description: Reads Fonts.xml.
+    # Returns: a list of (family record, [font record]) pairs in document
+    # order, the constructor arguments of FontFamily and Font.
+    # ---------------------------------------------------
+    def _parse_fonts_file(self, fonts_xml_path):
+        from lxml import etree as ET
+        with self.source.open(fonts_xml_path) as xml_file:
+            tree = ET.parse(xml_file)
         root = tree.getroot()
 
-        fonts_Families_list = []
+        font_families = []
         font_family_elements = root.findall(".//FontFamily")
+        findall_calls = 1
         for font_family_element in font_family_elements:
             # For each FontFamily, find its nested Font tags
             fontFamily = font_family_element.get('Name')
             fonts = []
+            family_fonts = []
             variableFontFlag = False
             font_elements = font_family_element.findall(".//Font")
+            findall_calls += 1
             for font_element in font_elements:
                 name = font_element.get('Name')
                 font_type = font_element.get('FontType')
                 fonts.append(name)
+                family_fonts.append((name, fontFamily, font_element.get(
+                    'PostScriptName'), font_element.get('FontStyleName'), font_type))
                 variableFont = font_element.get('NumDesignAxes')
                 if variableFont is not None:
                     variableFontFlag = True
-            fontFamilyObj = FontFamily(
-                fontFamily, fonts, variableFontFlag, font_type)
-            fonts_Families_list.append(fontFamilyObj)
-        return fonts_Families_list
+            font_families.append(
+                ((fontFamily, fonts, variableFontFlag, font_type), family_fonts))
+        instrumentation.count("xml_files_parsed")
+        instrumentation.count("findall_calls", findall_calls)
+        instrumentation.count("font_family_records", len(font_families))
+        instrumentation.count("font_records",
+                              sum(len(family_fonts) for _, family_fonts in font_families))
+        return font_families
+
+    def get_font_catalog(self):
+        return self.font_catalog
 
     def get_fonts_families_from_xml(self):
         return self.font_families_from_xml
@@ -371,17 +872,15 @@ class FontsParser:
 
     def add_used_font_family(self, font_family_name):
         """Add a font family object to the list of used font families."""
-        # Search for the font object in self.font_families_from_xml
-        matching_font_obj = next(
-            (font for font in self.font_families_from_xml if font.fontFamily == font_family_name), None)
-
-        # If found and not already in the list, add to self.used_font_families
-        if matching_font_obj and matching_font_obj not in self.used_font_families:
-            self.used_font_families.append(matching_font_obj)
+        if font_family_name in self.used_font_families:
+            return
+        matching_font_obj = self.font_catalog.get_family(font_family_name)
+        if matching_font_obj:
+            self.used_font_families[font_family_name] = matching_font_obj
 
     def get_used_font_families(self):
         """Retrieve the list of used font families."""
-        return self.used_font_families
+        return list(self.used_font_families.values())
 
     def print_used_font_families(self):
         """Print the list of used font families."""
@@ -395,30 +894,42 @@ class FontsParser:
 
 
 class MasterPageParser:
-    def __init__(self, masterspreads_dir):
+    def __init__(self, masterspreads_dir, source=None, loader=None, model_cache=None):
+        self.source = source or FolderSource()
+        self.loader = loader or ParallelLoader()
+        self.model_cache = model_cache
         self.master_spreads_dir = masterspreads_dir
         self.unexpected_elements = []
         self.get_elements_from_all_files()
 
     def get_elements_from_file(self, file_path):
-        tree = ET.parse(file_path)
+        return load_part_model(self.model_cache, self.source, file_path, "master_spread", self._parse_master_spread_file)
+
+    def _parse_master_spread_file(self, file_path):
+        from lxml import etree as ET
+        with self.source.open(file_path) as xml_file:
+            tree = ET.parse(xml_file)
         root = tree.getroot()
         master_spread = root.find('MasterSpread')
         elements = []
         if master_spread is not None:
             for child in master_spread:
-                if child.tag not in ['Properties', 'Page']:
-                    self.unexpected_elements.append(child.tag)
                 elements.append(child.tag)
+        instrumentation.count("xml_files_parsed")
+        instrumentation.count("xml_elements_visited", len(elements))
         return elements
 
     def get_elements_from_all_files(self):
         all_elements = {}
-        for file_name in os.listdir(self.master_spreads_dir):
-            if file_name.endswith('.xml'):
-                file_path = os.path.join(self.master_spreads_dir, file_name)
-                elements = self.get_elements_from_file(file_path)
-                all_elements[file_name] = elements
+        file_names = [file_name for file_name in sorted(
+            self.source.listdir(self.master_spreads_dir)) if file_name.endswith('.xml')]
+        file_paths = [self.source.join(self.master_spreads_dir, file_name)
+                      for file_name in file_names]
+        for file_name, elements in zip(file_names, self.loader.map(self.get_elements_from_file, file_paths)):
+            for tag in elements:
+                if tag not in ['Properties', 'Page']:
+                    self.unexpected_elements.append(tag)
+            all_elements[file_name] = elements
         return all_elements
 
     def has_unexpected_elements(self):
@@ -450,18 +961,10 @@ class PropertyBase:
         raise NotImplementedError("Subclasses should implement this method")
 
     def _resolve_inheritance(self, style_id):
-        inherited_value = self.styles_parser.get_all_properties(
-            style_id).get(self.property_name)
-        if not inherited_value:
-            base_style = self.styles_parser.get_all_properties(
-                style_id).get("BasedOn")
-            if base_style:
-                # Normalize the style_id
-                if base_style.startswith("$ID/"):
-                    base_style = "ParagraphStyle/" + base_style
-                self.inherited_from = base_style
-                return self._resolve_inheritance(base_style)
-        return inherited_value
+        # The resolver walks the BasedOn chain once per style and memoizes it
+        value, self.inherited_from = self.styles_parser.get_paragraph_style_resolver(
+        ).resolve(style_id, self.property_name)
+        return value
 
     def get_property_value(self):
         return self.value
@@ -496,19 +999,126 @@ class Hyphenation(PropertyBase):
         return "Hyphenation"
 
 
+# **********************************************************
+# Class: StyleResolver
+# Description: Resolves the effective properties of styles over their BasedOn
+# chain. Each style is resolved once and memoized, so later lookups are a
+# dictionary hit. Cycles and chains deeper than max_depth are cut off.
+# **********************************************************
+class StyleResolver:
+    MAX_DEPTH = 64
+
+    def __init__(self, styles, style_prefix, max_depth=MAX_DEPTH):
+        self.styles = styles
+        self.style_prefix = style_prefix
+        self.max_depth = max_depth
+        # style_id -> {property_name: (value, style_id the value is set on)}
+        self.effective_properties = {}
+        # style_id -> last style of its BasedOn chain
+        self.chain_roots = {}
+        self.cyclic_style_ids = set()
+        self.truncated_style_ids = set()
+        # Story files may be loaded on several threads
+        self.lock = threading.Lock()
+
+    def normalize_style_id(self, style_id):
+        if style_id.startswith("$ID/"):
+            return self.style_prefix + style_id
+        return style_id
+
+    def get_effective_properties(self, style_id):
+        if not style_id:
+            return {}
+        if style_id not in self.effective_properties:
+            with self.lock:
+                if style_id not in self.effective_properties:
+                    self._resolve_chain(style_id)
+        return self.effective_properties[style_id]
+
+    def resolve(self, style_id, property_name):
+        """Returns (value, inherited_from). inherited_from is None when set directly."""
+        if not style_id:
+            # A range without an applied style has nothing to inherit
+            return None, None
+        effective_properties = self.get_effective_properties(style_id)
+        if property_name in effective_properties:
+            value, set_on = effective_properties[property_name]
+            return value, (set_on if set_on != style_id else None)
+        # Not set anywhere, report the end of the chain like a full walk would
+        chain_root = self.chain_roots[style_id]
+        return None, (chain_root if chain_root != style_id else None)
+
+    def _resolve_chain(self, style_id):
+        # Walk up until a style that is already resolved or the end of the chain
+        chain = []
+        visited = set()
+        current = style_id
+        while current is not None and current not in self.effective_properties:
+            if current in visited:
+                self.cyclic_style_ids.add(current)
+                current = None
+                break
+            if len(chain) >= self.max_depth:
+                self.truncated_style_ids.add(style_id)
+                current = None
+                break
+            visited.add(current)
+            chain.append(current)
+            base_style = self.styles.get(current, {}).get("BasedOn")
+            current = self.normalize_style_id(
+                base_style) if base_style else None
+
+        if not chain:
+            return
+        if current is not None:
+            inherited = self.effective_properties[current]
+            chain_root = self.chain_roots[current]
+        else:
+            inherited = {}
+            chain_root = chain[-1]
+
+        # Resolve from the base down, a falsy value is inherited from the base
+        for chain_style_id in reversed(chain):
+            effective = dict(inherited)
+            for property_name, value in self.styles.get(chain_style_id, {}).items():
+                if value:
+                    effective[property_name] = (value, chain_style_id)
+            # chain_roots first, a style is seen as resolved once it is in effective_properties
+            self.chain_roots[chain_style_id] = chain_root
+            self.effective_properties[chain_style_id] = effective
+            inherited = effective
+
+
 # **********************************************************
 # Class: StylesParser
-# Description: A parser class to extract paragraph styles from the provided XML path.
+# Description: A parser class to extract paragraph and character styles from the provided XML path.
 # **********************************************************
 class StylesParser:
-    def __init__(self, xml_path):
-        self.tree = ET.parse(xml_path)
-        self.root = self.tree.getroot()
-        self.paragraph_styles = self._extract_paragraph_styles()
-
-    def _extract_paragraph_styles(self):
+    def __init__(self, xml_path, source=None, model_cache=None):
+        self.source = source or FolderSource()
+        self.model_cache = model_cache
+        self.paragraph_styles, self.character_styles = load_part_model(
+            self.model_cache, self.source, xml_path, "styles", self._parse_styles_file)
+        self.paragraph_style_resolver = StyleResolver(
+            self.paragraph_styles, "ParagraphStyle/")
+        self.character_style_resolver = StyleResolver(
+            self.character_styles, "CharacterStyle/")
+
+    def _parse_styles_file(self, xml_path):
+        from lxml import etree as ET
+        with self.source.open(xml_path) as xml_file:
+            root = ET.parse(xml_file).getroot()
+        paragraph_styles = self._extract_paragraph_styles(root)
+        character_styles = self._extract_character_styles(root)
+        instrumentation.count("xml_files_parsed")
+        instrumentation.count("paragraph_style_records", len(paragraph_styles))
+        instrumentation.count("character_style_records", len(character_styles))
+        return paragraph_styles, character_styles
+
+    def _extract_paragraph_styles(self, root):
         styles = {}
-        for par_style in self.root.findall(".//ParagraphStyle"):
+        instrumentation.count("findall_calls")
+        for par_style in root.findall(".//ParagraphStyle"):
             style_id = par_style.get("Self")
             properties = par_style.find("Properties")
             style_properties = {}
@@ -519,9 +1129,32 @@ class StylesParser:
             styles[style_id] = style_properties
         return styles
 
+    def _extract_character_styles(self, root):
+        styles = {}
+        instrumentation.count("findall_calls")
+        for char_style in root.findall(".//CharacterStyle"):
+            style_id = char_style.get("Self")
+            style_properties = {attr: value for attr, value in char_style.attrib.items()
+                                if attr not in ["Self", "Name"]}
+            properties = char_style.find("Properties")
+            if properties is not None:
+                for prop in properties:
+                    style_properties[prop.tag] = prop.text
+            styles[style_id] = style_properties
+        return styles
+
     def get_all_properties(self, style_id):
         return self.paragraph_styles.get(style_id, {})
 
+    def get_character_style_properties(self, style_id):
+        return self.character_styles.get(style_id, {})
+
+    def get_paragraph_style_resolver(self):
+        return self.paragraph_style_resolver
+
+    def get_character_style_resolver(self):
+        return self.character_style_resolver
+
     def print_par_style_names(self):
         for style_name in self.paragraph_styles.keys():
             print(style_name)
@@ -532,7 +1165,12 @@ class StylesParser:
 # Description: A parser class to extract paragraph styles from the provided XML path.
 # **********************************************************
 class StoriesParser:
-    def __init__(self, stories_dir, styles_parser, fonts_parser, spreads_parser):
+    def __init__(self, stories_dir, styles_parser, fonts_parser, spreads_parser, source=None, streaming=False, loader=None, model_cache=None):
+        self.source = source or FolderSource()
+        self.loader = loader or ParallelLoader()
+        # streaming reads story files with iterparse instead of loading them whole
+        self.streaming = streaming
+        self.model_cache = model_cache
         self.story_id = None
         self.stories_dir = stories_dir
         self.styles_parser = styles_parser
@@ -540,73 +1178,209 @@ class StoriesParser:
         self.spreads_parser = spreads_parser
         self.used_font_families = []
         self.stories_data_list = []
+        self.stories_by_id = {}
+        self.stories_by_frame_id = {}
         self.extract_stories_data()
 
     def extract_stories_data(self):
-        for story_file in os.listdir(self.stories_dir):
-            if story_file.endswith('.xml'):
-                file_path = os.path.join(self.stories_dir, story_file)
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                story_id = root.find("Story").get("Self")
-
-                for story_element in root.findall("Story"):
-                    story_id = story_element.get("Self")
-                    story_data = StoryData(story_id, self.spreads_parser)
-
-                    # Extract Paragraph Styles
-                    for par_style_range in story_element.findall("ParagraphStyleRange"):
-                        applied_par_style = par_style_range.get(
-                            "AppliedParagraphStyle")
-
-                        # Get properties of the paragraph style from Styles.xml
-                        par_style_properties = self.styles_parser.get_all_properties(
-                            applied_par_style)
-                        applied_font = par_style_properties.get("AppliedFont")
-                        based_on = par_style_properties.get("BasedOn")
-                        hyphenation = par_style_properties.get("Hyphenation")
-
-                        # Create a ParagraphStyle object
-                        par_style = ParagraphStyle(
-                            applied_par_style, self.styles_parser, self.fonts_parser, based_on, **par_style_properties)
-                        story_data.add_paragraph_style(par_style)
-
-                        # Extract Character Styles within the Paragraph Style
-                        for char_style_range in par_style_range.findall("CharacterStyleRange"):
-                            applied_char_style = char_style_range.get(
-                                "AppliedCharacterStyle")
-                            content_element = char_style_range.find("Content")
-                            content = content_element.text if content_element is not None else None
-                            applied_font_element = char_style_range.find(
-                                "Properties/AppliedFont")
-                            applied_font = applied_font_element.text if applied_font_element is not None else None
-                            # Extracting overrides
-                            overrides = {}
-                            # Extracting attribute overrides
-                            for attr, value in char_style_range.attrib.items():
-                                if attr != "AppliedCharacterStyle":
-                                    overrides[attr] = value
-                                # Extracting child element overrides under Properties
-                                properties_element = char_style_range.find(
-                                    "Properties")
-                                if properties_element is not None:
-                                    for prop_child in properties_element:
-                                        overrides[prop_child.tag] = prop_child.text
-                            char_style = CharacterStyle(
-                                applied_char_style, content, self.fonts_parser, applied_font, **overrides)
-                            table_element = char_style_range.find("Table")
-                            if table_element is not None:
-                                char_style.add_table()
-                            story_data.add_character_style(char_style)
-
-                    self.stories_data_list.append(story_data)
+        file_paths = [self.source.join(self.stories_dir, story_file)
+                      for story_file in sorted(self.source.listdir(self.stories_dir)) if story_file.endswith('.xml')]
+        for stories, used_fonts in self.loader.map(self._load_story_file, file_paths):
+            used_fonts.replay(self.fonts_parser)
+            for story_data in stories:
+                self.stories_data_list.append(story_data)
+                self.stories_by_id.setdefault(
+                    story_data.story_id, story_data)
+
+    # ---------------------------------------------------
+    # Function: _load_story_file
+    # Description: Loads one story file, may run on a worker thread. Used
+    # fonts are recorded and replayed by extract_stories_data in file order.
+    # The file is read into plain story records, those are what the model
+    # cache keeps. StoryData is built from them because it depends on the
+    # spreads and styles of the current package.
+    # ---------------------------------------------------
+    def _load_story_file(self, file_path):
+        used_fonts = UsedFontRecorder()
+        read_story_file = self._stream_story_file if self.streaming else self._parse_story_file
+        story_records = load_part_model(
+            self.model_cache, self.source, file_path, "story", read_story_file)
+        stories = [self._build_story(story_record, used_fonts)
+                   for story_record in story_records]
+        return stories, used_fonts
+
+    def _build_story(self, story_record, fonts_parser):
+        story_id, par_style_records = story_record
+        story_data = StoryData(story_id, self.spreads_parser)
+        for applied_par_style, char_style_records in par_style_records:
+            story_data.add_paragraph_style(
+                self._create_paragraph_style(applied_par_style, fonts_parser))
+            for char_style_record in char_style_records:
+                story_data.add_character_style(
+                    self._create_character_style(char_style_record, fonts_parser))
+        return story_data
+
+    # ---------------------------------------------------
+    # Function: _parse_story_file
+    # Description: Loads the whole story file and walks its ranges.
+    # Returns: a list of (story_id, [(applied_par_style, [char_style_record])])
+    # ---------------------------------------------------
+    def _parse_story_file(self, file_path):
+        from lxml import etree as ET
+        story_records = []
+        with self.source.open(file_path) as xml_file:
+            tree = ET.parse(xml_file)
+        root = tree.getroot()
+
+        findall_calls = 1
+        for story_element in root.findall("Story"):
+            par_style_records = []
+
+            # Extract Paragraph Styles
+            findall_calls += 1
+            for par_style_range in story_element.findall("ParagraphStyleRange"):
+                # Extract Character Styles within the Paragraph Style
+                findall_calls += 1
+                par_style_records.append((par_style_range.get("AppliedParagraphStyle"), [
+                    self._read_character_style_range(char_style_range)
+                    for char_style_range in par_style_range.findall("CharacterStyleRange")]))
+
+            story_records.append((story_element.get("Self"), par_style_records))
+        instrumentation.count("findall_calls", findall_calls)
+        self._count_story_records(story_records)
+        return story_records
+
+    def _count_story_records(self, story_records):
+        # Both readers return the same records, so these counters compare them
+        if not instrumentation.is_active():
+            return
+        instrumentation.count("xml_files_parsed")
+        instrumentation.count("story_records", len(story_records))
+        instrumentation.count("paragraph_records", sum(
+            len(par_style_records) for _, par_style_records in story_records))
+        instrumentation.count("character_range_records", sum(
+            len(char_style_records) for _, par_style_records in story_records
+            for _, char_style_records in par_style_records))
+
+    # ---------------------------------------------------
+    # Function: _stream_story_file
+    # Description: Reads the story file with iterparse. Paragraph ranges are
+    # recorded when they open and character ranges when they close, then the
+    # range is cleared. Peak memory is bounded by the largest single range
+    # instead of the whole story. Only ranges directly under the Story are
+    # read, the same as _parse_story_file.
+    # ---------------------------------------------------
+    def _stream_story_file(self, file_path):
+        from lxml import etree as ET
+        story_records = []
+        story_element = None
+        par_style_records = None
+        # Every element of the file passes through the loop, counted on its end event
+        visited = 0
+        with self.source.open(file_path) as xml_file:
+            for event, element in ET.iterparse(xml_file, events=("start", "end")):
+                parent = element.getparent()
+                if event == "start":
+                    if story_element is None:
+                        if element.tag == "Story" and parent is not None and parent.getparent() is None:
+                            story_element = element
+                            par_style_records = []
+                    elif element.tag == "ParagraphStyleRange" and parent is story_element:
+                        par_style_records.append(
+                            (element.get("AppliedParagraphStyle"), []))
+                    continue
+                visited += 1
+                if story_element is None:
+                    continue
+                if element is story_element:
+                    story_records.append(
+                        (element.get("Self"), par_style_records))
+                    self._clear_element(element)
+                    story_element = None
+                    par_style_records = None
+                elif element.tag == "ParagraphStyleRange" and parent is story_element:
+                    self._clear_element(element)
+                elif element.tag == "CharacterStyleRange" and parent.tag == "ParagraphStyleRange" \
+                        and parent.getparent() is story_element:
+                    par_style_records[-1][1].append(
+                        self._read_character_style_range(element))
+                    self._clear_element(element)
+        instrumentation.count("xml_elements_visited", visited)
+        self._count_story_records(story_records)
+        return story_records
+
+    def _clear_element(self, element):
+        # Drop the element's content and the already handled siblings before it
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+    def _create_paragraph_style(self, applied_par_style, fonts_parser):
+        # Get properties of the paragraph style from Styles.xml
+        par_style_properties = self.styles_parser.get_all_properties(
+            applied_par_style)
+        based_on = par_style_properties.get("BasedOn")
+
+        # Create a ParagraphStyle object
+        return ParagraphStyle(
+            applied_par_style, self.styles_parser, fonts_parser, based_on, **par_style_properties)
+
+    # ---------------------------------------------------
+    # Function: _read_character_style_range
+    # Returns: (applied_char_style, content, applied_font, overrides, has_table)
+    # ---------------------------------------------------
+    def _read_character_style_range(self, char_style_range):
+        applied_char_style = char_style_range.get(
+            "AppliedCharacterStyle")
+        content_element = char_style_range.find("Content")
+        content = content_element.text if content_element is not None else None
+        applied_font_element = char_style_range.find(
+            "Properties/AppliedFont")
+        applied_font = applied_font_element.text if applied_font_element is not None else None
+        # Extracting overrides
+        overrides = {}
+        # Extracting attribute overrides
+        for attr, value in char_style_range.attrib.items():
+            if attr != "AppliedCharacterStyle":
+                overrides[attr] = value
+            # Extracting child element overrides under Properties
+            properties_element = char_style_range.find(
+                "Properties")
+            if properties_element is not None:
+                for prop_child in properties_element:
+                    overrides[prop_child.tag] = prop_child.text
+        has_table = char_style_range.find("Table") is not None
+        return applied_char_style, content, applied_font, overrides, has_table
+
+    def _create_character_style(self, char_style_record, fonts_parser):
+        applied_char_style, content, applied_font, overrides, has_table = char_style_record
+        style_font = None
+        if applied_font is None and applied_char_style:
+            # No font on the range, the character style or a style it is based on may set one
+            style_font, _ = self.styles_parser.get_character_style_resolver(
+            ).resolve(applied_char_style, "AppliedFont")
+        char_style = CharacterStyle(
+            applied_char_style, content, fonts_parser, applied_font, style_font, **overrides)
+        if has_table:
+            char_style.add_table()
+        return char_style
 
     def get_story_by_id(self, story_id):
         """Returns the StoryData object for the given story_id."""
-        for story_data in self.stories_data_list:
-            if story_data.story_id == story_id:
-                return story_data
-        return None
+        return self.stories_by_id.get(story_id)
+
+    def map_text_frames(self, text_frames):
+        """Links each text frame to its parent story and indexes stories by frame id."""
+        for text_frame in text_frames:
+            story_data = self.stories_by_id.get(text_frame.parent_story_id)
+            text_frame.add_parent_story_obj(story_data)
+            self.stories_by_frame_id[text_frame.frame_id] = story_data
+
+    def get_story_by_frame_id(self, frame_id):
+        """Returns the StoryData object shown in the given text frame."""
+        return self.stories_by_frame_id.get(frame_id)
 
     def get_stories_data(self):
         """Returns the list of extracted story data."""
@@ -662,7 +1436,7 @@ class StoryData:
         return self.page
 
     def get_all_fonts(self):
-        return [char_style.applied_font for char_style in self.character_styles if char_style.applied_font]
+        return [char_style.get_font() for char_style in self.character_styles if char_style.get_font()]
 
     def __str__(self):
         return f"Story ID: {self.story_id}\n" + \
@@ -708,19 +1482,24 @@ class ParagraphStyle:
 # Description: A class to represent and manage character styles.
 # ---------------------------------------------------
 class CharacterStyle:
-    def __init__(self, applied_char_style, content, fonts_parser, applied_font=None, **overrides):
+    def __init__(self, applied_char_style, content, fonts_parser, applied_font=None, style_font=None, **overrides):
         self.applied_style = applied_char_style
         self.content = content
         self.applied_font = applied_font
+        # Font of the applied character style, used when the range sets none
+        self.style_font = style_font
         # Any attributes besides "AppliedCharacterStyle" and any properties
         self.overrides = overrides
         self.table_used = False
         self.add_used_character_font(fonts_parser)
 
     def add_used_character_font(self, fonts_parser):
-        if self.applied_font is not None:
+        if self.get_font() is not None:
             fonts_parser.add_used_font_family(
-                self.applied_font)
+                self.get_font())
+
+    def get_font(self):
+        return self.applied_font if self.applied_font is not None else self.style_font
 
     def has_overrides(self):
         return bool(self.overrides)
@@ -740,18 +1519,392 @@ class CharacterStyle:
     def __str__(self):
         return f"Applied Character Style: {self.applied_style}\n" + \
                f"Content: {self.content}\n" + \
-               f"Applied Font: {self.applied_font}\n" + \
+               f"Applied Font: {self.get_font()}\n" + \
                (f"Overrides: {self.overrides}\n" if self.has_overrides() else "")
 
 
+# **********************************************************
+# Class: DocumentCheck
+# Description: Base class for checks that run on the CheckEngine. A check
+# overrides the visit_* callbacks it needs and buffers its findings. The
+# findings are added to the ValidationResult by report() when the check's
+# state runs, so the order of results is the same as the state order.
+# **********************************************************
+class DocumentCheck:
+    VISITORS = ("visit_story", "visit_paragraph_style", "visit_character_style",
+                "visit_spread", "visit_link", "visit_text_frame")
+
+    def __init__(self):
+        self.findings = []
+        # Set by stream_to, findings are then written out the moment they are found
+        self.sink = None
+        self.state_name = None
+
+    def stream_to(self, sink, state_name):
+        self.sink = sink
+        self.state_name = state_name
+
+    def add_finding(self, finding):
+        self.findings.append(finding)
+        if self.sink is not None:
+            self.sink.write_finding(finding, self.state_name)
+
+    def add_success(self, message, success_type="SUCCESS"):
+        self.add_finding(Finding(success_type, "success", message))
+
+    def add_error(self, message, error_type="ERROR", page=None, location=None, subject=None, group=None):
+        self.add_finding(create_finding(error_type, "error", message, page, location, subject, group))
+
+    def add_warning(self, message, warning_type="WARNING", page=None, location=None, subject=None, group=None):
+        self.add_finding(create_finding(warning_type, "warning", message, page, location, subject, group))
+
+    def visit_story(self, story):
+        pass
+
+    def visit_paragraph_style(self, story, par_style):
+        pass
+
+    def visit_character_style(self, story, char_style):
+        pass
+
+    def visit_spread(self, spread):
+        pass
+
+    def visit_link(self, spread, link):
+        pass
+
+    def visit_text_frame(self, spread, text_frame):
+        pass
+
+    def finish(self):
+        """Called once after the traversal, e.g. to add the success message."""
+        pass
+
+    def report(self, results):
+        for finding in self.findings:
+            # A streamed finding was written to the sink when it was found
+            results.add_finding(finding, stream=self.sink is None)
+        self.findings = []
+
+
+# **********************************************************
+# Class: CheckEngine
+# Description: Traverses the stories and spreads exactly once and calls the
+# visit_* callbacks of every registered check per node. Only the callbacks
+# a check overrides are called, so adding a check adds no traversal.
+# **********************************************************
+class CheckEngine:
+    def __init__(self):
+        self.checks = []
+        self.visitors = {name: [] for name in DocumentCheck.VISITORS}
+        self.traversed = False
+
+    def register(self, check):
+        self.checks.append(check)
+        for name in DocumentCheck.VISITORS:
+            if getattr(type(check), name) is not getattr(DocumentCheck, name):
+                self.visitors[name].append(getattr(check, name))
+        return check
+
+    def run(self, stories, spreads):
+        """Traverses the document on the first call, later calls do nothing."""
+        if self.traversed:
+            return
+        self.traversed = True
+        story_visitors = self.visitors["visit_story"]
+        par_style_visitors = self.visitors["visit_paragraph_style"]
+        char_style_visitors = self.visitors["visit_character_style"]
+        spread_visitors = self.visitors["visit_spread"]
+        link_visitors = self.visitors["visit_link"]
+        text_frame_visitors = self.visitors["visit_text_frame"]
+
+        for story in stories:
+            for visit in story_visitors:
+                visit(story)
+            if par_style_visitors:
+                for par_style in story.get_paragraph_styles():
+                    for visit in par_style_visitors:
+                        visit(story, par_style)
+            if char_style_visitors:
+                for char_style in story.get_character_styles():
+                    for visit in char_style_visitors:
+                        visit(story, char_style)
+
+        for spread in spreads:
+            for visit in spread_visitors:
+                visit(spread)
+            if link_visitors:
+                for link in spread.get_links_obj_list():
+                    for visit in link_visitors:
+                        visit(spread, link)
+            if text_frame_visitors:
+                for text_frame in spread.text_frame_obj_list:
+                    for visit in text_frame_visitors:
+                        visit(spread, text_frame)
+
+        for check in self.checks:
+            check.finish()
+        instrumentation.count("check_stories_visited", len(stories))
+        instrumentation.count("check_spreads_visited", len(spreads))
+
+
+# -------------------------------------------
+# Class: ParagraphStyleCheck
+# Inheritance: DocumentCheck
+# Description: Story paragraph styles (used styles) must not be default InDesign par styles.
+# -------------------------------------------
+class ParagraphStyleCheck(DocumentCheck):
+    DEFAULT_STYLES = ["ParagraphStyle/$ID/NormalParagraphStyle",
+                      "ParagraphStyle/$ID/[No paragraph style]"]
+
+    def __init__(self):
+        super().__init__()
+        self.par_style_flag = False
+
+    def visit_paragraph_style(self, story, par_style):
+        if par_style.get_style_id() in self.DEFAULT_STYLES:
+            self.par_style_flag = True
+            location = f"on Page: {story.get_page()} in Text:'{story.get_story_text_content()}'"
+            self.add_error(f"Text without paragraph style found {location}", "PARAGRAPH_STYLE", story.get_page(),
+                           location, subject="Text without paragraph style found")
+
+    def finish(self):
+        if not self.par_style_flag:
+            self.add_success(
+                "Paragraph styles used on all text", "PARAGRAPH_STYLE")
+
+
+# -------------------------------------------
+# Class: HyphenationCheck
+# Inheritance: DocumentCheck
+# Description: Warns once per paragraph style with hyphenation enabled.
+# -------------------------------------------
+class HyphenationCheck(DocumentCheck):
+    def __init__(self):
+        super().__init__()
+        self.processed_styles = set()  # So we dont throw duplicate warnings
+
+    def visit_paragraph_style(self, story, par_style):
+        if par_style.has_hyphenation() and par_style.get_style_id() not in self.processed_styles:
+            self.add_warning(
+                f"Hyphenation is enabled for style: {par_style.get_style_id()}", "HYPHENATION")
+            self.processed_styles.add(par_style.get_style_id())
+
+    def finish(self):
+        if not self.processed_styles:
+            self.add_success(
+                "Hyphenation disabled for all styles", "HYPHENATION")
+
+
+# -------------------------------------------
+# Class: OverridesCheck
+# Inheritance: DocumentCheck
+# Description: Any additional property or attribute on a character style range is an override.
+# -------------------------------------------
+class OverridesCheck(DocumentCheck):
+    def __init__(self):
+        super().__init__()
+        self.overrides_flag = False
+
+    def visit_character_style(self, story, char_style):
+        if char_style.has_overrides():
+            self.overrides_flag = True
+            location = f"in text: '{char_style.get_content()}' on Page: {story.get_page()}"
+            # Ranges of a page with the same overridden properties are one problem, see ValidationResult.add_finding
+            self.add_warning(f"Override found {location} ", "OVERRIDE", story.get_page(), location,
+                             subject=f"Override of {', '.join(char_style.get_overrides())} found")
+
+    def finish(self):
+        if not self.overrides_flag:
+            self.add_success("No Overrides found", "OVERRIDE")
+
+
+# -------------------------------------------
+# Class: TableCheck
+# Inheritance: DocumentCheck
+# Description: Tables are not allowed in templates.
+# -------------------------------------------
+class TableCheck(DocumentCheck):
+    def visit_character_style(self, story, char_style):
+        if char_style.has_table():
+            page_name = story.get_page()
+            self.add_error(
+                f"Table was used on Page: {page_name}", "TABLE", page_name)
+
+
+# -------------------------------------------
+# Class: ImagesIncludedCheck
+# Inheritance: DocumentCheck
+# Description: Compares the linked images with the images in the Links folder.
+# -------------------------------------------
+class ImagesIncludedCheck(DocumentCheck):
+    def __init__(self, image_inventory):
+        super().__init__()
+        self.image_inventory = image_inventory
+        self.link_names = set()
+
+    def visit_link(self, spread, link):
+        self.link_names.add(link.get_image_name())
+
+    def finish(self):
+        image_names = self.image_inventory.get_image_names()
+        images_used_flag = True
+        # Check if all link names are found in the image names.
+        for missing_image in sorted(self.link_names - image_names):
+            images_used_flag = False
+            self.add_error(
+                f"Link '{missing_image}' is used but not found in the Links folder.", "IMAGE")
+
+        # Check if there are any image names not used in links.
+        for unused_image in sorted(image_names - self.link_names):
+            images_used_flag = False
+            self.add_warning(
+                f"Image '{unused_image}' is present in the document but not used.", "IMAGE")
+
+        if images_used_flag is True:
+            self.add_success(
+                f"All Links images used and found in Links folder", "IMAGE")
+
+
+# -------------------------------------------
+# Class: EmbeddedImageCheck
+# Inheritance: DocumentCheck
+# Description: Links must not be embedded.
+# -------------------------------------------
+class EmbeddedImageCheck(DocumentCheck):
+    def __init__(self):
+        super().__init__()
+        self.embedded_image_flag = False
+
+    def visit_link(self, spread, link):
+        if link.get_stored_state() == 'Embedded':
+            self.embedded_image_flag = True
+            # Every page of a spread shares the link, its pages become locations of one finding
+            self.add_error(f"Image {link.get_image_name()} is embedded.", "IMAGE",
+                           location=f"on Page: {spread.get_page_name()}",
+                           subject=f"Image {link.get_image_name()} is embedded", group=link)
+
+    def finish(self):
+        if self.embedded_image_flag is False:
+            self.add_success(
+                f"No images are embedded", "IMAGE")
+
+
+# -------------------------------------------
+# Class: ImageTransformationCheck
+# Inheritance: DocumentCheck
+# Description: Flags rotated, skewed and flipped images or image containers.
+# -------------------------------------------
+class ImageTransformationCheck(DocumentCheck):
+    def __init__(self):
+        super().__init__()
+        self.transformation_detected_flag = False
+
+    def visit_link(self, spread, link):
+        item_transform = link.get_item_transform()
+        container_transform = link.get_container_item_transform()
+        file_name = link.get_image_name()
+        page_name = spread.get_page_name()
+        # Every page of a spread shares the link, its pages become locations of one finding
+        location = f"on Page: {page_name}"
+        for idx, asset in enumerate([item_transform, container_transform]):
+            if asset:
+                a, b, c, d, x, y = map(float, asset.split())
+                context = "Image inside Container" if idx == 0 else "Image Container"
+                # Check for rotation
+                rotation_angle = math.atan2(b, a)
+                rotation_angle_degrees = math.degrees(rotation_angle)
+                if abs(rotation_angle_degrees) > 0.01:
+                    self.transformation_detected_flag = True
+                    self.add_error(
+                        f"{context}: '{file_name}' on Page {page_name} has been rotated by {rotation_angle_degrees:.2f} degrees.", "IMAGES", page_name, location,
+                        f"{context}: '{file_name}' has been rotated by {rotation_angle_degrees:.2f} degrees", link)
+                elif abs(b) > .01 or abs(c) > .01:
+                    self.transformation_detected_flag = True
+                    self.add_error(
+                        f"{context}: '{file_name}' on Page: {page_name} has skew transformations. Skew factors: b={b}, c={c}", "IMAGES", page_name, location,
+                        f"{context}: '{file_name}' has skew transformations (skew factors: b={b}, c={c})", link)
+                # Check for horizontal flip
+                if a < 0 and d > 0 and abs(rotation_angle_degrees) != 180:
+                    self.transformation_detected_flag = True
+                    self.add_error(
+                        f"{context}: '{file_name}' on Page: {page_name} has a horizontal flip transformation.", "IMAGES", page_name, location,
+                        f"{context}: '{file_name}' has a horizontal flip transformation", link)
+                # Check for vertical flip
+                if a > 0 and d < 0 and abs(rotation_angle_degrees) != 180:
+                    self.transformation_detected_flag = True
+                    self.add_error(
+                        f"{context}: '{file_name}' on Page: {page_name} has a vertical flip transformation.", "IMAGES", page_name, location,
+                        f"{context}: '{file_name}' has a vertical flip transformation", link)
+
+    def finish(self):
+        if self.transformation_detected_flag is False:
+            self.add_success(
+                f"No images with transformations", "IMAGE")
+
+
+# -------------------------------------------
+# Class: AutoSizeTextBoxCheck
+# Inheritance: DocumentCheck
+# Description: Auto sizing text frames must not size from the center.
+# -------------------------------------------
+class AutoSizeTextBoxCheck(DocumentCheck):
+    def __init__(self):
+        super().__init__()
+        # Every page of a spread shares its frames, each frame is reported once
+        self.reported_frame_ids = set()
+
+    def visit_text_frame(self, spread, text_frame):
+        if text_frame.is_auto_size and text_frame.frame_id not in self.reported_frame_ids:
+            if text_frame.auto_sizing_reference_point is None:
+                self.reported_frame_ids.add(text_frame.frame_id)
+                story = text_frame.parent_story_obj
+                location = f"Text: {story.get_story_text_content()}"
+                self.add_error(f"Text Frame auto sizes from center {location}", "AUTOSIZE", story.page,
+                               location, subject="Text Frame auto sizes from center")
+
+
 # **********************************************************
 # Class: FrontifyChecker
 # Description:
 # **********************************************************
 class FrontifyChecker:
-    def __init__(self):
+    def __init__(self, in_place=True, streaming=False, workers=None, font_cache=None, on_results=None, scratch_dir=None, result_cache=None, model_cache=None, on_state=None, finding_sink=None, profiler=None, metrics=None):
         # Source ZIP
         self.source_file_path = None
+        # in_place reads members straight from the ZIP, otherwise the package is extracted to 'data'
+        self.in_place = in_place
+        # streaming reads story files with iterparse, see StoriesParser
+        self.streaming = streaming
+        # Spread, story and master spread files are parsed on this many threads
+        self.loader = ParallelLoader(workers)
+        # Optional FontMetadataCache shared between runs
+        self.font_cache = font_cache
+        # Called by the RESULTS state, e.g. FrontifyGUI.display_results
+        self.on_results = on_results
+        # Called with every state before it runs, on the thread running the state machine
+        self.on_state = on_state
+        # Optional NdjsonSink, gets every state and finding while the checks run
+        self.finding_sink = finding_sink
+        # Optional instrumentation.Profiler, records a span per state and parser
+        self.profiler = profiler
+        # Optional metrics.CheckerMetrics, shared by the runs of a process
+        self.metrics = metrics
+        # Uncompressed bytes written by extract mode, ZipSource counts in place reads
+        self.bytes_extracted = 0
+        # Set by cancel(), the state machine stops before its next state
+        self.cancel_requested = threading.Event()
+        self.cancelled = False
+        # Folder that holds 'data' when extracting, defaults to the working directory
+        self.scratch_dir = scratch_dir
+        # Optional ResultCache, a hit skips straight to RESULTS
+        self.result_cache = result_cache
+        # Optional ModelCache, unchanged IDML members are not parsed again
+        self.model_cache = model_cache
+        self.package_digest = None
+        self.results_from_cache = False
+        self.package_source = None
+        self.idml_source = None
         # Data
         self.current_dir = None
         self.data_folder = None
@@ -771,6 +1924,9 @@ class FrontifyChecker:
         self.fonts_parser = None
         self.spreads_parser = None
         self.source_folders_parser = None
+        # Single traversal checks, created once parsing is done
+        self.check_engine = None
+        self.document_checks = {}
         # Initial State for State Machine, through GUI we already called States.GET_ZIP
         self.current_state = States.UNZIP_PACKAGE
         # State Machine States
@@ -798,16 +1954,129 @@ class FrontifyChecker:
         }
         # Validation Class
         self.results = ValidationResult()
+        self.results.sink = finding_sink
+        self.results.metrics = metrics
 
     def run_state_machine(self):
+        start = time.perf_counter()
+        cache_lookups = self.get_cache_lookups()
+        status = "crashed"
+        try:
+            with self.span("run_state_machine"):
+                self._run_states()
+            if self.cancelled:
+                status = "cancelled"
+            else:
+                status = "failed" if self.results.has_errors() else "passed"
+        finally:
+            if self.metrics is not None:
+                self.record_metrics(
+                    status, time.perf_counter() - start, cache_lookups)
+
+    def _run_states(self):
+        with self.span("load_cached_results"):
+            if self.load_cached_results():
+                self.current_state = States.RESULTS
         print(self.current_state)
-        while self.current_state:
-            self.current_state = self.states[self.current_state]()
-            if (self.current_state == States.EXIT):
-                return
+        try:
+            while self.current_state:
+                if self.cancel_requested.is_set() and self.current_state not in (States.RESULTS, States.EXIT):
+                    self.cancelled = True
+                    print(f"cancelled before {self.current_state}")
+                    if self.finding_sink is not None:
+                        self.finding_sink.write_state(
+                            self.current_state.name, "cancelled")
+                    return
+                if self.finding_sink is not None:
+                    self.finding_sink.write_state(self.current_state.name)
+                if self.on_state is not None:
+                    self.on_state(self.current_state)
+                state = self.current_state
+                state_start = time.perf_counter()
+                with self.span(state.name):
+                    self.current_state = self.states[state]()
+                if self.finding_sink is not None:
+                    self.finding_sink.write_state(state.name, "finished")
+                    if state == States.RESULTS:
+                        # After RESULTS finished, so the summary is the last record
+                        self.finding_sink.write_summary(
+                            self.results, cached=self.results_from_cache)
+                if self.metrics is not None:
+                    self.metrics.state_duration.observe(
+                        time.perf_counter() - state_start, state=state.name)
+                if (self.current_state == States.EXIT):
+                    return
+        finally:
+            with self.span("close"):
+                self.close_sources()
+                if self.model_cache is not None:
+                    self.model_cache.flush()
 
         print(self.current_state)
 
+    def get_cache_lookups(self):
+        """Returns (hits, misses) per cache so far, the caches outlive a run."""
+        caches = {"font": self.font_cache,
+                  "result": self.result_cache, "model": self.model_cache}
+        return {name: (cache.store.hits, cache.store.misses)
+                for name, cache in caches.items() if cache is not None}
+
+    # ---------------------------------------------------
+    # Function: record_metrics
+    # Description: Adds the outcome, duration, decompressed bytes and cache
+    # lookups of this run to the metrics. cache_lookups are the counts from
+    # before the run, only the difference belongs to this package.
+    # ---------------------------------------------------
+    def record_metrics(self, status, seconds, cache_lookups):
+        self.metrics.packages_validated.inc(status=status)
+        self.metrics.package_duration.observe(seconds)
+        bytes_decompressed = self.bytes_extracted + sum(
+            source.bytes_decompressed for source in (self.package_source, self.idml_source) if source is not None)
+        self.metrics.bytes_decompressed.inc(bytes_decompressed)
+        for name, (hits, misses) in self.get_cache_lookups().items():
+            hits_before, misses_before = cache_lookups.get(name, (0, 0))
+            self.metrics.cache_lookups.inc(
+                hits - hits_before, cache=name, result="hit")
+            self.metrics.cache_lookups.inc(
+                misses - misses_before, cache=name, result="miss")
+
+    def span(self, name):
+        """Times a section of the run when profiling, see instrumentation.Profiler."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.span(name)
+
+    # ---------------------------------------------------
+    # Function: load_cached_results
+    # Description: Looks the package up in the result cache. Only the ZIP
+    # central directory is read to compute the key.
+    # Returns: True if the results were taken from the cache.
+    # ---------------------------------------------------
+    def load_cached_results(self):
+        if self.result_cache is None or not self.source_file_path:
+            return False
+        self.package_digest = self.result_cache.package_digest(
+            self.source_file_path)
+        if self.package_digest is None:
+            return False
+        cached_results = self.result_cache.get(self.package_digest)
+        if cached_results is None:
+            return False
+        self.results = cached_results
+        self.results.sink = self.finding_sink
+        self.results.metrics = self.metrics
+        self.results_from_cache = True
+        return True
+
+    def cancel(self):
+        """Safe to call from any thread. The running state is finished first."""
+        self.cancel_requested.set()
+
+    def close_sources(self):
+        for source in (self.idml_source, self.package_source):
+            if source is not None:
+                source.close()
+
     # ========================================================================================
     # State: GET_ZIP
     # PASS Next State Transition: NA
@@ -815,6 +2084,7 @@ class FrontifyChecker:
     # Description: GUI acts as an event handler and calls this function.
     # ========================================================================================
     def get_zip_state(self):
+        from tkinter import filedialog
         source_file_path = filedialog.askopenfilename(
             filetypes=[("Zip files", "*.zip")])
         if source_file_path and source_file_path.endswith('.zip'):
@@ -830,10 +2100,16 @@ class FrontifyChecker:
     # State: UNZIP_PACKAGE
     # PASS Next State Transition: UNZIP_IDML
     # FAIL States Transition: RESULTS
-    # Description: Deletes 'data' folder, then create 'data' folder
+    # Description: Deletes 'data' folder, then create 'data' folder. In place mode opens the
+    # ZIP instead and nothing is written to disk.
     # ========================================================================================
     def unzip_package_state(self):
-        self.current_dir = os.getcwd()
+        if self.in_place:
+            if not self.open_zip_in_place():
+                return States.RESULTS
+            return States.UNZIP_IDML
+
+        self.current_dir = self.scratch_dir or os.getcwd()
         self.data_folder = os.path.join(self.current_dir, 'data')
 
         if not self.cleanup_data_folder():
@@ -842,8 +2118,34 @@ class FrontifyChecker:
         if not self.extract_zip_to_data_folder():
             return States.RESULTS
 
+        self.package_source = FolderSource()
         return States.UNZIP_IDML
 
+    # ---------------------------------------------------
+    # Function: open_zip_in_place
+    # Description: Opens the ZIP without extracting it. __MACOSX members are
+    # skipped by ZipSource. Check only 1 folder at the top of the ZIP.
+    # ---------------------------------------------------
+    def open_zip_in_place(self):
+        try:
+            self.package_source = ZipSource.from_path(self.source_file_path)
+        except Exception as e:
+            self.results.add_error(
+                f"Failed to unzip the file. Error: {e}", "CODE ERROR")
+            return False
+
+        all_dirs = [d for d in self.package_source.listdir("")
+                    if not self.package_source.isfile(d)]
+
+        # Check if there's only one main folder
+        if len(all_dirs) != 1:
+            self.results.add_error(
+                "Multiple folders found in the provided package. Please ensure there's only one main folder after unzipping.", "FOLDER")
+            return False
+        self.unzipped_folder_name = all_dirs[0]
+        self.unzipped_folder_path = self.unzipped_folder_name
+        return True
+
     # ---------------------------------------------------
     # Function: cleanup_data_folder
     # Description: Deletes 'data' folder if it exists,
@@ -869,6 +2171,8 @@ class FrontifyChecker:
         try:
             with zipfile.ZipFile(self.source_file_path, 'r') as zip_ref:
                 zip_ref.extractall(self.data_folder)
+                self.bytes_extracted += sum(
+                    info.file_size for info in zip_ref.infolist())
                 # to delete the __MACOSX folder after unzipping
                 macosx_dir = os.path.join(self.data_folder, '__MACOSX')
                 if os.path.exists(macosx_dir):
@@ -920,10 +2224,14 @@ class FrontifyChecker:
     # ---------------------------------------------------
     def validate_idml_files(self):
         idml_files = []
-        for root, dirs, files in os.walk(self.unzipped_folder_path):
-            for file in files:
-                if file.endswith('.idml'):
-                    idml_files.append(os.path.join(root, file))
+        if self.in_place:
+            idml_files = [member for member in self.package_source.walk_files(
+                self.unzipped_folder_path) if member.endswith('.idml')]
+        else:
+            for root, dirs, files in os.walk(self.unzipped_folder_path):
+                for file in files:
+                    if file.endswith('.idml'):
+                        idml_files.append(os.path.join(root, file))
 
         if len(idml_files) == 0:
             self.results.add_error(
@@ -938,6 +2246,7 @@ class FrontifyChecker:
     # ---------------------------------------------------
     # Function: unarchive_idml_files
     # Description: Unarchives the provided .idml file into a designated output folder.
+    # In place mode opens the .idml from the package ZIP instead.
     # If the unarchiving is successful, a success message is added to the results.
     # If there's an error during unarchiving, an error message is added to the results.
     # Args:
@@ -945,12 +2254,23 @@ class FrontifyChecker:
     # Returns: True if unarchiving is successful, False otherwise.
     # ---------------------------------------------------
     def unarchive_idml_files(self, idml_path):
-        self.idml_output_folder = os.path.join(
-            self.data_folder, 'Unarchived IDML')
-        os.makedirs(self.idml_output_folder, exist_ok=True)
+        if self.in_place:
+            # Member paths inside the .idml are relative to its root
+            self.idml_output_folder = ""
+        else:
+            self.idml_output_folder = os.path.join(
+                self.data_folder, 'Unarchived IDML')
+            os.makedirs(self.idml_output_folder, exist_ok=True)
         try:
-            with zipfile.ZipFile(idml_path, 'r') as zip_ref:
-                zip_ref.extractall(self.idml_output_folder)
+            if self.in_place:
+                self.idml_source = ZipSource.from_member(
+                    self.package_source, idml_path)
+            else:
+                with zipfile.ZipFile(idml_path, 'r') as zip_ref:
+                    zip_ref.extractall(self.idml_output_folder)
+                    self.bytes_extracted += sum(
+                        info.file_size for info in zip_ref.infolist())
+                self.idml_source = FolderSource()
             self.results.add_success(
                 f"No IDML issues found.", "IDML")
             return True
@@ -970,99 +2290,158 @@ class FrontifyChecker:
         # Source Folders (Links, Document Fonts)
         # Init: SourceFoldersParser
         # -----------------------------
-        # Check if 'Links' exists, if not create it to continue code flow
-        document_links_folder_path = os.path.join(
+        # A missing 'Links' folder is read as an empty folder to continue code flow
+        package_source = self.package_source
+        document_links_folder_path = package_source.join(
             self.unzipped_folder_path, 'Links')
-        if not os.path.exists(document_links_folder_path):
-            os.makedirs(document_links_folder_path)
-        # Check if 'Document Fonts' exists, if not create it to continue code flow
-        document_fonts_folder_path = os.path.join(
+        # A missing 'Document Fonts' folder is read as an empty folder to continue code flow
+        document_fonts_folder_path = package_source.join(
             self.unzipped_folder_path, 'Document Fonts')
-        if not os.path.exists(document_fonts_folder_path):
+        if not package_source.exists(document_fonts_folder_path):
             self.document_fonts_folder_exists = False
-            os.makedirs(document_fonts_folder_path)
-        self.source_folders_parser = SourceFoldersParser(
-            document_links_folder_path, document_fonts_folder_path)
+        # Image names and sizes always come from the ZIP central directory
+        if self.in_place:
+            image_inventory = ImageInventory.from_source(
+                package_source, document_links_folder_path)
+        else:
+            image_inventory = ImageInventory.from_zip(
+                self.source_file_path, f"{self.unzipped_folder_name}/Links")
+        with self.span("SourceFoldersParser"):
+            self.source_folders_parser = SourceFoldersParser(
+                document_links_folder_path, document_fonts_folder_path, package_source, image_inventory, self.loader, self.font_cache)
 
         # -----------------------------
         # Spreads XML
         # Init: SpreadsParser
         # -----------------------------
         # Check if Spreads directory exists
-        spreads_dir = os.path.join(
+        idml_source = self.idml_source
+        spreads_dir = idml_source.join(
             self.idml_output_folder, 'Spreads')
-        if not os.path.exists(spreads_dir):
+        if not idml_source.exists(spreads_dir):
             self.results.add_error(
                 f"Spreads directory does not exist", "CODE ERROR")
             return States.RESULTS
 
-        self.spreads_parser = SpreadsParser(
-            spreads_dir)
+        with self.span("SpreadsParser"):
+            self.spreads_parser = SpreadsParser(
+                spreads_dir, idml_source, self.loader, self.model_cache)
+            # Findings are listed in the document's page order
+            self.results.set_page_order(self.spreads_parser.get_page_names(
+                read_spread_order(idml_source, idml_source.join(self.idml_output_folder, 'designmap.xml'))))
         # -----------------------------
         # Fonts.XML
         # Init: FontsParser
         # -----------------------------
         # Check if Fonts.XML exists
-        fonts_xml_path = os.path.join(
+        fonts_xml_path = idml_source.join(
             self.idml_output_folder, 'Resources', 'Fonts.xml')
-        if not os.path.exists(fonts_xml_path):
+        if not idml_source.exists(fonts_xml_path):
             self.results.add_error(
                 f"Fonts.XML does not exist", "CODE ERROR")
             return States.RESULTS
-        self.fonts_parser = FontsParser(
-            fonts_xml_path)
+        with self.span("FontsParser"):
+            self.fonts_parser = FontsParser(
+                fonts_xml_path, idml_source, self.model_cache)
         # -----------------------------
         # Styles.XML
         # Init: StylesParser
         # -----------------------------
         # Check if Styles.xml exists
-        styles_xml_path = os.path.join(
+        styles_xml_path = idml_source.join(
             self.idml_output_folder, 'Resources', 'Styles.xml')
-        if not os.path.exists(styles_xml_path):
+        if not idml_source.exists(styles_xml_path):
             self.results.add_error(
                 f"Styles.xml file does not exist", "CODE ERROR")
             return States.RESULTS
         # Initialize the StylesParser
-        self.styles_parser = StylesParser(styles_xml_path)
+        with self.span("StylesParser"):
+            self.styles_parser = StylesParser(
+                styles_xml_path, idml_source, self.model_cache)
 
         # -----------------------------
         # Stories XML
         # Init: StoriesParser
         # -----------------------------
         # Check if Stories directory exists
-        stories_dir = os.path.join(self.idml_output_folder, 'Stories')
-        if not os.path.exists(stories_dir):
+        stories_dir = idml_source.join(self.idml_output_folder, 'Stories')
+        if not idml_source.exists(stories_dir):
             self.stories_exist = False
             self.results.add_warning(
                 f"Stories directory does not exist", "PARAGRAPH_STYLE")
         else:
             # Initialize the StoriesParser and extract story data
-            self.stories_parser = StoriesParser(
-                stories_dir, self.styles_parser, self.fonts_parser, self.spreads_parser)
-            self.stories_object_list = self.stories_parser.get_stories_data()
+            with self.span("StoriesParser"):
+                self.stories_parser = StoriesParser(
+                    stories_dir, self.styles_parser, self.fonts_parser, self.spreads_parser, idml_source, self.streaming, self.loader, self.model_cache)
+                self.stories_object_list = self.stories_parser.get_stories_data()
 
         # Map stories to text frames
-        for spread in self.spreads_parser.spreads_obj_list:
-            for text_frame in spread.text_frame_obj_list:
-                text_frame.add_parent_story_obj(
-                    self.stories_parser.get_story_by_id(text_frame.parent_story_id))
+        if self.stories_parser is not None:
+            with self.span("map_text_frames"):
+                self.stories_parser.map_text_frames(
+                    self.spreads_parser.get_text_frames())
 
         # -----------------------------
         # MasterSpreads XML
         # Init: MasterPageParser
         # -----------------------------
         # Check if MasterSpreads directory exists
-        masterspreads_dir = os.path.join(
+        masterspreads_dir = idml_source.join(
             self.idml_output_folder, 'MasterSpreads')
-        if not os.path.exists(masterspreads_dir):
+        if not idml_source.exists(masterspreads_dir):
             self.results.add_warning(
                 f"MasterSpreads directory does not exist", "CODE ERROR")
         else:
             # Initialize the StoriesParser and extract story data
-            self.masterspreads_parser = MasterPageParser(masterspreads_dir)
+            with self.span("MasterPageParser"):
+                self.masterspreads_parser = MasterPageParser(
+                    masterspreads_dir, idml_source, self.loader, self.model_cache)
 
+        self.create_check_engine()
         return States.MASTERPAGE_CHECK
 
+    # ---------------------------------------------------
+    # Function: create_check_engine
+    # Description: Registers the checks that walk stories and spreads on one
+    # CheckEngine, keyed by the state that reports them.
+    # ---------------------------------------------------
+    def create_check_engine(self):
+        self.check_engine = CheckEngine()
+        self.document_checks = {
+            States.PAR_CHECK: ParagraphStyleCheck(),
+            States.HYPHENATION_CHECK: HyphenationCheck(),
+            States.OVERRIDES_CHECK: OverridesCheck(),
+            States.IMAGES_INCLUDED_CHECK: ImagesIncludedCheck(
+                self.source_folders_parser.get_image_inventory()),
+            States.EMBEDDED_IMAGE_CHECK: EmbeddedImageCheck(),
+            States.IMAGE_TRANSFORMATION_CHECK: ImageTransformationCheck(),
+            States.TABLE_CHECK: TableCheck(),
+            States.AUTO_SIZE_TEXT_BOX_CHECK: AutoSizeTextBoxCheck(),
+        }
+        for state, check in self.document_checks.items():
+            if self.finding_sink is not None:
+                check.stream_to(self.finding_sink, state.name)
+            self.check_engine.register(check)
+
+    # ---------------------------------------------------
+    # Function: report_document_check
+    # Description: The first check state runs the single traversal for all
+    # checks, each state then adds the findings of its own check. The
+    # traversal streams the findings of every check, so it gets its own
+    # CHECK_ENGINE progress records instead of running under the first state.
+    # ---------------------------------------------------
+    def report_document_check(self, state):
+        if not self.check_engine.traversed:
+            if self.finding_sink is not None:
+                self.finding_sink.write_state("CHECK_ENGINE")
+            with self.span("CheckEngine.run"):
+                self.check_engine.run(self.stories_object_list or [],
+                                      self.spreads_parser.get_spreads_obj_list())
+            if self.finding_sink is not None:
+                self.finding_sink.write_state("CHECK_ENGINE", "finished")
+        self.document_checks[state].report(self.results)
+
     # ========================================================================================
     # State: MASTERPAGE_CHECK
     # PASS Next State Transition: PAR_CHECK
@@ -1070,13 +2449,15 @@ class FrontifyChecker:
     # Description: Checks masterspreads_parser for unexprected elements (not properties or page)
     # ========================================================================================
     def masterpage_check(self):
-        self.masterspreads_parser.print_unexpected_elements()  # Debug Print
-        if self.masterspreads_parser.has_unexpected_elements():
-            self.results.add_error(
-                f"Master page was used.", "MASTERPAGE")
-        else:
-            self.results.add_success(
-                "No master pages were used in the package.", 'MASTERPAGE')
+        # Without a MasterSpreads directory there is no parser, parse_xml reported it
+        if self.masterspreads_parser is not None:
+            self.masterspreads_parser.print_unexpected_elements()  # Debug Print
+            if self.masterspreads_parser.has_unexpected_elements():
+                self.results.add_error(
+                    f"Master page was used.", "MASTERPAGE")
+            else:
+                self.results.add_success(
+                    "No master pages were used in the package.", 'MASTERPAGE')
 
         if self.stories_exist:
             return States.PAR_CHECK
@@ -1092,16 +2473,7 @@ class FrontifyChecker:
 
     def par_style_check(self):
         self.stories_parser.print_stories_data()  # Debug Print
-        par_style_flag = False
-        for story in self.stories_object_list:
-            for par_style in story.get_paragraph_styles():
-                if par_style.get_style_id() in ["ParagraphStyle/$ID/NormalParagraphStyle", "ParagraphStyle/$ID/[No paragraph style]"]:
-                    par_style_flag = True
-                    self.results.add_error(
-                        f"Text without paragraph style found on Page: {story.get_page()} in Text:'{story.get_story_text_content()}'", "PARAGRAPH_STYLE", story.get_page())
-        if not par_style_flag:
-            self.results.add_success(
-                "Paragraph styles used on all text", "PARAGRAPH_STYLE")
+        self.report_document_check(States.PAR_CHECK)
         return States.HYPHENATION_CHECK
 
     # ========================================================================================
@@ -1113,19 +2485,7 @@ class FrontifyChecker:
     # ========================================================================================
 
     def hyphenation_check(self):
-        processed_styles = set()  # So we dont throw duplicate warnings
-        hyphenation_flag = False
-        for story in self.stories_object_list:
-            for par_style in story.get_paragraph_styles():
-                if par_style.has_hyphenation() and par_style.get_style_id() not in processed_styles:
-                    hyphenation_flag = True
-                    self.results.add_warning(
-                        f"Hyphenation is enabled for style: {par_style.get_style_id()}", "HYPHENATION")
-                    # Add the style_id to the set
-                    processed_styles.add(par_style.get_style_id())
-        if not hyphenation_flag:
-            self.results.add_success(
-                "Hyphenation disabled for all styles", "HYPHENATION")
+        self.report_document_check(States.HYPHENATION_CHECK)
         return States.OVERRIDES_CHECK
 
     # ========================================================================================
@@ -1137,15 +2497,7 @@ class FrontifyChecker:
     # are any, if so, it is an override.
     # ========================================================================================
     def overrides_check(self):
-        overrides_flag = False
-        for story in self.stories_object_list:
-            for char_style in story.get_character_styles():
-                if char_style.has_overrides():
-                    overrides_flag = True
-                    self.results.add_warning(
-                        f"Override found in text: '{char_style.get_content()}' on Page: {story.get_page()} ", "OVERRIDE", story.get_page())
-        if not overrides_flag:
-            self.results.add_success("No Overrides found", "OVERRIDE")
+        self.report_document_check(States.OVERRIDES_CHECK)
         return States.FONTS_INCLUDED_CHECK
 
     # ========================================================================================
@@ -1162,11 +2514,10 @@ class FrontifyChecker:
         # skip variable fonts
         used_font_families_names = [
             font_obj.get_font_family() for font_obj in used_font_families_objects if not font_obj.is_variable_font()]
-        document_font_families = [font_obj.get_font_family(
-        ) for font_obj in self.source_folders_parser.get_document_fonts()]
+        document_font_catalog = self.source_folders_parser.get_document_font_catalog()
         fonts_included_flag = True
         for used_font in used_font_families_names:
-            if used_font not in document_font_families:
+            if not document_font_catalog.has_family(used_font):
                 fonts_included_flag = False
                 self.results.add_error(
                     f"Font family '{used_font}' is used but not found in the document fonts.", "FONT")
@@ -1222,33 +2573,7 @@ class FrontifyChecker:
     #    flagged as warnings since they might be unnecessary and could increase the document's size.
     # ========================================================================================
     def images_included_check(self):
-        # Extract all the link names from the spreads.
-        link_names = {link.get_image_name() for spread in self.spreads_parser.get_spreads_obj_list()
-                      for link in spread.get_links_obj_list()}
-
-        # Extract all the image names from the source folder.
-        image_names = {image.get_image_name()
-                       for image in self.source_folders_parser.get_images_obj_list()}
-        images_used_flag = True
-        # Check if all link names are found in the image names.
-        missing_images = link_names - image_names
-        if missing_images:
-            for missing_image in missing_images:
-                images_used_flag = False
-                self.results.add_error(
-                    f"Link '{missing_image}' is used but not found in the Links folder.", "IMAGE")
-
-        # Check if there are any image names not used in links.
-        unused_images = image_names - link_names
-        if unused_images:
-            for unused_image in unused_images:
-                images_used_flag = False
-                self.results.add_warning(
-                    f"Image '{unused_image}' is present in the document but not used.", "IMAGE")
-
-        if images_used_flag is True:
-            self.results.add_success(
-                f"All Links images used and found in Links folder", "IMAGE")
+        self.report_document_check(States.IMAGES_INCLUDED_CHECK)
         return States.LARGE_IMAGE_CHECK
 
     # ========================================================================================
@@ -1259,10 +2584,9 @@ class FrontifyChecker:
     # If an image is larger than 20MB, a warning is raised.
     # ========================================================================================
     def large_image_check(self):
-        for image in self.source_folders_parser.get_images_obj_list():
-            if image.get_image_size() > 20:
-                self.results.add_warning(
-                    f"Image '{image.get_image_name()}' {image.get_image_size()}MB is  large (over 20MB). Verify this large of image is needed for the use case.", "IMAGE")
+        for image in self.source_folders_parser.get_image_inventory().get_large_images(20):
+            self.results.add_warning(
+                f"Image '{image.get_image_name()}' {image.get_image_size()}MB is  large (over 20MB). Verify this large of image is needed for the use case.", "IMAGE")
         return States.EMBEDDED_IMAGE_CHECK
 
     # ========================================================================================
@@ -1273,17 +2597,7 @@ class FrontifyChecker:
     # If an image is embedded, an error is raised.
     # ========================================================================================
     def embedded_image_check(self):
-        embedded_image_flag = False
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for link in spread.get_links_obj_list():
-                if link.get_stored_state() == 'Embedded':
-                    embedded_image_flag = True
-                    self.results.add_error(
-                        f"Image {link.get_image_name()} is embedded.", "IMAGE")
-
-        if embedded_image_flag is False:
-            self.results.add_success(
-                f"No images are embedded", "IMAGE")
+        self.report_document_check(States.EMBEDDED_IMAGE_CHECK)
         return States.IMAGE_TRANSFORMATION_CHECK
 
     # ========================================================================================
@@ -1299,67 +2613,29 @@ class FrontifyChecker:
     # transformation, the image affected, and the page where the image is located.
     # ========================================================================================
     def image_transformation_check(self):
-        transformation_detected_flag = False
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for link in spread.get_links_obj_list():
-                item_transform = link.get_item_transform()
-                container_transform = link.get_container_item_transform()
-                file_name = link.get_image_name()
-                page_name = spread.get_page_name()
-                for idx, asset in enumerate([item_transform, container_transform]):
-                    if asset:
-                        a, b, c, d, x, y = map(float, asset.split())
-                        context = "Image inside Container" if idx == 0 else "Image Container"
-                        # Check for rotation
-                        rotation_angle = math.atan2(b, a)
-                        rotation_angle_degrees = math.degrees(rotation_angle)
-                        if abs(rotation_angle_degrees) > 0.01:
-                            transformation_detected_flag = True
-                            self.results.add_error(
-                                f"{context}: '{file_name}' on Page {page_name} has been rotated by {rotation_angle_degrees:.2f} degrees.", "IMAGES", page_name)
-                        elif abs(b) > .01 or abs(c) > .01:
-                            transformation_detected_flag = True
-                            self.results.add_error(
-                                f"{context}: '{file_name}' on Page: {page_name} has skew transformations. Skew factors: b={b}, c={c}", "IMAGES", page_name)
-                        # Check for horizontal flip
-                        if a < 0 and d > 0 and abs(rotation_angle_degrees) != 180:
-                            transformation_detected_flag = True
-                            self.results.add_error(
-                                f"{context}: '{file_name}' on Page: {page_name} has a horizontal flip transformation.", "IMAGES", page_name)
-                        # Check for vertical flip
-                        if a > 0 and d < 0 and abs(rotation_angle_degrees) != 180:
-                            transformation_detected_flag = True
-                            self.results.add_error(
-                                f"{context}: '{file_name}' on Page: {page_name} has a vertical flip transformation.", "IMAGES", page_name)
-
-        if transformation_detected_flag is False:
-            self.results.add_success(
-                f"No images with transformations", "IMAGE")
+        self.report_document_check(States.IMAGE_TRANSFORMATION_CHECK)
         return States.TABLE_CHECK
 
     def table_check(self):
-        for story in self.stories_object_list:
-            for char_style in story.get_character_styles():
-                if char_style.has_table():
-                    page_name = story.get_page()
-                    self.results.add_error(
-                        f"Table was used on Page: {page_name}", "TABLE", page_name)
+        self.report_document_check(States.TABLE_CHECK)
         return States.AUTO_SIZE_TEXT_BOX_CHECK
 
     def auto_size_text_box_check(self):
         # Verify not auto sizing from center
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for text_frame in spread.text_frame_obj_list:
-                if text_frame.is_auto_size:
-                    if text_frame.auto_sizing_reference_point is None:
-                        story = text_frame.parent_story_obj
-                        self.results.add_error(
-                            f"Text Frame auto sizes from center Text: {story.get_story_text_content()}", "AUTOSIZE", story.page)
-                str(text_frame)
+        self.report_document_check(States.AUTO_SIZE_TEXT_BOX_CHECK)
         return States.RESULTS
 
     def results_state(self):
-        gui.display_results()
+        # A CODE ERROR error (e.g. a failed unzip or cleanup) may not happen on the next run
+        transient_failure = self.results.query(severity="error", check="CODE ERROR")
+        if self.package_digest is not None and not self.results_from_cache and not transient_failure:
+            self.result_cache.put(self.package_digest, self.results)
+        if self.finding_sink is not None and self.results_from_cache:
+            # Nothing was streamed, replay the cached report
+            for finding in self.results.findings:
+                self.finding_sink.write_finding(finding, cached=True)
+        if self.on_results is not None:
+            self.on_results()
         return States.EXIT
 
     def idle_state(self):
@@ -1378,17 +2654,35 @@ class FrontifyChecker:
 # to reset the GUI for a new validation process.
 # **********************************************************
 class FrontifyGUI:
+    # How often the Tk main loop picks up events from the checker thread
+    EVENT_POLL_MS = 50
+    # States between the file selection and the results, used for the progress bar
+    PROGRESS_STATES = [state for state in States
+                       if States.UNZIP_PACKAGE.value <= state.value <= States.RESULTS.value]
+    ALL_TYPES = "All types"
+    ALL_PAGES = "All pages"
+
     def __init__(self, checker):
+        import tkinter as tk
+        import queue
         self.checker = checker
+        # The checker runs on self.worker, it reports back through self.events
+        # because Tk widgets may only be touched from the main thread
+        self.worker = None
+        self.events = queue.Queue()
         self.root = tk.Tk()
         self.root.title("Frontify Template Checker")
         self.root.geometry("1000x800")
         self.root.resizable(True, True)
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
         self.initialize_gui()
+        self.root.after(self.EVENT_POLL_MS, self.process_events)
 
     def initialize_gui(self):
+        import tkinter as tk
+        import tkinter.ttk as ttk
         logo = tk.PhotoImage(
-            file="/Users/riverschenck/Documents/Code/Python/Template Checker (GUI)/media/frontify_logo_white_rgb.png")
+            file=os.path.join(MEDIA_FOLDER, "frontify_logo_white_rgb.png"))
         frontify_logo = logo.subsample(5, 5)
         logo_label = tk.Label(self.root, image=frontify_logo)
         logo_label.image = frontify_logo
@@ -1398,55 +2692,211 @@ class FrontifyGUI:
             self.root, text="", font=("Arial", 14), anchor="w")
         self.folder_name_label.pack(pady=2, anchor="w", fill=tk.X, padx=20)
 
+        # Filters hide rendered rows through their tags, see apply_filters
+        filter_frame = tk.Frame(self.root)
+        filter_frame.pack(pady=2, anchor="w", fill=tk.X, padx=20)
+        self.severity_filters = {}
+        for severity in SEVERITIES:
+            self.severity_filters[severity] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(filter_frame, text=f"{severity.capitalize()}s", variable=self.severity_filters[severity],
+                            command=self.apply_filters).pack(side=tk.LEFT, padx=5)
+        self.finding_types = []
+        self.finding_pages = []
+        self.page_tags = {}
+        self.type_filter = ttk.Combobox(
+            filter_frame, state="readonly", values=[self.ALL_TYPES])
+        self.type_filter.set(self.ALL_TYPES)
+        self.type_filter.bind("<<ComboboxSelected>>", self.apply_filters)
+        self.type_filter.pack(side=tk.LEFT, padx=5)
+        self.page_filter = ttk.Combobox(
+            filter_frame, state="readonly", values=[self.ALL_PAGES])
+        self.page_filter.set(self.ALL_PAGES)
+        self.page_filter.bind("<<ComboboxSelected>>", self.apply_filters)
+        self.page_filter.pack(side=tk.LEFT, padx=5)
+
         self.results_display = tk.Text(
             self.root, wrap=tk.WORD, font=("Arial", 14))
         self.results_display.pack(pady=2, padx=20, expand=True, fill=tk.BOTH)
 
+        self.progress_label = tk.Label(
+            self.root, text="", font=("Arial", 12), anchor="w")
+        self.progress_label.pack(pady=2, anchor="w", fill=tk.X, padx=20)
+
+        self.progress_bar = ttk.Progressbar(
+            self.root, mode="determinate", maximum=len(self.PROGRESS_STATES))
+        self.progress_bar.pack(pady=2, padx=20, fill=tk.X)
+
+        button_frame = tk.Frame(self.root)
+        button_frame.pack(pady=20)
+
         self.select_button = ttk.Button(
-            self.root,
+            button_frame,
             text="Select Zip File",
             command=self.select_zip_callback,
             padding=(20, 10)
         )
-        self.select_button.pack(pady=20)
+        self.select_button.pack(side=tk.LEFT, padx=5)
+
+        self.cancel_button = ttk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_callback,
+            padding=(20, 10),
+            state="disabled"
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
 
     def select_zip_callback(self):
+        import threading
+        if self.worker is not None and self.worker.is_alive():
+            return
         if self.select_button.cget("text") == "Select a new zip file":
             self.reset_gui()
 
-        self.checker = FrontifyChecker()
+        # Reuse the caches of the previous checker. Both callbacks run on the
+        # worker thread and only queue an event for the main thread.
+        self.checker = FrontifyChecker(
+            font_cache=self.checker.font_cache, on_results=lambda: self.events.put(("results", None)),
+            result_cache=self.checker.result_cache, model_cache=self.checker.model_cache,
+            on_state=lambda state: self.events.put(("state", state)))
 
         if self.checker.get_zip_state():
             self.folder_name_label.config(
                 text=f"Template Name: {self.checker.source_file_path}")
-            self.folder_name_label.update()
+            self.select_button.config(state="disabled")
+            self.cancel_button.config(state="normal")
 
-            # Update the state after a successful zip file selection
-            self.checker.run_state_machine()
-            self.select_button.config(text="Select a new zip file")
+            # Validate off the main thread so the window stays responsive
+            self.worker = threading.Thread(
+                target=self.run_checker, args=(self.checker,), daemon=True)
+            self.worker.start()
         else:
             # Handle the case where the user didn't select a valid zip file or canceled the dialog
             self.checker.results_state()
 
+    def run_checker(self, checker):
+        error = None
+        try:
+            checker.run_state_machine()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.events.put(("finished", (checker, error)))
+
+    def cancel_callback(self):
+        self.checker.cancel()
+        self.cancel_button.config(state="disabled")
+        self.progress_label.config(text="Cancelling...")
+
+    # ---------------------------------------------------
+    # Function: process_events
+    # Description: Runs on the Tk main loop every EVENT_POLL_MS and applies
+    # what the checker thread reported since the last call.
+    # ---------------------------------------------------
+    def process_events(self):
+        import queue
+        while True:
+            try:
+                event, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event == "state":
+                self.show_progress(value)
+            elif event == "results":
+                self.display_results()
+            elif event == "finished":
+                self.finish_run(*value)
+        self.root.after(self.EVENT_POLL_MS, self.process_events)
+
+    def show_progress(self, state):
+        if state in self.PROGRESS_STATES:
+            step = self.PROGRESS_STATES.index(state)
+            self.progress_bar.config(value=step)
+            self.progress_label.config(
+                text=f"Step {step + 1} of {len(self.PROGRESS_STATES)}: {state.name}")
+
+    def finish_run(self, checker, error):
+        if error is not None:
+            self.progress_label.config(text=f"Validation failed: {error}")
+        elif checker.cancelled:
+            self.progress_label.config(text="Validation cancelled")
+        else:
+            self.progress_bar.config(value=len(self.PROGRESS_STATES))
+            self.progress_label.config(text="Validation finished")
+        self.select_button.config(state="normal", text="Select a new zip file")
+        self.cancel_button.config(state="disabled")
+
     def display_results(self):
+        import tkinter as tk
+        results = self.checker.results
         # Clear the Text widget
         self.results_display.delete(1.0, tk.END)
 
         # Display success, error, and warning results
-        self.checker.results.display_success_results(self.results_display)
-        self.checker.results.display_error_results(self.results_display)
-        self.checker.results.display_warning_results(self.results_display)
+        results.display_results(self.results_display)
+
+        # Offer the types and pages that were rendered as filter choices
+        finding_types = {}
+        finding_pages = {}
+        page_tags = {}
+        for severity, pages, finding_type, message in results.iter_findings():
+            pages = pages or ["general"]
+            finding_types[finding_type] = None
+            finding_pages.update(dict.fromkeys(pages))
+            page_tags[page_tag(pages)] = set(pages)
+        self.set_filter_choices(sorted(finding_types), list(finding_pages), page_tags)
+        self.apply_filters()
+
+    def set_filter_choices(self, finding_types, finding_pages, page_tags=None):
+        self.finding_types = finding_types
+        self.finding_pages = finding_pages
+        # page tag -> the pages of the findings carrying it
+        self.page_tags = page_tags or {}
+        self.type_filter.config(values=[self.ALL_TYPES] + finding_types)
+        self.type_filter.set(self.ALL_TYPES)
+        self.page_filter.config(values=[self.ALL_PAGES] + finding_pages)
+        self.page_filter.set(self.ALL_PAGES)
+
+    # ---------------------------------------------------
+    # Function: apply_filters
+    # Description: Hides findings by setting elide on the severity, type and
+    # page tags. Rows stay in the widget, so no filter change re-renders.
+    # A row is hidden when any of its tags is hidden, "" leaves a tag unset.
+    # ---------------------------------------------------
+    def apply_filters(self, event=None):
+        for severity, variable in self.severity_filters.items():
+            self.results_display.tag_configure(
+                severity, elide="" if variable.get() else True)
+        selected_type = self.type_filter.get()
+        for finding_type in self.finding_types:
+            hidden = selected_type not in (self.ALL_TYPES, finding_type)
+            self.results_display.tag_configure(
+                type_tag(finding_type), elide=True if hidden else "")
+        selected_page = self.page_filter.get()
+        for tag, pages in self.page_tags.items():
+            hidden = selected_page != self.ALL_PAGES and selected_page not in pages
+            self.results_display.tag_configure(
+                tag, elide=True if hidden else "")
 
     def reset_gui(self):
         """Resets the GUI to its initial state."""
+        import tkinter as tk
         self.folder_name_label.config(text="")
+        self.progress_label.config(text="")
+        self.progress_bar.config(value=0)
         self.results_display.delete(1.0, tk.END)
+        self.set_filter_choices([], [])
+
+    def close_window(self):
+        # The worker is a daemon thread, stop it at the next state and quit
+        self.checker.cancel()
+        self.root.destroy()
 
     def run(self):
         self.root.mainloop()
 
 
 if __name__ == "__main__":
-    checker = FrontifyChecker()
+    checker = FrontifyChecker(
+        font_cache=FontMetadataCache(), result_cache=ResultCache(), model_cache=ModelCache())
     gui = FrontifyGUI(checker)
     gui.run()
@@ -0,0 +1,242 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from a cached answer to a very large package
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# **********************************************************
+# Class: Counter
+# Description: A monotonically increasing value per combination of labels.
+# **********************************************************
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=(), lock=None):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.lock = lock or threading.Lock()
+        # label values -> value
+        self.values = {}
+
+    def _label_values(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def inc(self, amount=1, **labels):
+        key = self._label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+                for key, value in values]
+
+    def snapshot(self):
+        with self.lock:
+            return {key: value for key, value in self.values.items()}
+
+    def merge(self, values):
+        with self.lock:
+            for key, value in values.items():
+                self.values[key] = self.values.get(key, 0) + value
+
+
+# **********************************************************
+# Class: Histogram
+# Description: Observations per combination of labels, counted into
+# cumulative buckets with their sum and count, as Prometheus expects.
+# **********************************************************
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DURATION_BUCKETS, lock=None):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.lock = lock or threading.Lock()
+        # label values -> [count per bucket, sum]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self.lock:
+            bucket_counts, total = self.values.get(
+                key, ([0] * len(self.buckets), 0.0))
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    bucket_counts[index] += 1
+                    break
+            self.values[key] = (bucket_counts, total + value)
+
+    def render(self):
+        with self.lock:
+            values = sorted((key, (list(counts), total))
+                            for key, (counts, total) in self.values.items())
+        lines = []
+        for key, (bucket_counts, total) in values:
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = format_labels(self.label_names, key,
+                                       [("le", format_value(upper_bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def snapshot(self):
+        with self.lock:
+            return {key: (list(counts), total) for key, (counts, total) in self.values.items()}
+
+    def merge(self, values):
+        with self.lock:
+            for key, (bucket_counts, total) in values.items():
+                own_counts, own_total = self.values.get(
+                    key, ([0] * len(self.buckets), 0.0))
+                self.values[key] = ([own + other for own, other in zip(own_counts, bucket_counts)],
+                                    own_total + total)
+
+
+# **********************************************************
+# Class: MetricsRegistry
+# Description: Holds the metrics of a process and renders them in the
+# Prometheus text exposition format. snapshot() and merge() carry metrics
+# recorded in a worker process over to the registry of the parent.
+# **********************************************************
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def counter(self, name, help_text, label_names=()):
+        return self._register(Counter(name, help_text, label_names, self.lock))
+
+    def histogram(self, name, help_text, label_names=(), buckets=DURATION_BUCKETS):
+        return self._register(Histogram(name, help_text, label_names, buckets, self.lock))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # ---------------------------------------------------
+    # Function: write_textfile
+    # Description: Writes the metrics for the node_exporter textfile
+    # collector. The file is replaced in one step so a scrape never reads
+    # half of it.
+    # ---------------------------------------------------
+    def write_textfile(self, path):
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.render())
+        os.replace(temporary_path, path)
+
+    def snapshot(self):
+        """Returns the recorded values, picklable so it can leave a worker process."""
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def merge(self, snapshot):
+        for name, values in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+
+# **********************************************************
+# Class: CheckerMetrics
+# Description: The metrics FrontifyChecker records. State durations are
+# taken from the state transitions of run_state_machine, findings from
+# ValidationResult.add_finding, so every add_error, add_warning and
+# add_success is counted once per occurrence. Findings of results served
+# from the result cache are not counted again.
+# **********************************************************
+class CheckerMetrics:
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.packages_validated = self.registry.counter(
+            "template_checker_packages_validated_total",
+            "Packages run through the state machine, by outcome.", ["status"])
+        self.package_duration = self.registry.histogram(
+            "template_checker_package_duration_seconds",
+            "Wall time of a whole package validation.")
+        self.state_duration = self.registry.histogram(
+            "template_checker_state_duration_seconds",
+            "Wall time of each state handler.", ["state"])
+        self.bytes_decompressed = self.registry.counter(
+            "template_checker_decompressed_bytes_total",
+            "Uncompressed bytes of the ZIP members read or extracted.")
+        self.findings = self.registry.counter(
+            "template_checker_findings_total",
+            "Findings reported by the checks, every occurrence counts.", ["check", "severity"])
+        self.cache_lookups = self.registry.counter(
+            "template_checker_cache_lookups_total",
+            "Lookups in the on-disk caches.", ["cache", "result"])
+
+    def render(self):
+        return self.registry.render()
+
+    def write_textfile(self, path):
+        self.registry.write_textfile(path)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood stderr
+
+
+# ---------------------------------------------------
+# Function: start_metrics_server
+# Description: Serves GET /metrics for Prometheus on a daemon thread.
+# Returns: the server, call shutdown() on it to stop.
+# ---------------------------------------------------
+def start_metrics_server(registry, host="127.0.0.1", port=9464):
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever,
+                     name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import posixpath
+import threading
+import zipfile
+
+# macOS adds this folder to ZIPs created from Finder, it is never part of the package
+MACOSX_FOLDER = "__MACOSX"
+
+
+# **********************************************************
+# Class: FolderSource
+# Description: Reads package members from a folder on disk. Paths are regular
+# file system paths, so parsers behave exactly as they did on extracted packages.
+# **********************************************************
+class FolderSource:
+    # Files on disk are read as they are
+    bytes_decompressed = 0
+
+    def join(self, *parts):
+        return os.path.join(*parts)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def isfile(self, path):
+        return os.path.isfile(path)
+
+    def listdir(self, path):
+        if not os.path.isdir(path):
+            return []
+        return os.listdir(path)
+
+    def open(self, path):
+        return open(path, "rb")
+
+    def read(self, path):
+        with open(path, "rb") as file:
+            return file.read()
+
+    def getsize(self, path):
+        return os.path.getsize(path)
+
+    def member_signature(self, path):
+        # Files on disk carry no CRC, callers fall back to parsing them
+        return None
+
+    def close(self):
+        pass
+
+
+# **********************************************************
+# Class: ZipSource
+# Description: Reads package members straight from a ZIP archive without
+# extracting it. Folders are derived from the member names and everything
+# under __MACOSX is skipped.
+# **********************************************************
+class ZipSource:
+    def __init__(self, zip_file):
+        self.zip_file = zip_file
+        # Uncompressed size of every member opened or read, parsers read from threads
+        self.bytes_decompressed = 0
+        self.lock = threading.Lock()
+        self.files = {}
+        self.dirs = {"": {}}
+        self._index_members()
+
+    @classmethod
+    def from_path(cls, zip_path):
+        return cls(zipfile.ZipFile(zip_path, "r"))
+
+    @classmethod
+    def from_member(cls, parent_source, member_path):
+        """Opens a ZIP nested inside another source (e.g. the .idml inside the package)."""
+        return cls(zipfile.ZipFile(io.BytesIO(parent_source.read(member_path)), "r"))
+
+    def _index_members(self):
+        for info in self.zip_file.infolist():
+            name = info.filename.strip("/")
+            if not name or name.split("/")[0] == MACOSX_FOLDER:
+                continue
+            parts = name.split("/")
+            for depth in range(len(parts)):
+                parent = "/".join(parts[:depth])
+                self.dirs.setdefault(parent, {})[parts[depth]] = None
+            if info.is_dir():
+                self.dirs.setdefault(name, {})
+            else:
+                self.files[name] = info
+
+    def _key(self, path):
+        return posixpath.normpath(path).strip("/") if path else ""
+
+    def join(self, *parts):
+        return posixpath.join(*parts)
+
+    def exists(self, path):
+        key = self._key(path)
+        return key in self.files or key in self.dirs
+
+    def isfile(self, path):
+        return self._key(path) in self.files
+
+    def listdir(self, path):
+        return list(self.dirs.get(self._key(path), {}))
+
+    def walk_files(self, path=""):
+        """Yields the member names of all files below the given folder."""
+        prefix = self._key(path)
+        prefix = prefix + "/" if prefix else ""
+        for name in self.files:
+            if name.startswith(prefix):
+                yield name
+
+    def _member(self, path):
+        info = self.files[self._key(path)]
+        with self.lock:
+            self.bytes_decompressed += info.file_size
+        return info
+
+    def open(self, path):
+        return self.zip_file.open(self._member(path))
+
+    def read(self, path):
+        return self.zip_file.read(self._member(path))
+
+    def getsize(self, path):
+        return self.files[self._key(path)].file_size
+
+    def member_signature(self, path):
+        """Returns (CRC-32, size) of the member from the central directory."""
+        info = self.files[self._key(path)]
+        return info.CRC, info.file_size
+
+    def close(self):
+        self.zip_file.close()
+
+
+# ---------------------------------------------------
+# Function: central_directory_digest
+# Description: SHA-256 over the name, CRC-32 and size of every member, read
+# from the ZIP central directory only. Byte-identical packages get the same
+# digest without hashing the (possibly huge) member data.
+# ---------------------------------------------------
+def central_directory_digest(zip_path, salt=""):
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    with zipfile.ZipFile(zip_path, "r") as zip_file:
+        for info in sorted(zip_file.infolist(), key=lambda info: info.filename):
+            digest.update(
+                f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\n".encode("utf-8"))
+    return digest.hexdigest()
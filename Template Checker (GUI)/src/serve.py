@@ -0,0 +1,300 @@
+"""Local HTTP validation service.
+
+POST a package ZIP as the request body and receive the findings as JSON:
+
+    python serve.py [--port 8765] [--workers 4] [--queue 8]
+    curl --data-binary @package.zip http://127.0.0.1:8765/validate
+
+Packages are validated on a bounded pool of worker processes, each upload in
+its own scratch folder. When every worker is busy and the queue is full the
+service answers 429 with a Retry-After header instead of accepting more work.
+
+Responses: 200 the package was checked (see "status"), 400 not a ZIP or a
+malformed Content-Length, 411/413 missing or too large body, 429 busy, 500
+the checker crashed or its worker process died. A dead worker breaks the
+whole process pool, the service replaces it so later requests are served.
+GET /health reports the pool capacity and the requests in flight, GET
+/metrics the validation metrics in the Prometheus text format.
+
+Uploads are untrusted, so the result and parsed-model caches are off by
+default. Both are keyed by the CRCs and sizes in the ZIP central directory,
+which are never verified against the data before a lookup. A crafted upload
+could be answered with the cached findings, story text included, of another
+upload. Enable them with --result-cache and --model-cache only when every
+client is trusted. The font cache is keyed by a hash of the font data and
+stays on.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import batch
+from batch import STATUS_CRASHED
+from metrics import CONTENT_TYPE, CheckerMetrics
+from watch import preload_parsers
+
+UPLOAD_CHUNK_SIZE = 1024 ** 2
+
+
+def init_service_worker(use_font_cache, use_result_cache, use_model_cache):
+    batch.init_worker(use_font_cache, use_result_cache, use_model_cache)
+    preload_parsers()
+
+
+# **********************************************************
+# Class: ValidationService
+# Description: Owns the worker pool and admission control. At most
+# workers + queue_size packages are accepted at a time, everything above
+# that is rejected right away so latency stays bounded under load.
+# **********************************************************
+class ValidationService:
+    def __init__(self, workers=None, queue_size=None, max_upload_bytes=1024 ** 3, in_place=True, streaming=False,
+                 use_font_cache=True, use_result_cache=False, use_model_cache=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = self.workers if queue_size is None else queue_size
+        self.capacity = self.workers + self.queue_size
+        self.max_upload_bytes = max_upload_bytes
+        self.in_place = in_place
+        self.streaming = streaming
+        self.slots = threading.BoundedSemaphore(self.capacity)
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        # Workers record the metrics of each package, merged here by validate
+        self.metrics = CheckerMetrics()
+        self.requests_rejected = self.metrics.registry.counter(
+            "template_checker_requests_rejected_total",
+            "Validation requests answered with 429 because every worker was busy.")
+        self.worker_options = (use_font_cache, use_result_cache, use_model_cache)
+        self.executor = self.create_executor()
+
+    def create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_service_worker,
+                                   initargs=self.worker_options)
+
+    # ---------------------------------------------------
+    # Function: replace_broken_executor
+    # Description: A worker that died takes the whole pool down, every later
+    # submit would fail. The first request to see the broken pool replaces
+    # it, the others find it already replaced.
+    # ---------------------------------------------------
+    def replace_broken_executor(self, executor):
+        with self.lock:
+            if self.executor is not executor:
+                return
+            self.executor = self.create_executor()
+        executor.shutdown(wait=False)
+
+    # ---------------------------------------------------
+    # Function: warm_up
+    # Description: Starts every worker process before the first request so
+    # no request pays for process start and imports.
+    # ---------------------------------------------------
+    def warm_up(self):
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def try_acquire(self):
+        if not self.slots.acquire(blocking=False):
+            self.requests_rejected.inc()
+            return False
+        with self.lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def validate(self, package_path):
+        """Blocks until a worker process checked the package, returns its report entry."""
+        start = time.perf_counter()
+        executor = self.executor
+        try:
+            # One parse thread per package, the pool already runs packages in parallel
+            entry = executor.submit(batch.validate_package, package_path,
+                                    self.in_place, self.streaming, 1, True).result()
+        except BrokenProcessPool as e:
+            # The worker was killed (out of memory, native crash), its metrics are lost
+            self.replace_broken_executor(executor)
+            self.metrics.packages_validated.inc(status=STATUS_CRASHED)
+            return {
+                "package": package_path,
+                "status": STATUS_CRASHED,
+                "seconds": round(time.perf_counter() - start, 3),
+                "error": f"Worker process died: {e}",
+            }
+        self.metrics.registry.merge(entry.pop("metrics"))
+        return entry
+
+    def health(self):
+        with self.lock:
+            in_flight = self.in_flight
+        return {"workers": self.workers, "capacity": self.capacity, "in_flight": in_flight}
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+# **********************************************************
+# Class: ValidationRequestHandler
+# Description: Maps HTTP requests onto the ValidationService of the server.
+# **********************************************************
+class ValidationRequestHandler(BaseHTTPRequestHandler):
+    server_version = "TemplateChecker/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, payload, headers=()):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message, headers=()):
+        # The request body may not have been read, the connection can't be reused
+        self.close_connection = True
+        self.send_json(status, {"error": message},
+                       [("Connection", "close"), *headers])
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, self.server.service.health())
+        elif self.path == "/metrics":
+            body = self.server.service.metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error_json(404, f"Unknown path: {self.path}")
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path != "/validate":
+            self.send_error_json(404, f"Unknown path: {self.path}")
+            return
+        content_length = self.headers.get("Content-Length")
+        if content_length is None:
+            self.send_error_json(411, "Content-Length is required")
+            return
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.send_error_json(400, "Content-Length must be a number of bytes")
+            return
+        if content_length > service.max_upload_bytes:
+            self.send_error_json(
+                413, f"Package is larger than {service.max_upload_bytes} bytes")
+            return
+        # Reject before reading the upload, that is the expensive part for the client
+        if not service.try_acquire():
+            self.send_error_json(
+                429, "All workers are busy, try again later", [("Retry-After", "1")])
+            return
+
+        upload_dir = tempfile.mkdtemp(prefix="template-checker-upload-")
+        try:
+            package_path = os.path.join(upload_dir, "package.zip")
+            self.receive_upload(package_path, content_length)
+            if not zipfile.is_zipfile(package_path):
+                self.send_error_json(400, "The request body is not a ZIP file")
+                return
+            entry = service.validate(package_path)
+        except ConnectionError:
+            self.close_connection = True
+            return
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            service.release()
+
+        # The temporary upload path means nothing to the client
+        del entry["package"]
+        self.send_json(500 if entry["status"] == STATUS_CRASHED else 200, entry)
+
+    def receive_upload(self, package_path, content_length):
+        remaining = content_length
+        with open(package_path, "wb") as package_file:
+            while remaining:
+                chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ConnectionError("Upload ended early")
+                package_file.write(chunk)
+                remaining -= len(chunk)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(
+            f"{self.address_string()} - {format % args}\n")
+
+
+class ValidationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, service):
+        self.service = service
+        super().__init__(server_address, ValidationRequestHandler)
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Serve Frontify template package validation over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on (default: 127.0.0.1, local clients only)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="Port to listen on (default: 8765)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=None,
+                        help="Requests that may wait for a worker before 429 is returned (default: workers)")
+    parser.add_argument("--max-upload-mb", type=int, default=1024,
+                        help="Largest accepted package in MB (default: 1024)")
+    parser.add_argument("--extract", action="store_true",
+                        help="Extract packages to a scratch folder instead of reading them in place")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Read story files with iterparse to bound memory use")
+    parser.add_argument("--no-font-cache", action="store_true",
+                        help="Do not use the on-disk font metadata cache")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="Answer packages validated before from the result cache, only for trusted clients")
+    parser.add_argument("--model-cache", action="store_true",
+                        help="Reuse parsed IDML members unchanged since an earlier run, only for trusted clients")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    service = ValidationService(workers=args.workers, queue_size=args.queue,
+                                max_upload_bytes=args.max_upload_mb * 1024 ** 2, in_place=not args.extract,
+                                streaming=args.streaming, use_font_cache=not args.no_font_cache,
+                                use_result_cache=args.result_cache, use_model_cache=args.model_cache)
+    service.warm_up()
+    server = ValidationServer((args.host, args.port), service)
+    print(f"Serving on http://{args.host}:{server.server_port} with {service.workers} workers",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
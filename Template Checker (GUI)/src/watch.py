@@ -0,0 +1,297 @@
+"""Watch-folder daemon that validates packages as they are dropped in.
+
+Polls a hand-off folder for new or updated package ZIPs, waits until each one
+is fully written and validates it with FrontifyChecker. The findings are
+written next to the package as <name>.results.json:
+
+    python watch.py path/to/hand-off [--settle 2] [--poll 1] [--recursive]
+
+The process stays up between packages, so imports, parsers and the on-disk
+caches are already warm when the next package arrives. Stop it with Ctrl+C.
+--metrics-file rewrites a Prometheus text format file after every package,
+--metrics-port serves the same metrics on http://127.0.0.1:PORT/metrics.
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from batch import STATUS_CRASHED, STATUS_FAILED, STATUS_PASSED
+from cli import open_cache, run_checker
+from main import FontMetadataCache, ModelCache, ResultCache
+from metrics import CheckerMetrics, start_metrics_server
+
+RESULTS_SUFFIX = ".results.json"
+
+
+# ---------------------------------------------------
+# Function: results_path
+# Description: Returns the path of the results file written for a package.
+# ---------------------------------------------------
+def results_path(package_path):
+    return os.path.splitext(package_path)[0] + RESULTS_SUFFIX
+
+
+# ---------------------------------------------------
+# Function: preload_parsers
+# Description: Imports the modules the checker otherwise imports on first
+# use, so the first package does not pay for them.
+# ---------------------------------------------------
+def preload_parsers():
+    from lxml import etree  # noqa: F401
+    from fontTools import ttLib  # noqa: F401
+
+
+# **********************************************************
+# Class: PackageWatcher
+# Description: Finds package ZIPs in a folder that are ready to validate and
+# validates them one after the other on a worker thread. A package is ready
+# once its size and modification time did not change for settle_seconds,
+# which covers both slow copies and files renamed into the folder. A package
+# is validated again when it is replaced or updated.
+# **********************************************************
+class PackageWatcher:
+    def __init__(self, folder, settle_seconds=2.0, poll_seconds=1.0, recursive=False, in_place=True, streaming=False,
+                 workers=None, font_cache=None, result_cache=None, model_cache=None, on_validated=None, metrics=None):
+        self.folder = folder
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.recursive = recursive
+        self.in_place = in_place
+        self.streaming = streaming
+        self.workers = workers
+        self.font_cache = font_cache
+        self.result_cache = result_cache
+        self.model_cache = model_cache
+        # Optional CheckerMetrics, accumulated over every package validated
+        self.metrics = metrics
+        # Called with the results entry of every validated package
+        self.on_validated = on_validated
+        # path -> ((size, mtime_ns), time the signature was first seen)
+        self.candidates = {}
+        # path -> signature of the file the last results were written for
+        self.validated = {}
+        self.queued = set()
+        self.jobs = queue.Queue()
+        self.stop_event = threading.Event()
+
+    def find_packages(self):
+        package_paths = []
+        for dir_path, dir_names, file_names in os.walk(self.folder):
+            if not self.recursive:
+                dir_names.clear()
+            # Hidden and temporary names are used by copy tools while writing
+            package_paths.extend(os.path.join(dir_path, file_name) for file_name in file_names
+                                 if file_name.endswith(".zip") and not file_name.startswith("."))
+        return package_paths
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _has_current_results(self, path, signature):
+        # Results written by an earlier run of the watcher for this very file
+        try:
+            return os.stat(results_path(path)).st_mtime_ns >= signature[1]
+        except OSError:
+            return False
+
+    # ---------------------------------------------------
+    # Function: scan
+    # Description: Stats every package once and queues the ones whose
+    # signature has been stable for settle_seconds and differs from the
+    # signature they were last validated with.
+    # Returns: the paths queued by this scan.
+    # ---------------------------------------------------
+    def scan(self):
+        now = time.monotonic()
+        ready_paths = []
+        seen_paths = set()
+        for path in self.find_packages():
+            try:
+                signature = self._signature(path)
+            except OSError:
+                continue  # removed or renamed since find_packages
+            seen_paths.add(path)
+            candidate = self.candidates.get(path)
+            if candidate is None or candidate[0] != signature:
+                self.candidates[path] = (signature, now)
+                continue
+            if now - candidate[1] < self.settle_seconds or path in self.queued:
+                continue
+            if self.validated.get(path) == signature:
+                continue
+            if path not in self.validated and self._has_current_results(path, signature):
+                self.validated[path] = signature
+                continue
+            self.queued.add(path)
+            self.jobs.put((path, signature))
+            ready_paths.append(path)
+
+        # Forget packages that were removed from the folder
+        for path in list(self.candidates):
+            if path not in seen_paths:
+                del self.candidates[path]
+                self.validated.pop(path, None)
+        return ready_paths
+
+    # ---------------------------------------------------
+    # Function: validate
+    # Description: Runs the checker on one package with a private scratch
+    # folder and writes the results file next to it.
+    # Returns: the results entry, in the format of batch.py report entries.
+    # ---------------------------------------------------
+    def validate(self, package_path):
+        scratch_dir = tempfile.mkdtemp(prefix="template-checker-")
+        start = time.perf_counter()
+        try:
+            checker = run_checker(package_path, in_place=self.in_place, streaming=self.streaming, workers=self.workers,
+                                  font_cache=self.font_cache, scratch_dir=scratch_dir, result_cache=self.result_cache,
+                                  model_cache=self.model_cache, metrics=self.metrics)
+            results = checker.results
+            entry = {
+                "package": package_path,
+                "status": STATUS_FAILED if results.has_errors() else STATUS_PASSED,
+                "seconds": round(time.perf_counter() - start, 3),
+                "cached": checker.results_from_cache,
+                "results": results.to_dict(),
+            }
+        except Exception as e:
+            entry = {
+                "package": package_path,
+                "status": STATUS_CRASHED,
+                "seconds": round(time.perf_counter() - start, 3),
+                "error": f"{type(e).__name__}: {e}",
+            }
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+        self.write_results(package_path, entry)
+        return entry
+
+    def write_results(self, package_path, entry):
+        # Write to a temporary file first so readers never see half a report
+        output_path = results_path(package_path)
+        temporary_path = output_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as results_file:
+            json.dump(entry, results_file, indent=2, ensure_ascii=False)
+        os.replace(temporary_path, output_path)
+
+    def _work(self):
+        while not self.stop_event.is_set():
+            try:
+                path, signature = self.jobs.get(timeout=self.poll_seconds)
+            except queue.Empty:
+                continue
+            try:
+                entry = self.validate(path)
+                self.validated[path] = signature
+                if self.on_validated is not None:
+                    self.on_validated(entry)
+            except OSError as e:
+                print(f"Could not write results for {path}: {e}", file=sys.stderr)
+            finally:
+                self.queued.discard(path)
+                self.jobs.task_done()
+
+    # ---------------------------------------------------
+    # Function: run
+    # Description: Scans the folder every poll_seconds until stop() is called.
+    # Packages are validated on a worker thread so scanning never waits for
+    # a long validation.
+    # ---------------------------------------------------
+    def run(self):
+        worker = threading.Thread(
+            target=self._work, name="package-validator", daemon=True)
+        worker.start()
+        try:
+            while not self.stop_event.is_set():
+                self.scan()
+                self.stop_event.wait(self.poll_seconds)
+        finally:
+            self.stop_event.set()
+            worker.join()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Validate Frontify template packages as they are dropped into a folder.")
+    parser.add_argument("folder", help="Hand-off folder to watch")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Seconds a package must stay unchanged before it is validated (default: 2)")
+    parser.add_argument("--poll", type=float, default=1.0,
+                        help="Seconds between folder scans (default: 1)")
+    parser.add_argument("--recursive", action="store_true",
+                        help="Also watch the folders inside the hand-off folder")
+    parser.add_argument("--extract", action="store_true",
+                        help="Extract packages to a scratch folder instead of reading them in place")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Read story files with iterparse to bound memory use")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads used to parse IDML parts (default: CPU count)")
+    parser.add_argument("--no-font-cache", action="store_true",
+                        help="Do not use the on-disk font metadata cache")
+    parser.add_argument("--no-result-cache", action="store_true",
+                        help="Always run the checks, even for packages validated before")
+    parser.add_argument("--no-model-cache", action="store_true",
+                        help="Parse every IDML member, even members unchanged since an earlier run")
+    parser.add_argument("--metrics-file", metavar="FILE", default=None,
+                        help="Rewrite Prometheus text format metrics to FILE after every package")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this local port at /metrics")
+    return parser
+
+
+def print_validated(entry):
+    print(f"[{entry['status'].upper()}] {entry['package']} ({entry['seconds']}s)",
+          file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"Not a folder: {args.folder}", file=sys.stderr)
+        return 2
+
+    preload_parsers()
+    font_cache = None if args.no_font_cache else open_cache(FontMetadataCache)
+    result_cache = None if args.no_result_cache else open_cache(ResultCache)
+    model_cache = None if args.no_model_cache else open_cache(ModelCache)
+    metrics = CheckerMetrics() if args.metrics_file or args.metrics_port is not None else None
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = start_metrics_server(metrics.registry, port=args.metrics_port)
+
+    def on_validated(entry):
+        print_validated(entry)
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+
+    watcher = PackageWatcher(args.folder, settle_seconds=args.settle, poll_seconds=args.poll, recursive=args.recursive,
+                             in_place=not args.extract, streaming=args.streaming, workers=args.workers,
+                             font_cache=font_cache, result_cache=result_cache, model_cache=model_cache,
+                             on_validated=on_validated, metrics=metrics)
+    print(f"Watching {os.path.abspath(args.folder)}", file=sys.stderr)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    finally:
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        for cache in (font_cache, result_cache, model_cache):
+            if cache is not None:
+                cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
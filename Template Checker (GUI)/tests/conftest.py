@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+TESTS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_FOLDER, "..", "src"))
+sys.path.insert(0, os.path.join(TESTS_FOLDER, "..", "benchmarks"))
+
+from idml_generator import build_package  # noqa: E402
+
+PACKAGE_NAME = "Fixture"
+IDML_MEMBER = f"{PACKAGE_NAME}/{PACKAGE_NAME}.idml"
+
+
+def report(checker):
+    """The JSON report of a run, what cli.py --json prints."""
+    return json.dumps(checker.results.to_dict(), sort_keys=True)
+
+
+def build_clean_package(package_path, master_spreads=True):
+    """A one page package without stories or images that passes every check."""
+    idml_file = io.BytesIO()
+    with zipfile.ZipFile(idml_file, "w") as idml:
+        idml.writestr("mimetype", "application/vnd.adobe.indesign-idml-package")
+        idml.writestr("designmap.xml", '<Document><Spread src="Spreads/Spread_s1.xml"/></Document>')
+        idml.writestr("Resources/Fonts.xml", "<Fonts/>")
+        idml.writestr("Resources/Styles.xml", "<Styles><RootParagraphStyleGroup/></Styles>")
+        if master_spreads:
+            idml.writestr("MasterSpreads/MasterSpread_m.xml",
+                          '<Root><MasterSpread Self="m"><Properties/><Page Self="mp"/></MasterSpread></Root>')
+        idml.writestr("Spreads/Spread_s1.xml", '<Root><Spread Self="s1"><Page Self="p1" Name="1"/></Spread></Root>')
+    with zipfile.ZipFile(package_path, "w") as package:
+        package.writestr("Clean/Clean.idml", idml_file.getvalue())
+        package.writestr("Clean/Links/", b"")
+        package.writestr("Clean/Document Fonts/AdobeFnt.lst", b"")
+    return str(package_path)
+
+
+def edit_idml_member(package_path, edited_path, member, edit):
+    """Copies a package with edit(bytes) -> bytes applied to one member of its IDML."""
+    with zipfile.ZipFile(package_path) as package, zipfile.ZipFile(edited_path, "w") as edited:
+        for info in package.infolist():
+            data = package.read(info)
+            if info.filename == IDML_MEMBER:
+                idml_file = io.BytesIO()
+                with zipfile.ZipFile(io.BytesIO(data)) as idml, zipfile.ZipFile(idml_file, "w") as edited_idml:
+                    for idml_info in idml.infolist():
+                        idml_data = idml.read(idml_info)
+                        if idml_info.filename == member:
+                            idml_data = edit(idml_data)
+                        edited_idml.writestr(idml_info, idml_data)
+                data = idml_file.getvalue()
+            edited.writestr(info, data)
+    return str(edited_path)
+
+
+@pytest.fixture(autouse=True)
+def user_cache_folder(tmp_path_factory, monkeypatch):
+    """Caches opened with their default path go to a temporary folder, never the user's."""
+    cache_folder = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_folder))
+    return cache_folder
+
+
+@pytest.fixture(scope="session")
+def package_path(tmp_path_factory):
+    """A small package with something for every check to find."""
+    path = tmp_path_factory.mktemp("packages") / "package.zip"
+    build_package(str(path), PACKAGE_NAME, pages=6, stories=12, links=6, embedded_images=2)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def facing_package_path(tmp_path_factory):
+    """The same package laid out on spreads of two facing pages."""
+    path = tmp_path_factory.mktemp("packages") / "facing.zip"
+    build_package(str(path), PACKAGE_NAME, pages=6, pages_per_spread=2, stories=12,
+                  links=6, embedded_images=2)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def expected_report(package_path):
+    """Report of a tree parse in place without caches, every other way of reading is compared with it."""
+    from cli import run_checker
+    return report(run_checker(package_path))
+
+
+@pytest.fixture(scope="session")
+def expected_facing_report(facing_package_path):
+    from cli import run_checker
+    return report(run_checker(facing_package_path))
@@ -0,0 +1,81 @@
+"""Batch validation across a process pool."""
+import json
+import multiprocessing
+import os
+import shutil
+
+import pytest
+
+import batch
+from conftest import build_clean_package
+from metrics import CheckerMetrics
+
+# Workers must inherit the patched run_checker of the crash test
+requires_fork = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                   reason="workers do not inherit test patches without fork")
+
+
+@pytest.fixture
+def packages(package_path, tmp_path):
+    folder = tmp_path / "packages"
+    folder.mkdir()
+    shutil.copy(package_path, folder / "b_failing.zip")
+    build_clean_package(folder / "a_clean.zip")
+    (folder / "notes.txt").write_text("not a package")
+    return folder
+
+
+def test_collect_packages(packages, tmp_path):
+    expected = [str(packages / "a_clean.zip"), str(packages / "b_failing.zip")]
+    assert batch.collect_packages([str(packages)]) == expected
+    assert batch.collect_packages([str(packages / "*.zip"), str(packages)]) == expected
+    assert batch.collect_packages([str(tmp_path / "missing")]) == []
+
+
+def test_report_combines_every_package(packages):
+    package_paths = batch.collect_packages([str(packages)])
+    metrics = CheckerMetrics()
+    report = batch.run_batch(package_paths, workers=2, use_font_cache=False, use_result_cache=False,
+                             use_model_cache=False, metrics=metrics)
+    assert [entry["package"] for entry in report["packages"]] == package_paths
+    assert [entry["status"] for entry in report["packages"]] == [batch.STATUS_PASSED, batch.STATUS_FAILED]
+    assert report["packages"][1]["results"]["errors"]
+    assert report["summary"]["packages"] == 2 and report["summary"][batch.STATUS_CRASHED] == 0
+    # Metrics of the workers are merged into the parent's registry
+    assert 'template_checker_packages_validated_total{status="failed"} 1' in metrics.render()
+
+
+def crash_on_marked_packages(run_checker):
+    def run_or_crash(package_path, **kwargs):
+        if "crash" in os.path.basename(package_path):
+            os._exit(1)
+        return run_checker(package_path, **kwargs)
+    return run_or_crash
+
+
+@requires_fork
+def test_dead_worker_only_costs_its_package(packages, monkeypatch):
+    shutil.copy(packages / "a_clean.zip", packages / "c_crash.zip")
+    for index in range(3):
+        shutil.copy(packages / "a_clean.zip", packages / f"d_clean_{index}.zip")
+    monkeypatch.setattr(batch, "run_checker", crash_on_marked_packages(batch.run_checker))
+    package_paths = batch.collect_packages([str(packages)])
+    metrics = CheckerMetrics()
+
+    report = batch.run_batch(package_paths, workers=2, use_font_cache=False, use_result_cache=False,
+                             use_model_cache=False, metrics=metrics)
+    statuses = {os.path.basename(entry["package"]): entry["status"] for entry in report["packages"]}
+    assert statuses == {"a_clean.zip": batch.STATUS_PASSED, "b_failing.zip": batch.STATUS_FAILED,
+                        "c_crash.zip": batch.STATUS_CRASHED, "d_clean_0.zip": batch.STATUS_PASSED,
+                        "d_clean_1.zip": batch.STATUS_PASSED, "d_clean_2.zip": batch.STATUS_PASSED}
+    assert report["summary"][batch.STATUS_CRASHED] == 1
+    assert 'template_checker_packages_validated_total{status="crashed"} 1' in metrics.render()
+
+
+def test_main_writes_the_report(packages, tmp_path):
+    report_path = tmp_path / "report.json"
+    exit_code = batch.main([str(packages), "--workers", "1", "--report", str(report_path),
+                            "--no-font-cache", "--no-result-cache", "--no-model-cache"])
+    assert exit_code == 1
+    assert json.loads(report_path.read_text())["summary"]["packages"] == 2
+    assert batch.main([str(tmp_path / "empty")]) == 2
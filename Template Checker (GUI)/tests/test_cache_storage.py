@@ -0,0 +1,106 @@
+"""SqliteLRUCache and the font metadata cache built on it."""
+import itertools
+
+import pytest
+
+import cache_storage
+from cache_storage import SqliteLRUCache, user_cache_dir
+from idml_generator import build_font
+from main import FontInspector, FontMetadataCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A clock that ticks on every call, so last_used never ties."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache_storage.time, "time", lambda: float(next(ticks)))
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    store = SqliteLRUCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    yield store
+    store.close()
+
+
+def test_get_counts_hits_and_misses(cache):
+    cache.put("a", b"123")
+    assert cache.get("a") == b"123"
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted_by_size(cache):
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+    # 12 bytes are over the limit of 10, b was used longest ago
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == b"1234"
+    assert len(cache) == 2
+
+
+def test_replaced_value_counts_once(cache):
+    for _ in range(5):
+        cache.put("a", b"12345")
+    assert len(cache) == 1 and cache.get("a") == b"12345"
+
+
+def test_value_above_the_limit_is_not_kept(cache):
+    cache.put("big", b"x" * 11)
+    assert len(cache) == 0
+
+
+def test_touch_many_marks_entries_as_used(cache):
+    cache.put_many([("a", b"1234"), ("b", b"1234")])
+    cache.get("a", touch=False)
+    cache.touch_many(["a"])
+    cache.put("c", b"1234")
+    assert cache.get("a") is not None and cache.get("b") is None
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = SqliteLRUCache(path, max_bytes=100)
+    store.put("a", b"value")
+    store.close()
+    store = SqliteLRUCache(path, max_bytes=100)
+    try:
+        assert store.get("a") == b"value"
+        store.clear()
+        assert len(store) == 0
+    finally:
+        store.close()
+
+
+def test_user_cache_dir_follows_xdg(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_storage.sys, "platform", "linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert user_cache_dir() == str(tmp_path / "Template Checker")
+    assert (tmp_path / "Template Checker").is_dir()
+
+
+def test_font_metadata_round_trip(tmp_path):
+    font_data = build_font("Brand Sans")
+    font_cache = FontMetadataCache(str(tmp_path / "fonts.sqlite3"))
+    try:
+        assert font_cache.get(font_data) is None
+        font_cache.put(font_data, FontInspector().inspect(font_data))
+        (font,) = font_cache.get(font_data)
+        assert (font.name, font.style, font.variable_font) == ("Brand Sans", "Regular", False)
+        assert font_cache.get(build_font("Brand Serif")) is None
+    finally:
+        font_cache.close()
+
+
+def test_font_metadata_cache_is_bounded_by_size(tmp_path):
+    font_cache = FontMetadataCache(str(tmp_path / "fonts.sqlite3"), max_bytes=200)
+    try:
+        fonts = [build_font(f"Brand {index}") for index in range(5)]
+        for font_data in fonts:
+            font_cache.put(font_data, FontInspector().inspect(font_data))
+        assert 0 < len(font_cache.store) < len(fonts)
+        assert font_cache.get(fonts[-1]) is not None
+    finally:
+        font_cache.close()
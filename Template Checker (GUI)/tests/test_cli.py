@@ -0,0 +1,79 @@
+"""Exit codes and output of the headless command line."""
+import json
+
+import pytest
+
+import cli
+from conftest import build_clean_package, edit_idml_member
+
+
+def run_cli(capsys, *argv):
+    exit_code = cli.main([*argv, "--no-font-cache", "--no-result-cache", "--no-model-cache"])
+    return exit_code, capsys.readouterr()
+
+
+def test_clean_package_passes(tmp_path, capsys):
+    exit_code, output = run_cli(capsys, build_clean_package(tmp_path / "clean.zip"))
+    assert exit_code == cli.EXIT_PASSED
+    assert "[SUCCESS]" in output.out
+
+
+def test_missing_master_spreads_is_only_a_warning(tmp_path, capsys):
+    package_path = build_clean_package(tmp_path / "clean.zip", master_spreads=False)
+    exit_code, output = run_cli(capsys, package_path)
+    assert exit_code == cli.EXIT_PASSED
+    assert "MasterSpreads directory does not exist" in output.out
+
+
+def test_errors_found(package_path, capsys):
+    exit_code, output = run_cli(capsys, package_path, "--json")
+    assert exit_code == cli.EXIT_FAILED
+    assert json.loads(output.out)["errors"]
+
+
+def test_not_a_zip(tmp_path, capsys):
+    text_path = tmp_path / "package.txt"
+    text_path.write_text("not a package")
+    exit_code, output = run_cli(capsys, str(text_path))
+    assert exit_code == cli.EXIT_USAGE
+    assert "Not a ZIP file" in output.err
+
+
+def test_unreadable_zip(tmp_path, capsys):
+    zip_path = tmp_path / "broken.zip"
+    zip_path.write_bytes(b"PK but not really")
+    exit_code, output = run_cli(capsys, str(zip_path))
+    assert exit_code == cli.EXIT_USAGE
+    assert "[CODE ERROR]" in output.out
+
+
+def test_unreadable_idml(package_path, tmp_path, capsys):
+    edited_path = edit_idml_member(package_path, tmp_path / "bad_xml.zip",
+                                   "Resources/Styles.xml", lambda data: data[:len(data) // 2])
+    exit_code, _ = run_cli(capsys, edited_path)
+    assert exit_code == cli.EXIT_USAGE
+
+
+def test_checker_failure(package_path, capsys, monkeypatch):
+    def fail(*args, **kwargs):
+        raise MemoryError("out of memory")
+
+    monkeypatch.setattr(cli, "run_checker", fail)
+    exit_code, output = run_cli(capsys, package_path)
+    assert exit_code == cli.EXIT_USAGE
+    assert "MemoryError: out of memory" in output.err
+
+
+@pytest.mark.parametrize("flags", [[], ["--streaming"], ["--extract"]])
+def test_json_output_is_the_same_for_every_reading_mode(package_path, expected_report, capsys, flags, tmp_path,
+                                                       monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _, output = run_cli(capsys, package_path, "--json", *flags)
+    assert json.dumps(json.loads(output.out), sort_keys=True) == expected_report
+
+
+def test_default_caches_stay_in_the_cache_folder(package_path, user_cache_folder, capsys):
+    assert cli.main([package_path]) == cli.EXIT_FAILED
+    assert cli.main([package_path]) == cli.EXIT_FAILED
+    assert sorted(path.name for path in (user_cache_folder / "Template Checker").glob("*.sqlite3")) == \
+        ["font_metadata.sqlite3", "parsed_models.sqlite3", "results.sqlite3"]
@@ -0,0 +1,107 @@
+"""Aggregation of findings in ValidationResult and its page index."""
+import pytest
+
+from cli import run_checker
+from error_handling import GENERAL_PAGE, MAX_SAMPLE_LOCATIONS, ValidationResult, page_tag
+
+
+def add_override(results, page, location):
+    results.add_warning(f"Override found {location} ", "OVERRIDE", page=page,
+                        location=location, subject="Override of PointSize found")
+
+
+def test_single_occurrence_keeps_its_wording():
+    results = ValidationResult()
+    add_override(results, "1", "in text: 'a' on Page: 1")
+    results.add_error("Table was used on Page: 2", "TABLE", page="2")
+
+    texts = [finding.get_text() for finding in results.query()]
+    assert texts == ["[TABLE]: Table was used on Page: 2",
+                     "[OVERRIDE]: Override found in text: 'a' on Page: 1 "]
+
+
+def test_repeats_on_a_page_are_aggregated():
+    results = ValidationResult()
+    add_override(results, "1", "in text: 'a' on Page: 1")
+    add_override(results, "1", "in text: 'b' on Page: 1")
+
+    (finding,) = results.query()
+    assert finding.count == 2
+    assert finding.get_text() == ("[OVERRIDE]: Override of PointSize found (2 occurrences): "
+                                  "in text: 'a' on Page: 1; in text: 'b' on Page: 1")
+
+
+def test_dropped_locations_are_marked():
+    results = ValidationResult()
+    for index in range(MAX_SAMPLE_LOCATIONS):
+        add_override(results, "1", f"in text: '{index}' on Page: 1")
+    (finding,) = results.query()
+    assert not finding.get_text().endswith("; ...")
+
+    add_override(results, "1", "in text: 'one more' on Page: 1")
+    assert finding.count == MAX_SAMPLE_LOCATIONS + 1
+    assert finding.get_text().endswith("; ...")
+
+
+def test_findings_on_other_pages_stay_apart():
+    results = ValidationResult()
+    add_override(results, "1", "in text: 'a' on Page: 1")
+    add_override(results, "2", "in text: 'a' on Page: 2")
+
+    assert [finding.pages for finding in results.query()] == [["1"], ["2"]]
+    assert len(results.query(page="1")) == len(results.query(page="2")) == 1
+
+
+def test_shared_finding_is_indexed_under_every_page():
+    results = ValidationResult()
+    link = object()
+    for page in ("5", "6"):
+        results.add_error("Image inside Container: 'a.png' has been rotated", "IMAGES", page=page,
+                          location=f"on Page: {page}", subject="Image inside Container: 'a.png' has been rotated",
+                          group=link)
+
+    (finding,) = results.query()
+    assert finding.pages == ["5", "6"]
+    assert results.query(page="5") == results.query(page="6") == [finding]
+    assert results.query(check="IMAGES", page="6") == [finding]
+    assert page_tag(finding.pages) == "page:5|6"
+
+
+def test_records_round_trip_keeps_the_page_index():
+    results = ValidationResult()
+    link = object()
+    for page in ("5", "6"):
+        results.add_error("Image a.png is embedded.", "IMAGE", page=page,
+                          location=f"on Page: {page}", subject="Image a.png is embedded", group=link)
+    add_override(results, "1", "in text: 'a' on Page: 1")
+
+    restored = ValidationResult.from_records(results.to_records())
+    assert restored.to_dict() == results.to_dict()
+    assert [finding.get_text() for finding in restored.query(page="6")] == \
+        [finding.get_text() for finding in results.query(page="6")]
+
+
+@pytest.fixture(scope="module")
+def facing_results(facing_package_path):
+    return run_checker(facing_package_path).results
+
+
+def test_spread_shared_findings_list_every_page(facing_results):
+    shared = [finding for finding in facing_results.query(check="IMAGES") if len(finding.pages) > 1]
+    assert shared
+    for finding in shared:
+        for page in finding.pages:
+            assert finding in facing_results.query(page=page)
+
+
+def test_page_findings_are_not_merged_across_pages(facing_results):
+    for check in ("OVERRIDE", "PARAGRAPH_STYLE", "AUTOSIZE", "TABLE"):
+        for finding in facing_results.query(check=check):
+            assert len(finding.pages) == 1
+            assert finding.page != GENERAL_PAGE
+
+
+def test_every_finding_is_listed_once(facing_results):
+    listed = facing_results.query()
+    assert len(listed) == len(facing_results.findings)
+    assert {id(finding) for finding in listed} == {id(finding) for finding in facing_results.findings}
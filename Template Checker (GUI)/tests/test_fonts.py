@@ -0,0 +1,69 @@
+"""Font inspection of the Document Fonts folder, including TrueType collections."""
+import io
+import zipfile
+
+import pytest
+from fontTools.fontBuilder import FontBuilder
+from fontTools.ttLib import TTCollection, TTFont
+
+from idml_generator import build_font
+from main import FontInspector, SourceFoldersParser
+from package_source import ZipSource
+
+
+def build_collection(*families):
+    collection = TTCollection()
+    collection.fonts = [TTFont(io.BytesIO(build_font(family))) for family in families]
+    collection_file = io.BytesIO()
+    collection.save(collection_file)
+    return collection_file.getvalue()
+
+
+def build_variable_font(family):
+    font = TTFont(io.BytesIO(build_font(family)))
+    builder = FontBuilder(font=font)
+    builder.setupFvar([("wght", 100, 400, 900, "Weight")], [])
+    font_file = io.BytesIO()
+    builder.save(font_file)
+    return font_file.getvalue()
+
+
+def test_single_font():
+    (font,) = FontInspector().inspect(build_font("Brand Sans"))
+    assert (font.name, font.font_family, font.style) == ("Brand Sans", "Brand Sans", "Regular")
+    assert not font.variable_font
+
+
+def test_collection_gives_every_member_font():
+    fonts = FontInspector().inspect(build_collection("Brand Sans", "Brand Serif"))
+    assert [font.font_family for font in fonts] == ["Brand Sans", "Brand Serif"]
+    assert not any(font.variable_font for font in fonts)
+
+
+def test_variable_font_is_flagged():
+    (font,) = FontInspector().inspect(build_variable_font("Brand Flex"))
+    assert font.variable_font
+
+
+@pytest.fixture
+def fonts_source():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        package.writestr("Package/Document Fonts/Family.ttc", build_collection("Brand Sans", "Brand Serif"))
+        package.writestr("Package/Document Fonts/Flex.ttf", build_variable_font("Brand Flex"))
+        package.writestr("Package/Document Fonts/Broken.otf", b"not a font")
+        package.writestr("Package/Document Fonts/AdobeFnt.lst", b"")
+        package.writestr("Package/Links/a.png", b"png")
+    source = ZipSource(zipfile.ZipFile(io.BytesIO(buffer.getvalue())))
+    yield source
+    source.close()
+
+
+def test_document_fonts_folder(fonts_source):
+    parser = SourceFoldersParser("Package/Links", "Package/Document Fonts", fonts_source)
+    # The broken font is skipped, the collection adds one family per member font
+    assert [family.fontFamily for family in parser.get_document_fonts()] == \
+        ["Brand Sans", "Brand Serif", "Brand Flex"]
+    catalog = parser.get_document_font_catalog()
+    assert catalog.get_family("Brand Serif") is not None
+    assert [family.variableFont for family in parser.get_document_fonts()] == [False, False, True]
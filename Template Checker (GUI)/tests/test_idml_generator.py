@@ -0,0 +1,53 @@
+"""Synthetic packages of benchmarks/idml_generator.py, also the fixtures of these tests."""
+import io
+import zipfile
+
+import pytest
+
+from cli import run_checker
+from conftest import IDML_MEMBER, PACKAGE_NAME
+from idml_generator import build_package
+
+
+def test_same_seed_gives_identical_bytes(tmp_path):
+    first, second, other = (tmp_path / "first.zip", tmp_path / "second.zip", tmp_path / "other.zip")
+    build_package(str(first), pages=3, stories=4)
+    build_package(str(second), pages=3, stories=4)
+    build_package(str(other), pages=3, stories=4, seed=1)
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+
+
+def test_package_is_laid_out_like_a_hand_off(package_path):
+    with zipfile.ZipFile(package_path) as package:
+        names = package.namelist()
+        idml_data = package.read(IDML_MEMBER)
+    assert f"{PACKAGE_NAME}/Links/unused.png" in names
+    assert f"{PACKAGE_NAME}/Document Fonts/AdobeFnt.lst" in names
+    with zipfile.ZipFile(io.BytesIO(idml_data)) as idml:
+        assert idml.namelist()[0] == "mimetype"
+        assert len([name for name in idml.namelist() if name.startswith("Stories/")]) == 12
+
+
+def test_pages_are_laid_out_on_spreads(tmp_path):
+    path = tmp_path / "package.zip"
+    build_package(str(path), PACKAGE_NAME, pages=5, pages_per_spread=2)
+    with zipfile.ZipFile(path) as package, zipfile.ZipFile(io.BytesIO(package.read(IDML_MEMBER))) as idml:
+        spreads = [name for name in idml.namelist() if name.startswith("Spreads/")]
+        pages = sum(idml.read(name).count(b"<Page ") for name in spreads)
+    assert len(spreads) == 3
+    assert pages == 5
+
+
+def test_invalid_parameters_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        build_package(str(tmp_path / "package.zip"), colours=3)
+    with pytest.raises(ValueError):
+        build_package(str(tmp_path / "package.zip"), pages_per_spread=0)
+
+
+def test_every_severity_is_reported(package_path):
+    results = run_checker(package_path).results
+    assert results.has_errors()
+    for severity in ("error", "warning", "success"):
+        assert results.query(severity), severity
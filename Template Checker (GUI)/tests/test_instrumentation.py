@@ -0,0 +1,106 @@
+"""Profiler spans and counters, and the --profile report of the CLI."""
+import json
+import threading
+
+import cli
+import instrumentation
+from cli import run_checker
+from instrumentation import Profiler
+from main import ParallelLoader
+
+
+def test_spans_nest_and_total_their_counters():
+    profiler = Profiler(trace_memory=False)
+    with profiler.span("run"):
+        instrumentation.count("files")
+        with profiler.span("parse"):
+            instrumentation.count("files", 2)
+            instrumentation.count("elements", 10)
+
+    (run,) = profiler.spans
+    (parse,) = run.children
+    assert run.counters == {"files": 1}
+    assert run.total_counters() == {"files": 3, "elements": 10}
+    assert parse.to_dict()["counters"] == {"elements": 10, "files": 2}
+    assert run.wall_ms >= parse.wall_ms >= 0
+    assert "peak_memory_bytes" not in run.to_dict()
+
+
+def test_memory_peak_is_recorded_when_tracing():
+    profiler = Profiler()
+    with profiler.span("run"):
+        data = [bytes(1024) for _ in range(100)]
+    assert data
+    assert profiler.spans[0].peak_memory_bytes >= 100 * 1024
+
+
+def test_count_without_a_profiler_is_a_no_op():
+    assert not instrumentation.is_active()
+    instrumentation.count("files")
+    profiler = Profiler(trace_memory=False)
+    with profiler.span("run"):
+        assert instrumentation.is_active()
+    assert not instrumentation.is_active()
+    instrumentation.count("files")
+    assert profiler.spans[0].total_counters() == {}
+
+
+def test_concurrent_profilers_keep_their_own_counters():
+    both_open = threading.Barrier(2)
+    profilers = [Profiler(trace_memory=False), Profiler(trace_memory=False)]
+
+    def profiled_run(profiler, amount):
+        with profiler.span("run"):
+            both_open.wait()
+            instrumentation.count("files", amount)
+            both_open.wait()
+
+    threads = [threading.Thread(target=profiled_run, args=(profiler, amount))
+               for profiler, amount in zip(profilers, (1, 2))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [profiler.spans[0].counters for profiler in profilers] == [{"files": 1}, {"files": 2}]
+
+
+def test_loader_threads_count_into_the_callers_profiler():
+    profiler = Profiler(trace_memory=False)
+    with profiler.span("load"):
+        ParallelLoader(workers=4).map(lambda item: instrumentation.count("files", item), range(1, 9))
+    assert profiler.spans[0].counters == {"files": 36}
+
+
+def counted_run(package_path, counters, workers):
+    profiler = Profiler(trace_memory=False)
+    run_checker(package_path, workers=workers, profiler=profiler)
+    counters.append(profiler.spans[0].total_counters())
+
+
+def test_parallel_runs_count_the_same_as_a_single_run(package_path):
+    expected = []
+    counted_run(package_path, expected, workers=1)
+    counters = []
+    threads = [threading.Thread(target=counted_run, args=(package_path, counters, 4)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counters == expected * 2
+    assert expected[0]["xml_files_parsed"] > 0
+
+
+def test_cli_writes_the_profile(package_path, tmp_path, capsys):
+    profile_path = tmp_path / "profile.json"
+    cli.main([package_path, "--no-font-cache", "--no-result-cache", "--no-model-cache",
+              "--profile", str(profile_path), "--no-profile-memory"])
+    capsys.readouterr()
+
+    profile = json.loads(profile_path.read_text(encoding="utf-8"))
+    assert profile["package"] == package_path
+    assert profile["trace_memory"] is False
+    (run,) = profile["spans"]
+    assert run["name"] == "run_state_machine"
+    names = [child["name"] for child in run["children"]]
+    assert "PARSE_XML" in names and "RESULTS" in names
+    assert run["counters"]["xml_files_parsed"] > 0
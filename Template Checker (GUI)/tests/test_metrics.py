@@ -0,0 +1,128 @@
+"""Prometheus metrics of the checker and their text exposition."""
+import urllib.error
+import urllib.request
+
+import pytest
+
+import cli
+from cli import run_checker
+from main import ResultCache
+from metrics import CONTENT_TYPE, CheckerMetrics, MetricsRegistry, start_metrics_server
+
+
+def test_counter_renders_a_line_per_label_set():
+    registry = MetricsRegistry()
+    counter = registry.counter("runs_total", "Runs.", ["status"])
+    counter.inc(status="passed")
+    counter.inc(2, status="failed")
+    counter.inc(status='say "hi"\n')
+    assert registry.render() == (
+        "# HELP runs_total Runs.\n"
+        "# TYPE runs_total counter\n"
+        'runs_total{status="failed"} 2\n'
+        'runs_total{status="passed"} 1\n'
+        'runs_total{status="say \\"hi\\"\\n"} 1\n')
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("duration_seconds", "Duration.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.render() == [
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="1.0"} 3',
+        'duration_seconds_bucket{le="+Inf"} 4',
+        "duration_seconds_sum 6.05",
+        "duration_seconds_count 4",
+    ]
+
+
+def test_metric_names_are_registered_once():
+    registry = MetricsRegistry()
+    registry.counter("runs_total", "Runs.")
+    with pytest.raises(ValueError):
+        registry.histogram("runs_total", "Runs.")
+
+
+def test_worker_snapshot_merges_into_the_parent():
+    parent = CheckerMetrics()
+    parent.packages_validated.inc(status="passed")
+    worker = CheckerMetrics()
+    worker.packages_validated.inc(status="passed")
+    worker.packages_validated.inc(status="failed")
+    worker.package_duration.observe(0.2)
+
+    parent.registry.merge(worker.registry.snapshot())
+    assert parent.packages_validated.snapshot() == {("passed",): 2, ("failed",): 1}
+    assert parent.package_duration.snapshot() == worker.package_duration.snapshot()
+
+
+def test_textfile_is_replaced_in_one_step(tmp_path):
+    metrics = CheckerMetrics()
+    metrics.packages_validated.inc(status="passed")
+    path = tmp_path / "checker.prom"
+    path.write_text("stale\n", encoding="utf-8")
+    metrics.write_textfile(str(path))
+    assert path.read_text(encoding="utf-8") == metrics.render()
+    assert [child.name for child in tmp_path.iterdir()] == ["checker.prom"]
+
+
+def test_server_answers_metrics_only():
+    metrics = CheckerMetrics()
+    metrics.packages_validated.inc(status="passed")
+    server = start_metrics_server(metrics.registry, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert response.read().decode("utf-8") == metrics.render()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/other")
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_run_records_outcome_states_and_findings(package_path):
+    metrics = CheckerMetrics()
+    checker = run_checker(package_path, metrics=metrics)
+
+    assert metrics.packages_validated.snapshot() == {("failed",): 1}
+    assert [sum(counts) for counts, _ in metrics.package_duration.snapshot().values()] == [1]
+    states = {key[0] for key in metrics.state_duration.snapshot()}
+    assert {"PARSE_XML", "PAR_CHECK", "RESULTS"} <= states
+    assert metrics.bytes_decompressed.snapshot()[()] > 0
+
+    occurrences = {}
+    for finding in checker.results.findings:
+        key = (finding.check, finding.severity)
+        occurrences[key] = occurrences.get(key, 0) + finding.count
+    assert metrics.findings.snapshot() == occurrences
+
+
+def test_cached_run_counts_the_lookup_not_the_findings(package_path, tmp_path):
+    metrics = CheckerMetrics()
+    result_cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    try:
+        run_checker(package_path, result_cache=result_cache, metrics=metrics)
+        findings = metrics.findings.snapshot()
+        run_checker(package_path, result_cache=result_cache, metrics=metrics)
+    finally:
+        result_cache.close()
+    assert metrics.findings.snapshot() == findings
+    assert metrics.cache_lookups.snapshot() == {("result", "miss"): 1, ("result", "hit"): 1}
+    assert metrics.packages_validated.snapshot() == {("failed",): 2}
+
+
+def test_cli_writes_the_metrics_file(package_path, tmp_path, capsys):
+    path = tmp_path / "checker.prom"
+    exit_code = cli.main([package_path, "--no-font-cache", "--no-result-cache", "--no-model-cache",
+                          "--metrics-file", str(path)])
+    capsys.readouterr()
+    assert exit_code == cli.EXIT_FAILED
+    text = path.read_text(encoding="utf-8")
+    assert 'template_checker_packages_validated_total{status="failed"} 1' in text
+    assert "template_checker_package_duration_seconds_count 1" in text
+    assert 'template_checker_findings_total{check="TABLE",severity="error"}' in text
@@ -0,0 +1,68 @@
+"""Parsed IDML members reused from the model cache."""
+import json
+import sqlite3
+
+import pytest
+
+from cli import run_checker
+from conftest import edit_idml_member, report
+from instrumentation import Profiler
+from main import ModelCache
+
+
+@pytest.fixture
+def model_cache(tmp_path):
+    cache = ModelCache(str(tmp_path / "models.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def run_counted(package_path, **kwargs):
+    """Runs the checker with a profiler, returns it with the counters of the whole run."""
+    profiler = Profiler(trace_memory=False)
+    checker = run_checker(package_path, profiler=profiler, **kwargs)
+    return checker, profiler.spans[0].total_counters()
+
+
+def test_warm_run_parses_nothing(package_path, expected_report, model_cache):
+    cold, cold_counters = run_counted(package_path, model_cache=model_cache)
+    warm, warm_counters = run_counted(package_path, model_cache=model_cache)
+    assert report(cold) == report(warm) == expected_report
+    members = cold_counters["model_cache_misses"]
+    assert "model_cache_hits" not in cold_counters
+    assert warm_counters["model_cache_hits"] == members
+    assert "model_cache_misses" not in warm_counters
+
+
+def test_streaming_uses_the_same_models(package_path, expected_report, model_cache):
+    run_checker(package_path, model_cache=model_cache)
+    assert report(run_checker(package_path, streaming=True, model_cache=model_cache)) == expected_report
+
+
+def test_only_changed_members_are_parsed_again(package_path, tmp_path, model_cache):
+    _, cold_counters = run_counted(package_path, model_cache=model_cache)
+    edited_path = edit_idml_member(package_path, tmp_path / "edited.zip", "Stories/Story_u1.xml",
+                                   lambda data: data.replace(b"<Content>", b"<Content>Edited ", 1))
+    edited, counters = run_counted(edited_path, model_cache=model_cache)
+    assert counters["model_cache_misses"] == 1
+    assert counters["model_cache_hits"] == cold_counters["model_cache_misses"] - 1
+    assert report(edited) == report(run_checker(edited_path))
+
+
+def test_models_are_stored_as_json(package_path, tmp_path):
+    cache_path = str(tmp_path / "models.sqlite3")
+    model_cache = ModelCache(cache_path)
+    run_checker(package_path, model_cache=model_cache)
+    model_cache.close()
+    with sqlite3.connect(cache_path) as connection:
+        rows = connection.execute("SELECT key, value FROM entries").fetchall()
+    assert rows
+    for key, value in rows:
+        assert key.startswith(f"v{ModelCache.FORMAT_VERSION}:")
+        json.loads(bytes(value).decode("utf-8"))
+
+
+def test_extracted_packages_bypass_the_cache(package_path, tmp_path, model_cache):
+    run_checker(package_path, in_place=False, scratch_dir=str(tmp_path), model_cache=model_cache)
+    model_cache.flush()
+    assert len(model_cache.store) == 0
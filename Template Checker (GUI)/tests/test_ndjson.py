@@ -0,0 +1,123 @@
+"""NDJSON records written by NdjsonSink while the checker runs."""
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from cli import run_checker
+from error_handling import NdjsonSink
+from main import FrontifyChecker, ResultCache, States
+
+
+def read_records(output):
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def run_streamed(package_path, **options):
+    output = io.StringIO()
+    checker = run_checker(package_path, finding_sink=NdjsonSink(output), **options)
+    return checker, read_records(output)
+
+
+def state_events(records):
+    return [(record["state"], record["event"]) for record in records if record["record"] == "state"]
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_every_started_state_finishes(package_path):
+    _, records = run_streamed(package_path)
+    events = state_events(records)
+    started = [state for state, event in events if event == "started"]
+    finished = [state for state, event in events if event == "finished"]
+    assert "RESULTS" in started
+    assert sorted(started) == sorted(finished)
+    # Each state finishes before the next one starts, except the nested check engine
+    open_states = []
+    for state, event in events:
+        if event == "started":
+            open_states.append(state)
+        else:
+            assert open_states.pop() == state
+    assert not open_states
+
+
+def test_check_engine_is_nested_in_the_first_check_state(package_path):
+    _, records = run_streamed(package_path)
+    events = state_events(records)
+    engine_start = events.index(("CHECK_ENGINE", "started"))
+    assert events[engine_start - 1] == ("PAR_CHECK", "started")
+    assert events[engine_start + 1] == ("CHECK_ENGINE", "finished")
+    assert events[engine_start + 2] == ("PAR_CHECK", "finished")
+
+
+def test_findings_carry_a_state_of_the_run(package_path):
+    _, records = run_streamed(package_path)
+    started = {state for state, event in state_events(records) if event == "started"}
+    findings = [record for record in records if record["record"] == "finding"]
+    assert findings
+    # The check engine streams its findings under the document check that owns them
+    assert {record["state"] for record in findings} <= started - {"CHECK_ENGINE"}
+
+
+def occurrences(records):
+    """Occurrences per check and severity, live records have a count of 1 each."""
+    counts = {}
+    for record in records:
+        if record["record"] == "finding":
+            key = (record["check"], record["severity"])
+            counts[key] = counts.get(key, 0) + record["count"]
+    return counts
+
+
+def test_summary_is_the_last_record(package_path):
+    checker, records = run_streamed(package_path)
+    summary = records[-1]
+    assert summary["record"] == "summary"
+    assert summary["cached"] is False
+    assert state_events(records)[-1] == ("RESULTS", "finished")
+    assert summary["errors"] == len(checker.results.query("error"))
+    assert summary["warnings"] == len(checker.results.query("warning"))
+    assert occurrences(records) == occurrences(
+        [{"record": "finding", "check": finding.check, "severity": finding.severity, "count": finding.count}
+         for finding in checker.results.findings])
+
+
+def test_cached_replay_matches_the_live_records(package_path, result_cache):
+    _, live = run_streamed(package_path, result_cache=result_cache)
+    checker, cached = run_streamed(package_path, result_cache=result_cache)
+    assert checker.results_from_cache
+
+    assert state_events(cached) == [("RESULTS", "started"), ("RESULTS", "finished")]
+    assert occurrences(cached) == occurrences(live)
+    live_fields = {frozenset(record) for record in live if record["record"] == "finding"}
+    cached_findings = [record for record in cached if record["record"] == "finding"]
+    assert all(record.pop("cached") is True for record in cached_findings)
+    assert {frozenset(record) for record in cached_findings} == live_fields
+    assert cached[-1]["record"] == "summary" and cached[-1]["cached"] is True
+
+
+def test_cancelled_run_ends_with_a_cancelled_record(package_path):
+    output = io.StringIO()
+    checker = FrontifyChecker(finding_sink=NdjsonSink(output))
+    checker.source_file_path = package_path
+
+    def cancel_while_parsing(state):
+        if state == States.PARSE_XML:
+            checker.cancel()
+
+    checker.on_state = cancel_while_parsing
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        checker.run_state_machine()
+
+    records = read_records(output)
+    assert checker.cancelled
+    assert state_events(records)[-2:] == [("PARSE_XML", "finished"), ("MASTERPAGE_CHECK", "cancelled")]
+    assert not [record for record in records if record["record"] == "summary"]
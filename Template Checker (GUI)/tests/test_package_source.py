@@ -0,0 +1,62 @@
+"""Reading a package in place from its ZIP instead of extracting it."""
+import os
+import zipfile
+
+from cli import run_checker
+from conftest import report
+from package_source import FolderSource, ZipSource, central_directory_digest
+
+
+def test_extract_matches_in_place(package_path, expected_report, tmp_path):
+    checker = run_checker(package_path, in_place=False, scratch_dir=str(tmp_path))
+    assert report(checker) == expected_report
+    assert os.path.isdir(tmp_path / "data")
+
+
+def test_extract_matches_in_place_on_facing_pages(facing_package_path, expected_facing_report, tmp_path):
+    checker = run_checker(facing_package_path, in_place=False, scratch_dir=str(tmp_path))
+    assert report(checker) == expected_facing_report
+
+
+def test_in_place_writes_nothing(package_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    run_checker(package_path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_zip_source_lists_folders_without_macosx(tmp_path):
+    zip_path = tmp_path / "package.zip"
+    with zipfile.ZipFile(zip_path, "w") as zip_file:
+        zip_file.writestr("Package/Links/a.png", b"a")
+        zip_file.writestr("Package/Package.idml", b"idml")
+        zip_file.writestr("__MACOSX/Package/._a.png", b"")
+    source = ZipSource.from_path(str(zip_path))
+    try:
+        assert source.listdir("") == ["Package"]
+        assert sorted(source.listdir("Package")) == ["Links", "Package.idml"]
+        assert source.isfile("Package/Links/a.png") and not source.isfile("Package/Links")
+        assert source.exists("Package/Links/") and not source.exists("__MACOSX")
+        assert source.read("Package/Package.idml") == b"idml"
+        assert source.getsize("Package/Links/a.png") == 1
+        assert source.bytes_decompressed == 4
+        assert list(source.walk_files("Package/Links")) == ["Package/Links/a.png"]
+    finally:
+        source.close()
+
+
+def test_folder_source_has_no_member_signature(tmp_path):
+    (tmp_path / "a.xml").write_bytes(b"<a/>")
+    source = FolderSource()
+    assert source.read(str(tmp_path / "a.xml")) == b"<a/>"
+    assert source.member_signature(str(tmp_path / "a.xml")) is None
+    assert source.listdir(str(tmp_path / "missing")) == []
+
+
+def test_digest_follows_the_members(tmp_path):
+    first, second = tmp_path / "first.zip", tmp_path / "second.zip"
+    for path, data in ((first, b"a"), (second, b"b")):
+        with zipfile.ZipFile(path, "w") as zip_file:
+            zip_file.writestr("Package/a.xml", data)
+    assert central_directory_digest(str(first)) == central_directory_digest(str(first))
+    assert central_directory_digest(str(first)) != central_directory_digest(str(second))
+    assert central_directory_digest(str(first)) != central_directory_digest(str(first), salt="v2")
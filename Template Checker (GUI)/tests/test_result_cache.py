@@ -0,0 +1,60 @@
+"""Whole-run results answered from the result cache."""
+import zipfile
+
+import pytest
+
+from cli import run_checker
+from conftest import IDML_MEMBER, build_clean_package, report
+from main import ResultCache
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_cached_run_matches_cold_run(package_path, expected_report, result_cache):
+    cold = run_checker(package_path, result_cache=result_cache)
+    assert not cold.results_from_cache
+    cached = run_checker(package_path, result_cache=result_cache)
+    assert cached.results_from_cache
+    assert report(cold) == report(cached) == expected_report
+    assert [finding.get_text() for finding in cached.results.query()] == \
+        [finding.get_text() for finding in cold.results.query()]
+
+
+def test_cached_run_matches_on_facing_pages(facing_package_path, expected_facing_report, result_cache):
+    run_checker(facing_package_path, result_cache=result_cache)
+    cached = run_checker(facing_package_path, result_cache=result_cache)
+    assert cached.results_from_cache
+    assert report(cached) == expected_facing_report
+
+
+def test_changed_package_is_checked_again(tmp_path, result_cache):
+    package_path = build_clean_package(tmp_path / "package.zip")
+    run_checker(package_path, result_cache=result_cache)
+    build_clean_package(package_path, master_spreads=False)
+    checker = run_checker(package_path, result_cache=result_cache)
+    assert not checker.results_from_cache
+    assert checker.results.query(severity="warning", check="CODE ERROR")
+
+
+def test_code_error_warning_is_cached(tmp_path, result_cache):
+    package_path = build_clean_package(tmp_path / "package.zip", master_spreads=False)
+    run_checker(package_path, result_cache=result_cache)
+    assert run_checker(package_path, result_cache=result_cache).results_from_cache
+
+
+def test_failed_run_is_not_cached(package_path, tmp_path, result_cache):
+    broken_path = tmp_path / "broken_idml.zip"
+    with zipfile.ZipFile(package_path) as package, zipfile.ZipFile(broken_path, "w") as broken:
+        for info in package.infolist():
+            broken.writestr(info, b"not an idml" if info.filename == IDML_MEMBER else package.read(info))
+
+    for _ in range(2):
+        checker = run_checker(str(broken_path), result_cache=result_cache)
+        assert not checker.results_from_cache
+        assert checker.results.query(severity="error", check="CODE ERROR")
+    assert len(result_cache.store) == 0
@@ -0,0 +1,127 @@
+"""The local HTTP validation service."""
+import http.client
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+
+import pytest
+
+import batch
+import serve
+from batch import STATUS_CRASHED, STATUS_PASSED
+from conftest import build_clean_package
+
+CRASH_MEMBER = "Clean/crash.txt"
+
+
+def crash_on_marked_packages(run_checker):
+    def run_or_crash(package_path, **kwargs):
+        with zipfile.ZipFile(package_path) as package:
+            if CRASH_MEMBER in package.namelist():
+                os._exit(1)
+        return run_checker(package_path, **kwargs)
+    return run_or_crash
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**options):
+        service = serve.ValidationService(workers=1, use_font_cache=False, **options)
+        server = serve.ValidationServer(("127.0.0.1", 0), service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+        server.service.shutdown()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=60)
+    try:
+        if headers is None:
+            connection.request(method, path, body=body)
+        else:
+            connection.putrequest(method, path)
+            for name, value in headers.items():
+                connection.putheader(name, value)
+            connection.endheaders(body)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def clean_package(tmp_path):
+    with open(build_clean_package(tmp_path / "clean.zip"), "rb") as package_file:
+        return package_file.read()
+
+
+def test_validate_returns_the_findings(start_server, clean_package):
+    server = start_server()
+    status, _, body = request(server, "POST", "/validate", clean_package)
+    entry = json.loads(body)
+    assert status == 200
+    assert entry["status"] == STATUS_PASSED and entry["results"]["successes"]
+    assert "package" not in entry
+
+    status, _, body = request(server, "GET", "/metrics")
+    assert status == 200
+    assert 'template_checker_packages_validated_total{status="passed"} 1' in body.decode("utf-8")
+
+
+@pytest.mark.parametrize("body, headers, expected_status", [
+    (b"not a zip", None, 400),
+    (b"", {"Content-Length": "abc"}, 400),
+    (b"", {"Content-Length": "-5"}, 400),
+    (b"", {}, 411),
+    (b"x" * 2048, None, 413),
+])
+def test_bad_requests_are_rejected(start_server, body, headers, expected_status):
+    server = start_server(max_upload_bytes=1024)
+    status, _, response_body = request(server, "POST", "/validate", body, headers)
+    assert status == expected_status
+    assert "error" in json.loads(response_body)
+
+
+def test_busy_service_answers_429(start_server, clean_package):
+    server = start_server(queue_size=0)
+    assert server.service.try_acquire()
+    try:
+        status, headers, _ = request(server, "POST", "/validate", clean_package)
+    finally:
+        server.service.release()
+    assert status == 429 and headers["Retry-After"] == "1"
+    assert request(server, "GET", "/health")[2] == b'{"workers": 1, "capacity": 1, "in_flight": 0}'
+    assert "template_checker_requests_rejected_total 1" in server.service.metrics.render()
+
+
+def test_unknown_paths(start_server):
+    server = start_server()
+    assert request(server, "GET", "/other")[0] == 404
+    assert request(server, "POST", "/other", b"")[0] == 404
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="workers do not inherit test patches without fork")
+def test_dead_worker_is_replaced(start_server, clean_package, tmp_path, monkeypatch):
+    crash_path = build_clean_package(tmp_path / "crash.zip")
+    with zipfile.ZipFile(crash_path, "a") as package:
+        package.writestr(CRASH_MEMBER, b"")
+    with open(crash_path, "rb") as package_file:
+        crash_package = package_file.read()
+    monkeypatch.setattr(batch, "run_checker", crash_on_marked_packages(batch.run_checker))
+    server = start_server()
+
+    status, _, body = request(server, "POST", "/validate", crash_package)
+    assert status == 500 and json.loads(body)["status"] == STATUS_CRASHED
+    status, _, body = request(server, "POST", "/validate", clean_package)
+    assert status == 200 and json.loads(body)["status"] == STATUS_PASSED
@@ -0,0 +1,66 @@
+"""The iterparse story reader must read what the tree reader reads."""
+import io
+import zipfile
+
+import pytest
+
+from cli import run_checker
+from conftest import report
+from main import FontsParser, SpreadsParser, StoriesParser, StylesParser
+from package_source import ZipSource
+
+FONTS_XML = """<?xml version="1.0"?><Fonts>
+<FontFamily Self="di1" Name="Arial"><Font Name="Arial Regular" FontType="TrueType"/></FontFamily>
+</Fonts>"""
+STYLES_XML = """<?xml version="1.0"?><Styles><RootParagraphStyleGroup>
+<ParagraphStyle Self="ParagraphStyle/Body" Name="Body"/>
+</RootParagraphStyleGroup></Styles>"""
+# Ranges inside a table are not directly under the Story, neither reader takes them
+STORY_XML = """<?xml version="1.0"?><Root><Story Self="u1">
+<ParagraphStyleRange AppliedParagraphStyle="ParagraphStyle/Body">
+<CharacterStyleRange AppliedCharacterStyle="CharacterStyle/Bold" PointSize="12">
+<Properties><AppliedFont type="string">Arial</AppliedFont></Properties><Content>First</Content>
+</CharacterStyleRange>
+<CharacterStyleRange><Table><Cell><ParagraphStyleRange AppliedParagraphStyle="ParagraphStyle/Cell">
+<CharacterStyleRange><Content>In a cell</Content></CharacterStyleRange>
+</ParagraphStyleRange></Cell></Table></CharacterStyleRange>
+</ParagraphStyleRange>
+<ParagraphStyleRange><CharacterStyleRange><Content>No style</Content></CharacterStyleRange></ParagraphStyleRange>
+</Story><Story Self="u2"/></Root>"""
+
+
+@pytest.fixture
+def stories_parser():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as idml:
+        idml.writestr("Resources/Fonts.xml", FONTS_XML)
+        idml.writestr("Resources/Styles.xml", STYLES_XML)
+        idml.writestr("Spreads/Spread_s1.xml",
+                      '<Root><Spread Self="s1"><Page Name="1"/><TextFrame Self="tf1" ParentStory="u1"/></Spread></Root>')
+        idml.writestr("Stories/Story_u1.xml", STORY_XML)
+    source = ZipSource(zipfile.ZipFile(io.BytesIO(buffer.getvalue())))
+    spreads_parser = SpreadsParser("Spreads", source)
+    parser = StoriesParser("Stories", StylesParser("Resources/Styles.xml", source),
+                           FontsParser("Resources/Fonts.xml", source), spreads_parser, source)
+    yield parser
+    source.close()
+
+
+def test_readers_return_the_same_records(stories_parser):
+    records = stories_parser._parse_story_file("Stories/Story_u1.xml")
+    assert stories_parser._stream_story_file("Stories/Story_u1.xml") == records
+    assert [story_id for story_id, _ in records] == ["u1", "u2"]
+    (body, body_ranges), (no_style, _) = records[0][1]
+    assert (body, no_style) == ("ParagraphStyle/Body", None)
+    applied_char_style, content, applied_font, overrides, has_table = body_ranges[0]
+    assert (applied_char_style, content, applied_font) == ("CharacterStyle/Bold", "First", "Arial")
+    assert overrides["PointSize"] == "12"
+    assert not has_table and body_ranges[1][4]
+
+
+def test_streaming_matches_tree(package_path, expected_report):
+    assert report(run_checker(package_path, streaming=True)) == expected_report
+
+
+def test_streaming_matches_tree_on_facing_pages(facing_package_path, expected_facing_report):
+    assert report(run_checker(facing_package_path, streaming=True)) == expected_facing_report
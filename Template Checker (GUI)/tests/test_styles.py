@@ -0,0 +1,68 @@
+"""Style inheritance through StyleResolver."""
+from cli import run_checker
+from conftest import edit_idml_member
+from main import StyleResolver
+
+STYLES = {
+    "ParagraphStyle/Base": {"AppliedFont": "Arial", "PointSize": "10"},
+    "ParagraphStyle/Heading": {"BasedOn": "ParagraphStyle/Base", "PointSize": "20"},
+    "ParagraphStyle/Loose": {"AppliedFont": ""},
+}
+
+
+def test_properties_are_inherited_from_the_base():
+    resolver = StyleResolver(STYLES, "ParagraphStyle/")
+    assert resolver.resolve("ParagraphStyle/Heading", "PointSize") == ("20", None)
+    assert resolver.resolve("ParagraphStyle/Heading", "AppliedFont") == ("Arial", "ParagraphStyle/Base")
+
+
+def test_unset_property_reports_the_chain_root():
+    resolver = StyleResolver(STYLES, "ParagraphStyle/")
+    assert resolver.resolve("ParagraphStyle/Heading", "Tracking") == (None, "ParagraphStyle/Base")
+    assert resolver.resolve("ParagraphStyle/Loose", "AppliedFont") == (None, None)
+
+
+def test_missing_style_id_resolves_to_nothing():
+    resolver = StyleResolver(STYLES, "ParagraphStyle/")
+    assert resolver.resolve(None, "AppliedFont") == (None, None)
+    assert resolver.resolve("", "AppliedFont") == (None, None)
+    assert resolver.get_effective_properties(None) == {}
+
+
+def test_id_prefix_is_normalized():
+    styles = {"ParagraphStyle/$ID/Base": {"AppliedFont": "Arial"},
+              "ParagraphStyle/Body": {"BasedOn": "$ID/Base"}}
+    resolver = StyleResolver(styles, "ParagraphStyle/")
+    assert resolver.resolve("ParagraphStyle/Body", "AppliedFont") == ("Arial", "ParagraphStyle/$ID/Base")
+
+
+def test_cycle_ends_the_chain():
+    styles = {"ParagraphStyle/A": {"BasedOn": "ParagraphStyle/B", "AppliedFont": "Arial"},
+              "ParagraphStyle/B": {"BasedOn": "ParagraphStyle/A", "PointSize": "12"}}
+    resolver = StyleResolver(styles, "ParagraphStyle/")
+    assert resolver.resolve("ParagraphStyle/A", "PointSize") == ("12", "ParagraphStyle/B")
+    # B closes the cycle, so it is the root of the chain
+    assert resolver.resolve("ParagraphStyle/B", "AppliedFont") == (None, None)
+    assert resolver.cyclic_style_ids == {"ParagraphStyle/A"}
+
+
+def test_chain_is_cut_at_max_depth():
+    styles = {f"ParagraphStyle/{level}": {"BasedOn": f"ParagraphStyle/{level + 1}"} for level in range(10)}
+    styles["ParagraphStyle/10"] = {"AppliedFont": "Arial"}
+    resolver = StyleResolver(styles, "ParagraphStyle/", max_depth=4)
+    value, _ = resolver.resolve("ParagraphStyle/0", "AppliedFont")
+    assert value is None
+    assert resolver.truncated_style_ids == {"ParagraphStyle/0"}
+    # Styles deeper in the chain resolve on their own
+    assert resolver.resolve("ParagraphStyle/8", "AppliedFont") == ("Arial", "ParagraphStyle/10")
+
+
+def test_range_without_paragraph_style_is_checked(package_path, tmp_path):
+    def drop_applied_style(data):
+        return data.replace(b' AppliedParagraphStyle="ParagraphStyle/$ID/NormalParagraphStyle"', b"", 1)
+
+    edited_path = edit_idml_member(package_path, tmp_path / "no_style.zip",
+                                   "Stories/Story_u0.xml", drop_applied_style)
+    results = run_checker(edited_path).results
+    assert not results.query(check="CODE ERROR")
+    assert results.query(severity="error") and results.query(severity="warning")
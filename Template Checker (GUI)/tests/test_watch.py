@@ -0,0 +1,124 @@
+"""The watch-folder daemon."""
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import watch
+from batch import STATUS_CRASHED, STATUS_FAILED, STATUS_PASSED
+from conftest import build_clean_package
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "hand-off"
+    folder.mkdir()
+    return folder
+
+
+def settle(watcher):
+    """Two scans, the first only records the signatures."""
+    assert watcher.scan() == []
+    return watcher.scan()
+
+
+def drain(watcher):
+    entries = []
+    while not watcher.jobs.empty():
+        path, signature = watcher.jobs.get()
+        entries.append(watcher.validate(path))
+        watcher.validated[path] = signature
+        watcher.queued.discard(path)
+    return entries
+
+
+def test_only_settled_packages_are_queued(folder):
+    package_path = build_clean_package(folder / "clean.zip")
+    (folder / ".partial.zip").write_bytes(b"")
+    (folder / "notes.txt").write_text("")
+    assert settle(watch.PackageWatcher(str(folder), settle_seconds=3600)) == []
+    assert settle(watch.PackageWatcher(str(folder), settle_seconds=0)) == [package_path]
+
+
+def test_recursive_finds_packages_in_sub_folders(folder):
+    (folder / "client").mkdir()
+    package_path = build_clean_package(folder / "client" / "clean.zip")
+    assert watch.PackageWatcher(str(folder)).find_packages() == []
+    assert watch.PackageWatcher(str(folder), recursive=True).find_packages() == [package_path]
+
+
+def test_results_are_written_next_to_the_package(folder, package_path):
+    clean_path = build_clean_package(folder / "clean.zip")
+    failing_path = shutil.copy(package_path, folder / "failing.zip")
+    watcher = watch.PackageWatcher(str(folder), settle_seconds=0)
+    settle(watcher)
+    statuses = {os.path.basename(entry["package"]): entry["status"] for entry in drain(watcher)}
+    assert statuses == {"clean.zip": STATUS_PASSED, "failing.zip": STATUS_FAILED}
+    for path in (clean_path, str(failing_path)):
+        with open(watch.results_path(path), encoding="utf-8") as results_file:
+            assert json.load(results_file)["package"] == path
+
+
+def test_updated_package_is_validated_again(folder):
+    package_path = build_clean_package(folder / "clean.zip")
+    watcher = watch.PackageWatcher(str(folder), settle_seconds=0)
+    settle(watcher)
+    drain(watcher)
+    assert settle(watcher) == []
+
+    build_clean_package(package_path, master_spreads=False)
+    later = time.time() + 10
+    os.utime(package_path, (later, later))
+    assert settle(watcher) == [package_path]
+    (entry,) = drain(watcher)
+    assert entry["results"]["warnings"]
+
+
+def test_restart_skips_packages_with_current_results(folder):
+    package_path = build_clean_package(folder / "clean.zip")
+    watcher = watch.PackageWatcher(str(folder), settle_seconds=0)
+    settle(watcher)
+    drain(watcher)
+    assert settle(watch.PackageWatcher(str(folder), settle_seconds=0)) == []
+    os.remove(watch.results_path(package_path))
+    assert settle(watch.PackageWatcher(str(folder), settle_seconds=0)) == [package_path]
+
+
+def test_checker_failure_is_reported_as_crashed(folder, monkeypatch):
+    package_path = build_clean_package(folder / "clean.zip")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(watch, "run_checker", fail)
+    entry = watch.PackageWatcher(str(folder)).validate(package_path)
+    assert entry["status"] == STATUS_CRASHED and entry["error"] == "RuntimeError: broken"
+    assert os.path.isfile(watch.results_path(package_path))
+
+
+def test_run_validates_dropped_packages(folder):
+    validated = []
+    done = threading.Event()
+
+    def on_validated(entry):
+        validated.append(entry)
+        done.set()
+
+    watcher = watch.PackageWatcher(str(folder), settle_seconds=0, poll_seconds=0.05, on_validated=on_validated)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        build_clean_package(folder / "clean.zip")
+        assert done.wait(30)
+    finally:
+        watcher.stop()
+        thread.join(30)
+    assert not thread.is_alive()
+    assert [entry["status"] for entry in validated] == [STATUS_PASSED]
+
+
+def test_main_rejects_a_missing_folder(tmp_path):
+    assert watch.main([str(tmp_path / "missing")]) == 2